@@ -1,4 +1,9 @@
 
+import array
+import heapq
+import math
+import struct
+import sys
 import time
 
 class UART:
@@ -8,16 +13,32 @@ class UART:
 
     def __init__(self, port, baud):
         print("UART", port, "baud", baud)
+        # Script supplying the host's side of the conversation (None to use testString)
+        self.script = uartScript
+        self.rxBuf = bytearray()
 
     def write(self, ch):
-        print(ch,end="")
+        if uartCapture is not None:
+            uartCapture.record(clock.nowUsecs(), UART_CAPTURE_WRITE, ch.encode("ascii"))
+        if self.script is None:
+            print(ch,end="")
+            return
+        self.script.written(ch.encode("ascii"))
 
     def any(self):
-        return len(self.testString)-self.testStringPos
+        if self.script is None:
+            return len(self.testString)-self.testStringPos
+        self.rxBuf += self.script.poll()
+        return len(self.rxBuf)
 
     def readchar(self):
-        ch = ord(self.testString[self.testStringPos])
-        self.testStringPos += 1
+        if self.script is None:
+            ch = ord(self.testString[self.testStringPos])
+            self.testStringPos += 1
+        else:
+            ch = self.rxBuf.pop(0)
+        if uartCapture is not None:
+            uartCapture.record(clock.nowUsecs(), UART_CAPTURE_READ, bytes([ch]))
         return ch
 
 class LCD:
@@ -37,17 +58,404 @@ class LCD:
     def show(self):
         return
 
+# Simulated monotonic clock in microseconds - delay and udelay advance it rather than waiting
+# In fast forward mode time only passes when something waits so runs are exact and reproducible (and
+# much quicker than real time) - in real time mode the clock also follows the wall clock and waits
+# are slept (lazily, only once the clock gets more than maxLeadUsecs ahead of the wall clock)
+class VirtualClock:
+
+    def __init__(self, realTime=False, maxLeadUsecs=2000):
+        self.realTime = realTime
+        self.maxLeadUsecs = maxLeadUsecs
+        self.virtualUsecs = 0
+        self.wallStart = time.perf_counter()
+
+    # Wall clock time since the clock was created in usecs
+    def wallUsecs(self):
+        return int((time.perf_counter() - self.wallStart) * 1000000)
+
+    def nowUsecs(self):
+        if self.realTime:
+            self.virtualUsecs = max(self.virtualUsecs, self.wallUsecs())
+        return self.virtualUsecs
+
+    def advance(self, usecs):
+        self.virtualUsecs = self.nowUsecs() + int(usecs)
+        if self.realTime and self.virtualUsecs - self.wallUsecs() > self.maxLeadUsecs:
+            self.sync()
+
+    # Move the clock on to a later time (never backwards)
+    def advanceTo(self, usecs):
+        if usecs > self.nowUsecs():
+            self.advance(math.ceil(usecs - self.virtualUsecs))
+
+    # Sleep until the wall clock reaches the virtual clock in real time mode
+    def sync(self):
+        if self.realTime:
+            aheadUsecs = self.virtualUsecs - self.wallUsecs()
+            if aheadUsecs > 0:
+                time.sleep(aheadUsecs / 1000000)
+
+    def setRealTime(self, realTime):
+        self.nowUsecs()
+        self.wallStart = time.perf_counter() - self.virtualUsecs / 1000000
+        self.realTime = realTime
+
+    def reset(self):
+        self.virtualUsecs = 0
+        self.wallStart = time.perf_counter()
+
+    # utime style ticks so code timed with utime.ticks_us on the PyBoard can be timed on this clock
+    def ticks_us(self):
+        return self.nowUsecs()
+
+    def ticks_diff(self, endTicks, startTicks):
+        return endTicks - startTicks
+
+# The clock used by the functions below (and to timestamp pin traces)
+clock = VirtualClock()
+
+def useClock(newClock):
+    global clock
+    clock = newClock
+    return clock
+
 def delay(time):
-    return
+    clock.advance(int(time) * 1000)
 
 def udelay(time):
-    return
+    clock.advance(time)
 
 def millis():
-    return time.time()
+    return clock.nowUsecs() // 1000
 
 def elapsed_millis(lastTime):
-    return int((time.time()-lastTime) * 1000)
+    return millis() - lastTime
+
+def micros():
+    return clock.nowUsecs()
+
+def elapsed_micros(lastTime):
+    return micros() - lastTime
+
+# Pin trace file format (little endian)
+#   magic "SCPT", uint16 version, uint16 flags (bit 0 = run length encoded), uint16 numPins
+#   for each pin - uint8 name length, name (ascii)
+#   uint32 numRows then columns of numRows values each
+#   uint64 time (usecs), uint16 pin id, uint8 level, uint32 count, uint32 interval (usecs)
+PIN_TRACE_MAGIC = b"SCPT"
+PIN_TRACE_VERSION = 1
+PIN_TRACE_HEADER = struct.Struct("<4sHHH")
+PIN_TRACE_FLAG_RUN_LENGTH = 1
+PIN_TRACE_MAX_INTERVAL = 0xffffffff
+
+# Record of pin level changes
+# Each row is (time, pin id, level, count, interval) - the pin changed to level at time and, when
+# run length encoding is on, did so again count-1 more times at the interval - a train of step
+# pulses is then two rows (one for the rising edges and one for the falling edges) however long it is
+# Only changes of level are recorded and all pins are taken to start at 0
+class PinTrace:
+
+    def __init__(self, runLength=True):
+        self.runLength = runLength
+        self.pinNames = []
+        self.pinIds = {}
+        self.rowTimes = array.array("Q")
+        self.rowPins = array.array("H")
+        self.rowLevels = array.array("B")
+        self.rowCounts = array.array("I")
+        self.rowIntervals = array.array("I")
+        # Row which the next change of each (pin, level) may extend
+        self.openRows = {}
+        self.numTransitions = 0
+
+    def __len__(self):
+        return self.numTransitions
+
+    def pinId(self, pinName):
+        if pinName not in self.pinIds:
+            self.pinIds[pinName] = len(self.pinNames)
+            self.pinNames.append(pinName)
+        return self.pinIds[pinName]
+
+    def record(self, timeUsecs, pinId, level):
+        self.numTransitions += 1
+        if self.runLength:
+            rowIdx = self.openRows.get((pinId, level))
+            if rowIdx is not None:
+                rowCount = self.rowCounts[rowIdx]
+                interval = timeUsecs - (self.rowTimes[rowIdx] + (rowCount - 1) * self.rowIntervals[rowIdx])
+                if rowCount == 1 and 0 < interval <= PIN_TRACE_MAX_INTERVAL:
+                    self.rowIntervals[rowIdx] = interval
+                    self.rowCounts[rowIdx] = 2
+                    return
+                if rowCount > 1 and interval == self.rowIntervals[rowIdx]:
+                    self.rowCounts[rowIdx] = rowCount + 1
+                    return
+            self.openRows[(pinId, level)] = len(self.rowTimes)
+        self.rowTimes.append(timeUsecs)
+        self.rowPins.append(pinId)
+        self.rowLevels.append(level)
+        self.rowCounts.append(1)
+        self.rowIntervals.append(0)
+
+    def numRows(self):
+        return len(self.rowTimes)
+
+    # Bytes used by the trace rows
+    def sizeBytes(self):
+        return sum(column.itemsize * len(column) for column in self.columns())
+
+    def columns(self):
+        return (self.rowTimes, self.rowPins, self.rowLevels, self.rowCounts, self.rowIntervals)
+
+    # Generate (time, pin name, level) for every change in time order
+    # Changes at exactly the same time come out in the order their rows were started
+    def transitions(self):
+        pending = []
+        rowIdx = 0
+        numRows = len(self.rowTimes)
+        while rowIdx < numRows or len(pending) > 0:
+            if rowIdx < numRows and (len(pending) == 0 or self.rowTimes[rowIdx] <= pending[0][0]):
+                heapq.heappush(pending, (self.rowTimes[rowIdx], rowIdx, 0))
+                rowIdx += 1
+                continue
+            timeUsecs, pendingRowIdx, repeatIdx = heapq.heappop(pending)
+            yield timeUsecs, self.pinNames[self.rowPins[pendingRowIdx]], self.rowLevels[pendingRowIdx]
+            if repeatIdx + 1 < self.rowCounts[pendingRowIdx]:
+                heapq.heappush(pending, (timeUsecs + self.rowIntervals[pendingRowIdx], pendingRowIdx, repeatIdx + 1))
+
+    def save(self, fileName):
+        with open(fileName, "wb") as outFile:
+            outFile.write(PIN_TRACE_HEADER.pack(PIN_TRACE_MAGIC, PIN_TRACE_VERSION,
+                                                PIN_TRACE_FLAG_RUN_LENGTH if self.runLength else 0,
+                                                len(self.pinNames)))
+            for pinName in self.pinNames:
+                nameBytes = pinName.encode("ascii")
+                outFile.write(struct.pack("<B", len(nameBytes)) + nameBytes)
+            outFile.write(struct.pack("<I", len(self.rowTimes)))
+            for column in self.columns():
+                if sys.byteorder == "big":
+                    column = array.array(column.typecode, column)
+                    column.byteswap()
+                outFile.write(column.tobytes())
+
+    @staticmethod
+    def load(fileName):
+        with open(fileName, "rb") as inFile:
+            magic, version, flags, numPins = PIN_TRACE_HEADER.unpack(inFile.read(PIN_TRACE_HEADER.size))
+            if magic != PIN_TRACE_MAGIC or version != PIN_TRACE_VERSION:
+                raise ValueError("Not a pin trace file (or unsupported version): " + fileName)
+            pinTrace = PinTrace((flags & PIN_TRACE_FLAG_RUN_LENGTH) != 0)
+            for pinIdx in range(numPins):
+                nameLen = inFile.read(1)[0]
+                pinTrace.pinId(inFile.read(nameLen).decode("ascii"))
+            numRows = struct.unpack("<I", inFile.read(4))[0]
+            for column in pinTrace.columns():
+                column.frombytes(inFile.read(column.itemsize * numRows))
+                if len(column) != numRows:
+                    raise ValueError("Pin trace file is truncated: " + fileName)
+                if sys.byteorder == "big":
+                    column.byteswap()
+        pinTrace.numTransitions = sum(pinTrace.rowCounts)
+        return pinTrace
+
+# The trace pins are currently recording to (None when not tracing)
+pinTrace = None
+
+def startPinTrace(runLength=True):
+    global pinTrace
+    pinTrace = PinTrace(runLength)
+    return pinTrace
+
+def stopPinTrace():
+    global pinTrace
+    stoppedTrace = pinTrace
+    pinTrace = None
+    return stoppedTrace
+
+# UART capture file format - text with a line for each burst of characters
+#   <usecs> <R|W> <hex>
+# R is characters received by the robot (sent by the host) and W characters written by the robot
+# The same format is written by the host's ScaraSerialClient so sessions with the real robot can be replayed
+UART_CAPTURE_READ = "R"
+UART_CAPTURE_WRITE = "W"
+
+# Record of the characters passing over a UART in each direction
+# Characters in the same direction at the same time are kept together in one record
+class UartCapture:
+
+    def __init__(self):
+        self.records = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def record(self, timeUsecs, direction, data):
+        if len(self.records) > 0 and self.records[-1][0] == timeUsecs and self.records[-1][1] == direction:
+            self.records[-1][2].extend(data)
+            return
+        self.records.append((timeUsecs, direction, bytearray(data)))
+
+    # Characters in one direction joined together
+    def data(self, direction):
+        return b"".join(bytes(recData) for recTime, recDirection, recData in self.records if recDirection == direction)
+
+    def save(self, fileName):
+        with open(fileName, "w") as outFile:
+            for timeUsecs, direction, data in self.records:
+                outFile.write("%d %s %s\n" % (timeUsecs, direction, bytes(data).hex()))
+
+    @staticmethod
+    def load(fileName):
+        uartCapture = UartCapture()
+        with open(fileName) as inFile:
+            for lineIdx, line in enumerate(inFile):
+                fields = line.split()
+                if len(fields) == 0 or fields[0].startswith("#"):
+                    continue
+                if len(fields) != 3 or fields[1] not in (UART_CAPTURE_READ, UART_CAPTURE_WRITE):
+                    raise ValueError("Bad UART capture line %d in %s" % (lineIdx + 1, fileName))
+                uartCapture.records.append((int(fields[0]), fields[1], bytearray.fromhex(fields[2])))
+        return uartCapture
+
+# The capture UARTs are currently recording to (None when not capturing)
+uartCapture = None
+
+def startUartCapture():
+    global uartCapture
+    uartCapture = UartCapture()
+    return uartCapture
+
+def stopUartCapture():
+    global uartCapture
+    stoppedCapture = uartCapture
+    uartCapture = None
+    return stoppedCapture
+
+# Host side of a UART conversation played back from a capture (or a plain file of commands)
+# A burst of characters isn't sent until the robot has written as many lines as the host had received
+# before sending it - so a host which waited for each reply still waits for each reply and the host's
+# pipelining is kept - without originalTiming bursts are sent as soon as that happens and with it they
+# also wait until the time (relative to the start of the capture) they were originally sent
+class UartScript:
+
+    def __init__(self, bursts, originalTiming=False):
+        # Each burst is (time in usecs, characters, lines written by the robot before it was sent)
+        self.bursts = bursts
+        self.originalTiming = originalTiming
+        self.burstIdx = 0
+        self.startUsecs = None
+        self.linesWritten = 0
+        self.writtenData = bytearray()
+
+    # Host bursts from a capture
+    @staticmethod
+    def fromCapture(uartCapture, originalTiming=False):
+        bursts = []
+        linesWritten = 0
+        for timeUsecs, direction, data in uartCapture.records:
+            if direction == UART_CAPTURE_WRITE:
+                linesWritten += data.count(b"\n")
+            elif len(bursts) > 0 and bursts[-1][2] == linesWritten and \
+                    (not originalTiming or bursts[-1][0] == timeUsecs):
+                bursts[-1][1].extend(data)
+            else:
+                bursts.append((timeUsecs, bytearray(data), linesWritten))
+        return UartScript(bursts, originalTiming)
+
+    # A capture file or a text file of commands (one per line, each sent when the reply to the last arrives)
+    @staticmethod
+    def fromFile(fileName, originalTiming=False):
+        try:
+            return UartScript.fromCapture(UartCapture.load(fileName), originalTiming)
+        except ValueError:
+            pass
+        with open(fileName) as inFile:
+            cmdLines = [line.strip() for line in inFile if len(line.strip()) > 0]
+        return UartScript([(0, bytearray((cmdLine + "\n").encode("ascii")), lineIdx)
+                           for lineIdx, cmdLine in enumerate(cmdLines)])
+
+    # Characters which have arrived from the host since the last poll
+    def poll(self):
+        if self.startUsecs is None:
+            self.startUsecs = clock.nowUsecs() - (self.bursts[0][0] if len(self.bursts) > 0 else 0)
+        data = bytearray()
+        while self.burstIdx < len(self.bursts):
+            timeUsecs, burstData, linesBefore = self.bursts[self.burstIdx]
+            if linesBefore > self.linesWritten:
+                break
+            if self.originalTiming and self.startUsecs + timeUsecs > clock.nowUsecs():
+                break
+            data += burstData
+            self.burstIdx += 1
+        return bytes(data)
+
+    # Time the next burst is due (original timing only - None otherwise or when there are none left)
+    def nextBurstUsecs(self):
+        if not self.originalTiming or self.burstIdx >= len(self.bursts) or self.startUsecs is None:
+            return None
+        return self.startUsecs + self.bursts[self.burstIdx][0]
+
+    # Send the next burst regardless - used when the robot's replies differ from the capture and it would
+    # otherwise wait for a line which is never going to be written - returns True if a burst was held back
+    def releaseNextBurst(self):
+        if self.burstIdx >= len(self.bursts) or self.bursts[self.burstIdx][2] <= self.linesWritten:
+            return False
+        self.linesWritten = self.bursts[self.burstIdx][2]
+        return True
+
+    def finished(self):
+        return self.burstIdx >= len(self.bursts)
+
+    def written(self, data):
+        self.writtenData += data
+        self.linesWritten += data.count(b"\n")
+
+# Host side of a UART conversation on a TCP socket (e.g. a terminal program or the host software
+# connected through socat) - the stub connects to host:port
+class UartSocketScript:
+
+    def __init__(self, host, port):
+        import socket
+        self.sock = socket.create_connection((host, port))
+        self.sock.setblocking(False)
+        self.closed = False
+
+    def poll(self):
+        if self.closed:
+            return b""
+        try:
+            data = self.sock.recv(4096)
+        except BlockingIOError:
+            return b""
+        if len(data) == 0:
+            self.closed = True
+        return data
+
+    def nextBurstUsecs(self):
+        return None
+
+    # Nothing is held back - just wait a little while for the host
+    def releaseNextBurst(self):
+        import select
+        select.select([self.sock], [], [], 0.01)
+        return False
+
+    def finished(self):
+        return self.closed
+
+    def written(self, data):
+        if not self.closed:
+            self.sock.sendall(data)
+
+# The script UARTs created from now on take the host's characters from (None for the built in testString)
+uartScript = None
+
+def useUartScript(newScript):
+    global uartScript
+    uartScript = newScript
+    return uartScript
 
 class Pin:
 
@@ -55,7 +463,20 @@ class Pin:
 
     def __init__(self, name, dirn):
         print("Pin", name, "dirn", dirn)
+        self.name = name
+        self.level = 0
+        self.trace = None
+        self.traceId = 0
 
-    def value(self, val):
-        return
-
+    def value(self, val=None):
+        if val is None:
+            return self.level
+        level = 1 if val else 0
+        if level == self.level:
+            return
+        self.level = level
+        if pinTrace is not None:
+            if self.trace is not pinTrace:
+                self.trace = pinTrace
+                self.traceId = pinTrace.pinId(self.name)
+            pinTrace.record(clock.nowUsecs(), self.traceId, level)
@@ -1,18 +1,40 @@
+from ScaraProfiler import profiler, STAGE_DISPLAY
 
 class PyBoardDisplay:
 
-    def __init__(self, HardwareLibrary, enable):
+    def __init__(self, HardwareLibrary, enable, deferUpdates=False):
         # LCD - only used for visual confirmation of activity
         # Set lcdIsUsed to False if not required
         self.lcdIsUsed = enable
         if self.lcdIsUsed:
             self.lcd = HardwareLibrary.LCD('X')
             self.lcd.light(True)
+        # When updates are deferred showStatus only records the status and the LCD
+        # is redrawn the next time refresh() is called (e.g. from a display task)
+        self.deferUpdates = deferUpdates
+        self.pendingStatusStr = None
 
     def showStatus(self, statusStr):
+        if self.deferUpdates:
+            self.pendingStatusStr = statusStr
+            return
+        startTicks = profiler.start()
+        self.drawStatus(statusStr)
+        profiler.stop(STAGE_DISPLAY, startTicks)
+
+    # Redraw the LCD if the status has changed since the last refresh
+    def refresh(self):
+        if self.pendingStatusStr is None:
+            return
+        statusStr = self.pendingStatusStr
+        self.pendingStatusStr = None
+        startTicks = profiler.start()
+        self.drawStatus(statusStr)
+        profiler.stop(STAGE_DISPLAY, startTicks)
+
+    def drawStatus(self, statusStr):
         if self.lcdIsUsed:
             self.lcd.fill(0)
             self.lcd.text("SCARA Serial", 0, 0, 1)
             self.lcd.text(statusStr, 0, 20, 1)
             self.lcd.show()
-
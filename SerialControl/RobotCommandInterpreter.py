@@ -1,8 +1,20 @@
 # Each command is on a separate line and is terminated with an LF (newline or linefeed \n) (CR \r is ignored)
 # Commands include:
 # G0 XXXXX YYYYY      ... go to X,Y position            ... XXXXX and YYYYY are floating point ascii numbers
+# G1 XXXXX YYYYY      ... go to X,Y position in a straight line (split into segments on the robot)
+# G2 CX CY R SSS EEE  ... clockwise arc of radius R around CX,CY from angle SSS to EEE (degrees anticlockwise
+#                         from the x axis, a full circle if they're the same) - starts with a straight line to
+#                         the start of the arc if the pen isn't there
+# G3 CX CY R SSS EEE  ... anticlockwise arc (as G2)
+# B0 X1 Y1 X2 Y2 X Y  ... cubic Bezier curve from the current position to X,Y with control points X1,Y1 and X2,Y2
+# B1 X1 Y1 ... Xn Yn  ... Catmull-Rom spline from the current position through up to 16 X,Y points
 # S0 NNNNN            ... move upper arm NNNNN steps    ... NNNNN is an integer between -1000 and 1000
 # S1 NNNNN            ... move lower arm NNNNN steps    ... NNNNN is an integer between -1000 and 1000
+# S2 UUUUU LLLLL [VVVVV] ... move upper, lower (and optionally vertical) axes signed numbers of steps
+#                         in one coordinated move - directions match G0 and the tracked position is updated
+# S3 UUUUU LLLLL DDDDD ... move upper and lower arms signed numbers of steps in one coordinated move taking
+#                         DDDDD microseconds (played back from a timed step program, see ScaraTrajectoryPlanner)
+#                         - the move takes longer if the arms can't step that fast
 # C0                  ... calibrate, which means set the current position as the home (straight out) position
 # P0                  ... pen up
 # P1                  ... pen down
@@ -10,6 +22,20 @@
 # E1                  ... disable motor drive
 # D0 TTTTT            ... set default motor on time     ... TTTTT is in milliseconds
 # V0 ZZZZZ            ... move to Z position
+# ?                   ... status query - answered immediately (even during a move) and not echoed
+#                         reply is {S U+NNNNNN L+NNNNNN V+NNNNNN X+NNNN.NN Y+NNNN.NN Z+NNN.NN M# B# Q##}
+#                         U, L and V are the step positions, X, Y and Z the pen position,
+#                         M is motor drive enabled, B is busy executing a command and Q is the command queue depth
+# Q0                  ... get the profiling counters    ... reply is preceded by {P name:totalUs:count:maxUs ...}
+#                         for the stages command, parse, ik, bounds, stepping, display and uartWrite
+# Q1                  ... reset the profiling counters
+# M0                  ... get the heap counters         ... reply is preceded by {M mode:N free:N alloc:N low:N gc:count:totalUs:maxUs
+#                         name:count:totalBytes:maxBytes:gcs ...} with bytes allocated by each kind of command (see ScaraMemProfiler)
+# M1                  ... reset the heap counters
+# M2 N                ... set heap profiling mode       ... N is 0 off, 1 measure each command, 2 also collect before each command
+
+from ScaraProfiler import profiler, STAGE_COMMAND, STAGE_PARSE
+from ScaraMemProfiler import memProfiler, MEM_MODE_OFF, MEM_MODE_COLLECT
 
 class RobotCommandInterpreter:
 
@@ -37,14 +63,41 @@ class RobotCommandInterpreter:
         # Build up a command string from characters passed in
         self.serialCommandStr = ""
 
+        # Commands which have been received but not yet executed - commands received while
+        # a move is in progress wait here (the queue depth is reported in the status reply)
+        self.commandQueue = []
+        self.maxQueuedCommands = 8
+        self.commandInProgress = False
+
+        # Data frame(s) sent back to the host ahead of the result of the current command
+        self.replyPayload = ""
+
+        # Most points in a spline (B1) command
+        self.maxSplinePoints = 16
+
+    # Handle a received character and execute any command it completes
     def handleChar(self, ch):
+        retStr = self.receiveChar(ch)
+        while len(self.commandQueue) > 0 and not self.commandInProgress:
+            retStr += self.executeNextCommand()
+        return retStr
+
+    # Handle a received character without executing anything - this is safe to call while a move is in
+    # progress and the returned string (echo or status reply) should be sent straight back to the host
+    def receiveChar(self, ch):
+        # Status query is answered out of band and isn't added to the command string
+        if ch == 0x3f:
+            return self.getStatusStr()
+
         # Linefeed (\n or 0x0a) is used to signify end of command
         if ch == 0x0a:
-            print("Command is:", self.serialCommandStr)
-            retStr = "[CMD" + self.serialCommandStr + "]"
-            rslt = self.interpCommand(self.serialCommandStr)
+            cmdStr = self.serialCommandStr
             self.serialCommandStr = ""
-            return retStr + "<" + str(rslt) + ">\r\n"
+            if len(self.commandQueue) >= self.maxQueuedCommands:
+                print("Command queue full, discarding:", cmdStr)
+                return "[CMD" + cmdStr + "]<-5>\r\n"
+            self.commandQueue.append(cmdStr)
+            return ""
 
         # Ignore CR
         if ch == 0x0d:
@@ -61,12 +114,47 @@ class RobotCommandInterpreter:
         self.serialCommandStr += chr(ch)
         return(chr(ch))
 
+    # Number of commands received but not yet executed
+    def commandsWaiting(self):
+        return len(self.commandQueue)
+
+    # Execute the oldest queued command and return the response for the host
+    def executeNextCommand(self):
+        if len(self.commandQueue) == 0:
+            return ""
+        cmdStr = self.commandQueue.pop(0)
+        print("Command is:", cmdStr)
+        self.commandInProgress = True
+        memProfiler.commandStart()
+        startTicks = profiler.start()
+        try:
+            rslt = self.interpCommand(cmdStr)
+        finally:
+            self.commandInProgress = False
+        profiler.stop(STAGE_COMMAND, startTicks)
+        memProfiler.commandEnd(cmdStr)
+        payload = self.replyPayload
+        self.replyPayload = ""
+        return payload + "[CMD" + cmdStr + "]<" + str(rslt) + ">\r\n"
+
+    # Compact fixed layout status reply
+    def getStatusStr(self):
+        upperSteps, lowerSteps, verticalSteps = self.robot.getStepPositions()
+        x, y, z = self.robot.getCurrentPosition()
+        return "{S U%+07d L%+07d V%+07d X%+08.2f Y%+08.2f Z%+07.2f M%d B%d Q%02d}\r\n" % \
+               (upperSteps, lowerSteps, verticalSteps, x, y, z, self.robot.isMotorDriveEnabled(),
+                self.commandInProgress, len(self.commandQueue))
+
     # Interpret a command line
     # More information on the command syntax at the top of this file
     def interpCommand(self, cmdStr):
 
         # Split the command line at the spaces
+        startTicks = profiler.start()
         splitStr = cmdStr.split()
+        profiler.stop(STAGE_PARSE, startTicks)
+        if len(splitStr) == 0:
+            return -3
 
         # G0 command - go to X,Y
         if splitStr[0] == 'G0':
@@ -84,6 +172,66 @@ class RobotCommandInterpreter:
                 print("Move to cmd ", cmdStr, " failed")
                 return -1
 
+        # G1 command - go to X,Y in a straight line
+        elif splitStr[0] == 'G1':
+            x, xValidity = self.extractNum(splitStr, 1, self.boundingBoxMinXValue, self.boundingBoxMaxXValue)
+            y, yValidity = self.extractNum(splitStr, 2, self.boundingBoxMinYValue, self.boundingBoxMaxYValue)
+            if xValidity and yValidity:
+                statusStr = "Line " + str(x) + ', ' + str(y)
+                self.display.showStatus(statusStr)
+                self.robot.enableMotorDrive(True, self.motorOnTimeMillis)
+                rslt = self.robot.lineTo(x,y)
+                return 0 if rslt else -2
+            else:
+                print("Line to cmd ", cmdStr, " failed")
+                return -1
+
+        # G2 & G3 commands - clockwise and anticlockwise arcs
+        elif splitStr[0] == 'G2' or splitStr[0] == 'G3':
+            cx, cxValidity = self.extractNum(splitStr, 1, self.boundingBoxMinXValue, self.boundingBoxMaxXValue)
+            cy, cyValidity = self.extractNum(splitStr, 2, self.boundingBoxMinYValue, self.boundingBoxMaxYValue)
+            radius, radiusValidity = self.extractNum(splitStr, 3, 0, self.boundingBoxMaxXValue - self.boundingBoxMinXValue)
+            startDeg, startValidity = self.extractNum(splitStr, 4, -360, 360)
+            endDeg, endValidity = self.extractNum(splitStr, 5, -360, 360)
+            if cxValidity and cyValidity and radiusValidity and startValidity and endValidity and radius > 0:
+                statusStr = "Arc " + str(cx) + ', ' + str(cy) + ' R' + str(radius)
+                self.display.showStatus(statusStr)
+                self.robot.enableMotorDrive(True, self.motorOnTimeMillis)
+                rslt = self.robot.arcTo(cx, cy, radius, startDeg, endDeg, splitStr[0] == 'G2')
+                return 0 if rslt else -2
+            else:
+                print("Arc cmd ", cmdStr, " failed")
+                return -1
+
+        # B0 command - cubic Bezier curve
+        elif splitStr[0] == 'B0':
+            coords = self.extractPoints(splitStr, 1, 3)
+            if coords is not None:
+                statusStr = "Curve " + str(coords[2][0]) + ', ' + str(coords[2][1])
+                self.display.showStatus(statusStr)
+                self.robot.enableMotorDrive(True, self.motorOnTimeMillis)
+                rslt = self.robot.bezierTo(coords[0][0], coords[0][1], coords[1][0], coords[1][1], coords[2][0], coords[2][1])
+                return 0 if rslt else -2
+            else:
+                print("Curve cmd ", cmdStr, " failed")
+                return -1
+
+        # B1 command - Catmull-Rom spline through points
+        elif splitStr[0] == 'B1':
+            numPoints = (len(splitStr) - 1) // 2
+            coords = None
+            if len(splitStr) % 2 == 1 and 0 < numPoints <= self.maxSplinePoints:
+                coords = self.extractPoints(splitStr, 1, numPoints)
+            if coords is not None:
+                statusStr = "Spline " + str(numPoints) + " points"
+                self.display.showStatus(statusStr)
+                self.robot.enableMotorDrive(True, self.motorOnTimeMillis)
+                rslt = self.robot.splineThrough(coords)
+                return 0 if rslt else -2
+            else:
+                print("Spline cmd ", cmdStr, " failed")
+                return -1
+
         # V0 command - go to Z
         elif splitStr[0] == 'V0':
             # Goto Z command
@@ -118,9 +266,43 @@ class RobotCommandInterpreter:
                 print("Step cmd", cmdStr, "failed")
                 return -1
 
+        # S2 command - move all axes given numbers of steps in one coordinated move
+        elif splitStr[0] == 'S2':
+            maxSteps = 1000000
+            upperSteps, upperValidity = self.extractInt(splitStr, 1, -maxSteps, maxSteps)
+            lowerSteps, lowerValidity = self.extractInt(splitStr, 2, -maxSteps, maxSteps)
+            verticalSteps, verticalValidity = self.extractInt(splitStr, 3, -maxSteps, maxSteps)
+            if len(splitStr) <= 3:
+                verticalValidity = True
+            if upperValidity and lowerValidity and verticalValidity:
+                statusStr = "Steps " + str(upperSteps) + ', ' + str(lowerSteps)
+                self.display.showStatus(statusStr)
+                self.robot.enableMotorDrive(True, self.motorOnTimeMillis)
+                rslt = self.robot.moveSteps(upperSteps, lowerSteps, verticalSteps)
+                return 0 if rslt else -2
+            else:
+                print("Steps cmd", cmdStr, "failed")
+                return -1
+
+        # S3 command - move the arms given numbers of steps in one coordinated move taking a given time
+        elif splitStr[0] == 'S3':
+            maxSteps = 1000000
+            upperSteps, upperValidity = self.extractInt(splitStr, 1, -maxSteps, maxSteps)
+            lowerSteps, lowerValidity = self.extractInt(splitStr, 2, -maxSteps, maxSteps)
+            durationUsecs, durationValidity = self.extractInt(splitStr, 3, 0, 60000000)
+            if upperValidity and lowerValidity and durationValidity:
+                statusStr = "Timed " + str(upperSteps) + ', ' + str(lowerSteps)
+                self.display.showStatus(statusStr)
+                self.robot.enableMotorDrive(True, self.motorOnTimeMillis)
+                rslt = self.robot.moveSteps(upperSteps, lowerSteps, 0, durationUsecs)
+                return 0 if rslt else -2
+            else:
+                print("Timed steps cmd", cmdStr, "failed")
+                return -1
+
         # C0 command - set the current position to be the home position (calibrate)
         elif splitStr[0] == 'C0':
-            self.robot.setHomeToCurrentPos()
+            self.robot.setHomeAsCurrentPos()
             statusStr = "Calibrated"
             self.display.showStatus(statusStr)
             print(statusStr)
@@ -157,20 +339,66 @@ class RobotCommandInterpreter:
             if not timeLimitVaidity:
                 return -4
             self.motorOnTimeMillis = timeLimit
-            self.showStatus(statusStr)
+            self.display.showStatus(statusStr)
             print(statusStr)
             return 0
 
+        # Q0 & Q1 - Get and reset the profiling counters
+        elif splitStr[0] == 'Q0':
+            self.replyPayload = profiler.getFrameStr()
+            return 0
+        elif splitStr[0] == 'Q1':
+            profiler.reset()
+            return 0
+
+        # M0, M1 & M2 - Get and reset the heap counters and set the heap profiling mode
+        elif splitStr[0] == 'M0':
+            self.replyPayload = memProfiler.getFrameStr()
+            return 0
+        elif splitStr[0] == 'M1':
+            memProfiler.reset()
+            return 0
+        elif splitStr[0] == 'M2':
+            mode, modeValidity = self.extractNum(splitStr, 1, MEM_MODE_OFF, MEM_MODE_COLLECT)
+            if not modeValidity:
+                return -1
+            memProfiler.setMode(int(mode))
+            return 0
+
         # Unknown command
         else:
             statusStr = "Unknown " + cmdStr
-            self.showStatus(statusStr)
+            self.display.showStatus(statusStr)
             print(statusStr)
             return -3
         return -3
 
     # Extract a floating point number from a string ensuring no exceptions are thrown
     def extractNum(self, inStrList, listIdx, minVal, maxVal):
+        startTicks = profiler.start()
+        val, validity = self.extractNumValue(inStrList, listIdx, minVal, maxVal)
+        profiler.stop(STAGE_PARSE, startTicks)
+        return val, validity
+
+    # Whole numbers only (e.g. numbers of steps) - "1.5" is invalid rather than quietly truncated
+    def extractInt(self, inStrList, listIdx, minVal, maxVal):
+        startTicks = profiler.start()
+        val, validity = self.extractIntValue(inStrList, listIdx, minVal, maxVal)
+        profiler.stop(STAGE_PARSE, startTicks)
+        return val, validity
+
+    # List of numPoints (x, y) points within the bounding box starting at listIdx - or None if any aren't valid
+    def extractPoints(self, inStrList, listIdx, numPoints):
+        points = []
+        for pointIdx in range(numPoints):
+            x, xValidity = self.extractNum(inStrList, listIdx + pointIdx*2, self.boundingBoxMinXValue, self.boundingBoxMaxXValue)
+            y, yValidity = self.extractNum(inStrList, listIdx + pointIdx*2 + 1, self.boundingBoxMinYValue, self.boundingBoxMaxYValue)
+            if not (xValidity and yValidity):
+                return None
+            points.append((x, y))
+        return points
+
+    def extractNumValue(self, inStrList, listIdx, minVal, maxVal):
         if listIdx < 0 or listIdx >= len(inStrList):
             return 0, False
         try:
@@ -181,3 +409,14 @@ class RobotCommandInterpreter:
             return 0, False
         return val, True
 
+    def extractIntValue(self, inStrList, listIdx, minVal, maxVal):
+        if listIdx < 0 or listIdx >= len(inStrList):
+            return 0, False
+        try:
+            val = int(inStrList[listIdx])
+        except:
+            return 0, False
+        if val < minVal or val > maxVal:
+            return 0, False
+        return val, True
+
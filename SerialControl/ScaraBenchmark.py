@@ -0,0 +1,233 @@
+# Performance benchmarks for the firmware modules - runs on CPython against the HardwareLibrary stub
+# Measures
+#   moveToPerSec          ScaraRobotManager.moveTo with step methods which do nothing
+#   circleIntersectionPerSec  ScaraGeometry.circleIntersection
+#   interpCommandPerSec   RobotCommandInterpreter.interpCommand parsing a mix of commands (robot calls do nothing)
+#   handleCharBytesPerSec RobotCommandInterpreter.handleChar fed command lines a byte at a time
+#   emulatedG0PerSec      G0 commands end to end through the emulated UART (ScaraEmulator in fast mode)
+#   modelledG0PerSec      the same commands in the emulator's modelled (virtual) time
+# Results are written as JSON and compared against a baseline to catch regressions - the rates depend on
+# the machine so the baseline isn't kept in the repository - --save-baseline saves one on this machine
+# (benchmarkBaseline.json next to this file, which git ignores) and later runs compare against it
+#
+# Usage: python3 ScaraBenchmark.py [--output results.json] [--baseline baseline.json | --no-baseline]
+#                                  [--save-baseline [baseline.json]]
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+import HardwareLibrary
+import ScaraGeometry
+from ScaraOne import ScaraOne
+from ScaraRobotManager import ScaraRobotManager
+from RobotCommandInterpreter import RobotCommandInterpreter
+from PyBoardDisplay import PyBoardDisplay
+from ScaraEmulator import ScaraEmulator
+
+# Points reachable by the arm which benchmark moves cycle through
+BENCHMARK_POINTS = [(0, 150), (50, 150), (50, 100), (-50, 120), (-20, 180), (30, 170)]
+
+# Commands interpCommand and handleChar are benchmarked with
+BENCHMARK_COMMANDS = ["G0 50.00 150.00", "V0 10.00", "S2 120 -80 0", "P1", "G0 -20.00 180.00", "E1 500", "P0"]
+
+# Baseline results saved and compared against by default (local to the machine - see .gitignore)
+BENCHMARK_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarkBaseline.json")
+
+
+# Stands in for ScaraOne so only the movement calculations are measured
+class NullRobotControl:
+
+    def stepUpperArm(self, dirn):
+        return
+
+    def stepLowerArm(self, dirn):
+        return
+
+    def stepVertical(self, dirn):
+        return
+
+    def stepAxes(self, upperDirn, lowerDirn, verticalDirn, minBetweenPulsesUsecs=None):
+        return
+
+
+# Stands in for ScaraOne so only the interpreter is measured
+class NullRobot:
+
+    def __init__(self, robotConfiguration):
+        self.robotConfiguration = robotConfiguration
+        self.penMag = HardwareLibrary.Pin('Y8', HardwareLibrary.Pin.OUT_PP)
+
+    def getRobotConfig(self):
+        return self.robotConfiguration
+
+    def enableMotorDrive(self, turnMotorsOn, timeLimitForDriveMillis):
+        return
+
+    def moveTo(self, x, y):
+        return True
+
+    def moveVertical(self, z):
+        return True
+
+    def moveSteps(self, upperSteps, lowerSteps, verticalSteps=0, durationUsecs=0):
+        return True
+
+
+# Run func (which performs batchSize operations) repeatedly for at least minSecs - best of repeats
+def opsPerSec(func, batchSize, minSecs, repeats=3):
+    bestRate = 0
+    for repeatIdx in range(repeats):
+        numOps = 0
+        startTime = time.perf_counter()
+        while True:
+            func()
+            numOps += batchSize
+            elapsedSecs = time.perf_counter() - startTime
+            if elapsedSecs >= minSecs:
+                break
+        bestRate = max(bestRate, numOps / elapsedSecs)
+    return bestRate
+
+
+def benchMoveTo(minSecs):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        robotConfiguration = ScaraOne(HardwareLibrary).getRobotConfig()
+    manager = ScaraRobotManager(robotConfiguration, NullRobotControl())
+
+    def moveBatch():
+        for point in BENCHMARK_POINTS:
+            manager.moveTo(point[0], point[1])
+    return opsPerSec(moveBatch, len(BENCHMARK_POINTS), minSecs)
+
+
+def benchCircleIntersection(minSecs):
+    circles = [((0, 0, 100), (point[0], point[1], 100)) for point in BENCHMARK_POINTS]
+
+    def intersectBatch():
+        for circle1, circle2 in circles:
+            ScaraGeometry.circleIntersection(circle1, circle2)
+    return opsPerSec(intersectBatch, len(circles), minSecs)
+
+
+def nullInterpreter():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        robot = NullRobot(ScaraOne(HardwareLibrary).getRobotConfig())
+        display = PyBoardDisplay(HardwareLibrary, False)
+    return RobotCommandInterpreter(robot, display)
+
+
+def benchInterpCommand(minSecs):
+    interpreter = nullInterpreter()
+
+    def interpBatch():
+        for cmdStr in BENCHMARK_COMMANDS:
+            interpreter.interpCommand(cmdStr)
+    return opsPerSec(interpBatch, len(BENCHMARK_COMMANDS), minSecs)
+
+
+def benchHandleChar(minSecs):
+    interpreter = nullInterpreter()
+    cmdBytes = "".join(cmdStr + "\n" for cmdStr in BENCHMARK_COMMANDS).encode("ascii")
+
+    def handleBatch():
+        for ch in cmdBytes:
+            interpreter.handleChar(ch)
+    return opsPerSec(handleBatch, len(cmdBytes), minSecs)
+
+
+# G0 commands sent to the emulator's pty and the replies read back - returns the wall clock and
+# modelled rates
+def benchEmulatedG0(minSecs):
+    emulator = ScaraEmulator(realTime=False)
+    os.set_blocking(emulator.slaveFd, False)
+    cmdsSent = 0
+    virtualStartUsecs = emulator.clock.nowUsecs()
+    startTime = time.perf_counter()
+    with emulator.firmwareOutput():
+        while time.perf_counter() - startTime < minSecs:
+            point = BENCHMARK_POINTS[cmdsSent % len(BENCHMARK_POINTS)]
+            cmdStr = "G0 {0:.2f} {1:.2f}".format(point[0], point[1])
+            os.write(emulator.slaveFd, (cmdStr + "\n").encode("ascii"))
+            rxStr = ""
+            while not rxStr.endswith(">\r\n"):
+                emulator.poll()
+                try:
+                    rxStr += os.read(emulator.slaveFd, 4096).decode("ascii")
+                except BlockingIOError:
+                    pass
+            cmdsSent += 1
+    elapsedSecs = time.perf_counter() - startTime
+    virtualSecs = (emulator.clock.nowUsecs() - virtualStartUsecs) / 1e6
+    emulator.close()
+    return cmdsSent / elapsedSecs, cmdsSent / virtualSecs
+
+
+def runBenchmarks(minSecs):
+    # The stub's clock is used in fast forward mode so nothing actually waits
+    HardwareLibrary.useClock(HardwareLibrary.VirtualClock(False))
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results["moveToPerSec"] = benchMoveTo(minSecs)
+        results["circleIntersectionPerSec"] = benchCircleIntersection(minSecs)
+        results["interpCommandPerSec"] = benchInterpCommand(minSecs)
+        results["handleCharBytesPerSec"] = benchHandleChar(minSecs)
+        results["emulatedG0PerSec"], results["modelledG0PerSec"] = benchEmulatedG0(minSecs)
+    return {
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+
+
+# Compare results against a baseline - all results are rates so lower is worse
+# Returns the names of the benchmarks which have regressed by more than the tolerance
+def compareWithBaseline(benchResults, baselineResults, tolerance):
+    regressions = []
+    for benchName, value in benchResults["results"].items():
+        baselineValue = baselineResults["results"].get(benchName)
+        if baselineValue is None:
+            print("{0:<26s} {1:14.2f}".format(benchName, value))
+            continue
+        change = (value - baselineValue) / baselineValue
+        regressed = change < -tolerance
+        if regressed:
+            regressions.append(benchName)
+        print("{0:<26s} {1:14.2f} baseline {2:14.2f} {3:+6.1f}%{4}".format(
+            benchName, value, baselineValue, 100 * change, " REGRESSION" if regressed else ""))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SCARA firmware modules")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_FILE, help="compare against results in this JSON file")
+    parser.add_argument("--no-baseline", action="store_true", help="don't compare against a baseline")
+    parser.add_argument("--save-baseline", nargs="?", const=BENCHMARK_BASELINE_FILE,
+                        help="save the results as a baseline (to the default baseline file if not given)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="fractional slowdown counted as a regression")
+    parser.add_argument("--min-secs", type=float, default=0.5, help="minimum time to run each benchmark")
+    args = parser.parse_args()
+
+    # The baseline is read first so saving a new one over it still compares against the old one
+    baselineResults = None
+    if not args.no_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baselineFile:
+                baselineResults = json.load(baselineFile)
+        else:
+            print("No baseline", args.baseline, "(save one with --save-baseline)")
+    benchResults = runBenchmarks(args.min_secs)
+    for outFileName in (args.output, args.save_baseline):
+        if outFileName is not None:
+            with open(outFileName, "w") as outFile:
+                json.dump(benchResults, outFile, indent=2, sort_keys=True)
+    if baselineResults is None:
+        for benchName, value in benchResults["results"].items():
+            print("{0:<26s} {1:14.2f}".format(benchName, value))
+        sys.exit(0)
+    regressedNames = compareWithBaseline(benchResults, baselineResults, args.tolerance)
+    sys.exit(1 if len(regressedNames) > 0 else 0)
@@ -0,0 +1,240 @@
+# Virtual SCARA robot - runs the real RobotCommandInterpreter, ScaraOne and ScaraRobotManager against the
+# HardwareLibrary stub and exposes them on a pseudo-terminal which RouterControl (or any other host client)
+# can open in the same way as /dev/ttyAMA0
+#
+# Time is modelled with the HardwareLibrary stub's virtual clock
+#   each character sent or received over the UART takes 10 bit times at the baud rate
+#   udelay / delay (the step pulse timing) advance the clock rather than sleeping
+#   each command costs commandProcessingUsecs of parsing and kinematics time on the PyBoard
+# In real time mode the emulator sleeps so the host sees replies when the real robot would send them
+# In fast mode the clock runs as fast as the host can drive it and the statistics report modelled time
+#
+# Usage: python3 ScaraEmulator.py [--fast] [--baud 115200] [--link /tmp/ttyScara] [--step-trace steps.scst]
+import argparse
+import contextlib
+import os
+import select
+import signal
+import sys
+import tty
+from collections import deque
+
+import HardwareLibrary
+from ScaraOne import ScaraOne
+from RobotCommandInterpreter import RobotCommandInterpreter
+from PyBoardDisplay import PyBoardDisplay
+from ScaraProfiler import profiler, ticks_us, ticks_diff, STAGE_UART_WRITE
+from StepTrace import StepTraceWriter
+
+# Time taken by the PyBoard to parse a command and do the kinematics (before any stepping starts)
+DEFAULT_COMMAND_PROCESSING_USECS = 1500
+
+
+# UART on the master side of a pty - characters become available to the firmware one character time
+# after the previous one and written characters reach the host when they would finish transmitting
+class EmulatedUart:
+
+    def __init__(self, masterFd, clock, baudRate):
+        self.masterFd = masterFd
+        self.clock = clock
+        self.charUsecs = 10 * 1e6 / baudRate
+        self.rxChars = deque()
+        self.rxLastReadyUsecs = 0
+        self.txChars = deque()
+        self.txFreeUsecs = 0
+        self.bytesReceived = 0
+        self.bytesSent = 0
+
+    # Read whatever the host has sent so far and timestamp it
+    def readHost(self, timeoutSecs=0):
+        readable, _, _ = select.select([self.masterFd], [], [], timeoutSecs)
+        if len(readable) == 0:
+            return 0
+        try:
+            hostBytes = os.read(self.masterFd, 4096)
+        except OSError:
+            return 0
+        for hostByte in hostBytes:
+            self.rxLastReadyUsecs = max(self.rxLastReadyUsecs, self.clock.nowUsecs()) + self.charUsecs
+            self.rxChars.append((self.rxLastReadyUsecs, hostByte))
+        self.bytesReceived += len(hostBytes)
+        return len(hostBytes)
+
+    def any(self):
+        self.readHost()
+        numReady = 0
+        for readyUsecs, hostByte in self.rxChars:
+            if readyUsecs > self.clock.nowUsecs():
+                break
+            numReady += 1
+        return numReady
+
+    def readchar(self):
+        return self.rxChars.popleft()[1]
+
+    def write(self, outStr):
+        outBytes = outStr.encode("ascii")
+        for outByte in outBytes:
+            self.txFreeUsecs = max(self.txFreeUsecs, self.clock.nowUsecs()) + self.charUsecs
+            self.txChars.append((self.txFreeUsecs, outByte))
+        self.bytesSent += len(outBytes)
+        self.flush()
+
+    # Pass on characters which have finished transmitting (everything in fast mode)
+    def flush(self):
+        outBytes = bytearray()
+        while len(self.txChars) > 0:
+            if self.clock.realTime and self.txChars[0][0] > self.clock.wallUsecs():
+                break
+            outBytes.append(self.txChars.popleft()[1])
+        if len(outBytes) > 0:
+            os.write(self.masterFd, outBytes)
+
+    # Virtual time of the next character to arrive or finish sending (None if there's nothing in flight)
+    def nextEventUsecs(self):
+        eventTimes = []
+        if len(self.rxChars) > 0:
+            eventTimes.append(self.rxChars[0][0])
+        if len(self.txChars) > 0:
+            eventTimes.append(self.txChars[0][0])
+        return min(eventTimes) if len(eventTimes) > 0 else None
+
+
+class ScaraEmulator:
+
+    def __init__(self, baudRate=115200, commandProcessingUsecs=DEFAULT_COMMAND_PROCESSING_USECS,
+                 realTime=True, quiet=True, robotConfig=None):
+        # The firmware's delays and millis() run on the HardwareLibrary stub's clock
+        self.clock = HardwareLibrary.useClock(HardwareLibrary.VirtualClock(realTime))
+        # The stage profiler reports modelled time too
+        profiler.setTimeSource(self.clock.ticks_us, self.clock.ticks_diff)
+        self.hardware = HardwareLibrary
+        self.commandProcessingUsecs = commandProcessingUsecs
+        self.quiet = quiet
+        # Where the firmware's output goes in quiet mode - opened once and closed by close()
+        self.devnull = open(os.devnull, "w") if quiet else None
+
+        # Pseudo-terminal for the host - raw so nothing is translated
+        self.masterFd, self.slaveFd = os.openpty()
+        tty.setraw(self.slaveFd)
+        self.slaveName = os.ttyname(self.slaveFd)
+        self.uart = EmulatedUart(self.masterFd, self.clock, baudRate)
+
+        # The firmware objects
+        with self.firmwareOutput():
+            self.robot = ScaraOne(self.hardware, robotConfig)
+            self.display = PyBoardDisplay(self.hardware, False, deferUpdates=True)
+            self.interpreter = RobotCommandInterpreter(self.robot, self.display)
+        self.robot.setMotionPollCallback(self.serviceUart)
+
+        # Statistics
+        self.commandsExecuted = 0
+        self.commandUsecs = 0
+
+    # The firmware prints a lot - send it nowhere in quiet mode
+    def firmwareOutput(self):
+        if self.quiet:
+            return contextlib.redirect_stdout(self.devnull)
+        return contextlib.nullcontext()
+
+    # Handle characters from the host as the firmware's receiveCommandChars does - this is also called
+    # every few steps during moves so status queries are answered while the arm is moving
+    def serviceUart(self):
+        self.clock.sync()
+        self.uart.flush()
+        while self.uart.any() > 0:
+            rslt = self.interpreter.receiveChar(self.uart.readchar())
+            if len(rslt) > 0:
+                self.uart.write(rslt)
+
+    def executeCommands(self):
+        while self.interpreter.commandsWaiting() > 0:
+            startUsecs = self.clock.nowUsecs()
+            self.clock.advance(self.commandProcessingUsecs)
+            rslt = self.interpreter.executeNextCommand()
+            self.commandUsecs += self.clock.nowUsecs() - startUsecs
+            self.commandsExecuted += 1
+            startTicks = profiler.start()
+            self.uart.write(rslt)
+            profiler.stop(STAGE_UART_WRITE, startTicks)
+
+    # Wait for something to happen - host characters arriving or characters in flight completing
+    def waitForEvent(self):
+        nextEventUsecs = self.uart.nextEventUsecs()
+        if nextEventUsecs is None:
+            self.uart.readHost(None)
+            return
+        if self.clock.realTime:
+            self.uart.readHost(max(nextEventUsecs - self.clock.wallUsecs(), 0) / 1e6)
+        elif self.uart.readHost() == 0:
+            self.clock.advanceTo(nextEventUsecs)
+
+    # One pass of the main loop - waits for something to happen and then handles it
+    def poll(self):
+        self.waitForEvent()
+        self.serviceUart()
+        self.executeCommands()
+        self.robot.motorOnTimeLimitCheck()
+        self.display.refresh()
+
+    def run(self):
+        self.uart.write("SCARA Arm Awaiting Command\r\n")
+        with self.firmwareOutput():
+            while True:
+                self.poll()
+
+    def printStats(self):
+        virtualSecs = self.clock.nowUsecs() / 1e6
+        print("Virtual time {0:.3f}s, commands {1}, executing {2:.3f}s ({3:.1f}%)".format(
+            virtualSecs, self.commandsExecuted, self.commandUsecs / 1e6,
+            100 * self.commandUsecs / max(self.clock.nowUsecs(), 1)))
+        print("Bytes received {0} sent {1}, link time {2:.3f}s".format(
+            self.uart.bytesReceived, self.uart.bytesSent,
+            (self.uart.bytesReceived + self.uart.bytesSent) * self.uart.charUsecs / 1e6))
+        if self.commandsExecuted > 0 and virtualSecs > 0:
+            print("Commands per second {0:.1f}".format(self.commandsExecuted / virtualSecs))
+
+    def close(self):
+        os.close(self.masterFd)
+        os.close(self.slaveFd)
+        profiler.setTimeSource(ticks_us, ticks_diff)
+        if self.devnull is not None:
+            self.devnull.close()
+            self.devnull = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emulate the SCARA robot on a pseudo-terminal")
+    parser.add_argument("--fast", action="store_true", help="don't hold replies back to real time")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--processing-usecs", type=int, default=DEFAULT_COMMAND_PROCESSING_USECS,
+                        help="time taken to parse each command")
+    parser.add_argument("--link", help="also make a symlink to the pty at this path (e.g. /tmp/ttyScara)")
+    parser.add_argument("--verbose", action="store_true", help="show the firmware's own output")
+    parser.add_argument("--step-trace", help="record every step to this step trace file (see StepTrace)")
+    args = parser.parse_args()
+
+    emulator = ScaraEmulator(args.baud, args.processing_usecs, not args.fast, not args.verbose)
+    stepTraceWriter = None
+    if args.step_trace is not None:
+        stepTraceWriter = StepTraceWriter(args.step_trace)
+        emulator.robot.setStepLogger(stepTraceWriter)
+    if args.link is not None:
+        if os.path.islink(args.link):
+            os.remove(args.link)
+        os.symlink(emulator.slaveName, args.link)
+    print("SCARA emulator on", emulator.slaveName if args.link is None else args.link + " -> " + emulator.slaveName)
+    sys.stdout.flush()
+    # Stop cleanly (printing the statistics) when terminated as well as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        emulator.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.printStats()
+        if stepTraceWriter is not None:
+            stepTraceWriter.close()
+        if args.link is not None and os.path.islink(args.link):
+            os.remove(args.link)
+        emulator.close()
@@ -0,0 +1,235 @@
+# Golden step trace regression check - runs standard shapes through ScaraOne and ScaraRobotManager on the
+# HardwareLibrary stub, records the step and direction pins and compares the steps each axis took with
+# golden traces stored in the goldenTraces folder
+# Shapes
+#   scaraOneCircle   the circle in TestScaraOne (with its shoulderGearMismatchFactor of -1/30)
+#   drawingCircle    testdrawing's drawCircle(0, 100, 30)
+#   drawingLines     testdrawing's drawLine examples
+#   batOutline       the bat detector case outline from BatDetectorCutoutTest
+# Each shape starts with the arm at home (0, 200) and finishes by returning there
+#
+# A golden trace is JSON - for each axis the direction runs as a string ("+120 -3 +40" is 120 steps with
+# the direction pin high, then 3 with it low and then 40 high), the number of steps and a hash of the
+# order in which the steps of all the axes were pulsed (so changes to the interleaving of the axes are
+# caught too) along with the moves the firmware refused
+#
+# Usage: python3 ScaraGoldenTraces.py [--update] [shapeName ...]
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import os
+import sys
+
+import HardwareLibrary
+import StepTrace
+from ScaraOne import ScaraOne
+
+# Shapes from the host test programs
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TestPySingleScara"))
+from BatShapes import batOutlinePoints
+
+GOLDEN_TRACES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "goldenTraces")
+
+HOME_POINT = (0, 200)
+
+
+# Points of the circle drawn by TestScaraOne's circle(x, y, r, steps)
+def scaraOneCirclePoints(x, y, r, steps):
+    angleDiff = math.pi * 2 / steps
+    points = [(x, y + r)]
+    for i in range(steps):
+        points.append((x + r*math.sin(angleDiff*(i+1)), y + r*math.cos(angleDiff*(i+1))))
+    return points
+
+
+# Points of testdrawing's drawCircle(centreX, centreY, radius)
+def drawingCirclePoints(centreX, centreY, radius):
+    lineSegmentCount = 60
+    points = []
+    for i in range(lineSegmentCount + 1):
+        t = 360 / lineSegmentCount
+        points.append((radius * math.cos(i * t * math.pi / 180) + centreX,
+                       radius * math.sin(i * t * math.pi / 180) + centreY))
+    return points
+
+
+# Points of testdrawing's drawLine(x1, y1, x2, y2)
+def drawingLinePoints(x1, y1, x2, y2):
+    lineLen = math.sqrt((x1-x2)*(x1-x2)+(y1-y2)*(y1-y2))
+    lineSegmentCount = int(lineLen)
+    x = x1
+    y = y1
+    xinc = (x2-x1)/lineSegmentCount
+    yinc = (y2-y1)/lineSegmentCount
+    points = []
+    for i in range(lineSegmentCount):
+        points.append((x, y))
+        x += xinc
+        y += yinc
+    points.append((x2, y2))
+    return points
+
+
+# The bat outline as BatDetectorCutoutTest positions it (starting from where it parks the router)
+def batOutlineShapePoints():
+    routerYOrigin = 200
+    return [(0, routerYOrigin-26)] + [(point[0], routerYOrigin - point[1]) for point in batOutlinePoints]
+
+
+# Shape name to (robot configuration, points)
+def standardShapes():
+    return {
+        "scaraOneCircle": ({"shoulderGearMismatchFactor": -1/30}, scaraOneCirclePoints(0, 120, 40, 100)),
+        "drawingCircle": (None, drawingCirclePoints(0, 100, 30)),
+        "drawingLines": (None, drawingLinePoints(100, 100, -100, 100) + drawingLinePoints(0, 60, 0, 200) +
+                         drawingLinePoints(100, 150, -100, 50)),
+        "batOutline": (None, batOutlineShapePoints())
+    }
+
+
+# Move through the points (and back home) recording the pins - returns the pin trace and the indices of
+# points the robot refused to move to
+def recordShape(robotConfig, points):
+    HardwareLibrary.useClock(HardwareLibrary.VirtualClock(False))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        robot = ScaraOne(HardwareLibrary, robotConfig)
+        robot.enableMotorDrive(True, 0)
+        pinTrace = HardwareLibrary.startPinTrace()
+        try:
+            failedMoves = []
+            for pointIdx, point in enumerate(list(points) + [HOME_POINT]):
+                if not robot.moveTo(point[0], point[1]):
+                    failedMoves.append(pointIdx)
+        finally:
+            HardwareLibrary.stopPinTrace()
+    return pinTrace, failedMoves
+
+
+# Direction of every step of each axis and the order the steps were pulsed in (from a pin trace)
+def stepSequences(pinTrace):
+    axisSteps = {axisName: [] for axisName in StepTrace.AXIS_NAMES}
+    pulseOrder = hashlib.sha1()
+    pulseTime = None
+    pulseStr = ""
+    for timeUsecs, axis, dirn in StepTrace.pinTraceSteps(pinTrace):
+        axisName = StepTrace.AXIS_NAMES[axis]
+        axisSteps[axisName].append(dirn)
+        if timeUsecs != pulseTime and len(pulseStr) > 0:
+            pulseOrder.update((pulseStr + "\n").encode("ascii"))
+            pulseStr = ""
+        pulseTime = timeUsecs
+        pulseStr += axisName[0] + ("+" if dirn else "-")
+    if len(pulseStr) > 0:
+        pulseOrder.update((pulseStr + "\n").encode("ascii"))
+    return axisSteps, pulseOrder.hexdigest()
+
+
+# Direction runs string for a list of step directions - e.g. "+120 -3 +40"
+def directionRuns(stepDirns):
+    runs = []
+    runDirn = None
+    runLen = 0
+    for stepDirn in stepDirns:
+        if stepDirn != runDirn and runLen > 0:
+            runs.append(("+" if runDirn else "-") + str(runLen))
+            runLen = 0
+        runDirn = stepDirn
+        runLen += 1
+    if runLen > 0:
+        runs.append(("+" if runDirn else "-") + str(runLen))
+    return " ".join(runs)
+
+
+# Expand a direction runs string back to a list of step directions
+def expandDirectionRuns(runsStr):
+    stepDirns = []
+    for run in runsStr.split():
+        stepDirns.extend([1 if run[0] == "+" else 0] * int(run[1:]))
+    return stepDirns
+
+
+def makeGoldenTrace(shapeName, robotConfig, points):
+    pinTrace, failedMoves = recordShape(robotConfig, points)
+    axisSteps, pulseOrderHash = stepSequences(pinTrace)
+    return {
+        "shape": shapeName,
+        "numPoints": len(points),
+        "failedMoves": failedMoves,
+        "axes": {axisName: {"steps": len(stepDirns), "runs": directionRuns(stepDirns)}
+                 for axisName, stepDirns in axisSteps.items()},
+        "pulseOrderHash": pulseOrderHash
+    }
+
+
+def goldenTraceFileName(shapeName):
+    return os.path.join(GOLDEN_TRACES_FOLDER, shapeName + ".json")
+
+
+# Differences between a trace and its golden trace as readable strings (empty if they match)
+# For each axis only the first step which differs is reported
+def compareTraces(trace, goldenTrace):
+    differences = []
+    if trace["failedMoves"] != goldenTrace["failedMoves"]:
+        differences.append("failed moves {0} (golden {1})".format(trace["failedMoves"], goldenTrace["failedMoves"]))
+    for axisName, goldenAxis in goldenTrace["axes"].items():
+        axis = trace["axes"][axisName]
+        if axis["runs"] == goldenAxis["runs"]:
+            continue
+        stepDirns = expandDirectionRuns(axis["runs"])
+        goldenDirns = expandDirectionRuns(goldenAxis["runs"])
+        stepIdx = 0
+        while stepIdx < min(len(stepDirns), len(goldenDirns)) and stepDirns[stepIdx] == goldenDirns[stepIdx]:
+            stepIdx += 1
+        differences.append("{0} axis {1} steps (golden {2}) - first difference at step {3}: {4} (golden {5})".format(
+            axisName, axis["steps"], goldenAxis["steps"], stepIdx,
+            directionRuns(stepDirns[stepIdx:stepIdx+20]) or "end", directionRuns(goldenDirns[stepIdx:stepIdx+20]) or "end"))
+    if len(differences) == 0 and trace["pulseOrderHash"] != goldenTrace["pulseOrderHash"]:
+        differences.append("each axis steps the same but the axes are pulsed in a different order")
+    return differences
+
+
+# Check (or with update rewrite) the golden traces - returns the names of shapes which don't match
+def checkShapes(shapeNames, update=False):
+    shapes = standardShapes()
+    mismatchedShapes = []
+    for shapeName in shapeNames:
+        robotConfig, points = shapes[shapeName]
+        trace = makeGoldenTrace(shapeName, robotConfig, points)
+        stepsStr = " ".join("{0} {1}".format(axisName, axis["steps"]) for axisName, axis in trace["axes"].items())
+        if update:
+            os.makedirs(GOLDEN_TRACES_FOLDER, exist_ok=True)
+            with open(goldenTraceFileName(shapeName), "w") as goldenFile:
+                json.dump(trace, goldenFile, indent=2)
+                goldenFile.write("\n")
+            print("{0:<16s} updated ({1})".format(shapeName, stepsStr))
+            continue
+        if not os.path.exists(goldenTraceFileName(shapeName)):
+            print("{0:<16s} NO GOLDEN TRACE (run with --update)".format(shapeName))
+            mismatchedShapes.append(shapeName)
+            continue
+        with open(goldenTraceFileName(shapeName)) as goldenFile:
+            differences = compareTraces(trace, json.load(goldenFile))
+        if len(differences) == 0:
+            print("{0:<16s} ok ({1})".format(shapeName, stepsStr))
+            continue
+        print("{0:<16s} CHANGED".format(shapeName))
+        for difference in differences:
+            print("    " + difference)
+        mismatchedShapes.append(shapeName)
+    return mismatchedShapes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the steps taken for standard shapes with golden traces")
+    parser.add_argument("--update", action="store_true", help="rewrite the golden traces from the current firmware")
+    parser.add_argument("shapes", nargs="*", help="shapes to check (default all)")
+    args = parser.parse_args()
+
+    shapeNames = args.shapes if len(args.shapes) > 0 else list(standardShapes().keys())
+    unknownNames = [shapeName for shapeName in shapeNames if shapeName not in standardShapes()]
+    if len(unknownNames) > 0:
+        print("Unknown shapes:", ", ".join(unknownNames), "- shapes are", ", ".join(standardShapes().keys()))
+        sys.exit(2)
+    sys.exit(1 if len(checkShapes(shapeNames, args.update)) > 0 else 0)
@@ -0,0 +1,149 @@
+# Heap usage and garbage collection profiling of command execution
+# When enabled the heap is measured before and after each command and for each kind of command (G0, V0, ...)
+# the number executed and the total and largest number of bytes allocated are kept along with the number
+# of collections which happened while they ran
+# The counters are returned over the serial link by M0, reset by M1 and M2 sets the mode (see RobotCommandInterpreter)
+# Modes
+#   MEM_MODE_OFF      nothing is measured
+#   MEM_MODE_RECORD   heap measured around each command
+#   MEM_MODE_COLLECT  as MEM_MODE_RECORD but the heap is also collected (and the collection timed) before each
+#                     command - this shows how long a collection takes and whether collecting between
+#                     commands stops collections happening during moves
+# On the PyBoard the heap comes from gc.mem_alloc and gc.mem_free - MicroPython doesn't report its own
+# collections so one is counted whenever the heap shrinks during a command (and only the explicit
+# collections of MEM_MODE_COLLECT are timed)
+# On CPython (the HardwareLibrary stub) tracemalloc measures the heap (the bytes allocated are then the peak
+# during the command) and gc.callbacks count and time every collection
+import gc
+from ScaraProfiler import ticks_us, ticks_diff
+
+try:
+    memAlloc = gc.mem_alloc
+    memFree = gc.mem_free
+    tracemalloc = None
+except AttributeError:
+    import tracemalloc
+
+    def memAlloc():
+        return tracemalloc.get_traced_memory()[0]
+
+    def memFree():
+        return -1
+
+MEM_MODE_OFF = 0
+MEM_MODE_RECORD = 1
+MEM_MODE_COLLECT = 2
+
+# Most kinds of command kept in the counters - commands after that (and ones which aren't a letter and
+# a digit like G0) are counted under OTHER_COMMANDS_NAME so nothing the host sends can break the frame
+MAX_COMMAND_STATS = 32
+OTHER_COMMANDS_NAME = "-"
+
+class MemProfiler:
+
+    def __init__(self):
+        self.mode = MEM_MODE_OFF
+        self.gcStartTicks = 0
+        self.reset()
+
+    def setMode(self, mode):
+        if tracemalloc is not None:
+            if mode != MEM_MODE_OFF and self.mode == MEM_MODE_OFF:
+                tracemalloc.start()
+                gc.callbacks.append(self.gcCallback)
+            elif mode == MEM_MODE_OFF and self.mode != MEM_MODE_OFF:
+                gc.callbacks.remove(self.gcCallback)
+                tracemalloc.stop()
+        self.mode = mode
+        # So a command which turns profiling on is measured from here
+        self.collectionsBefore = self.numCollections
+        self.allocBefore = memAlloc()
+
+    def reset(self):
+        # Command code (G0, V0, ...) to [count, total bytes allocated, most bytes allocated, collections during]
+        self.commandStats = {}
+        self.numCollections = 0
+        self.collectTotalUs = 0
+        self.collectMaxUs = 0
+        self.lowestFree = -1
+        # So a command which resets the counters (M1) is measured from here
+        self.allocBefore = memAlloc()
+        self.collectionsBefore = 0
+
+    def recordCollection(self, elapsedUs):
+        self.numCollections += 1
+        self.collectTotalUs += elapsedUs
+        if elapsedUs > self.collectMaxUs:
+            self.collectMaxUs = elapsedUs
+
+    # Times CPython's collections
+    def gcCallback(self, phase, info):
+        if phase == "start":
+            self.gcStartTicks = ticks_us()
+        else:
+            self.recordCollection(ticks_diff(ticks_us(), self.gcStartTicks))
+
+    def collect(self):
+        startTicks = ticks_us()
+        gc.collect()
+        if tracemalloc is None:
+            self.recordCollection(ticks_diff(ticks_us(), startTicks))
+
+    # Call before executing a command and commandEnd after it
+    def commandStart(self):
+        if self.mode == MEM_MODE_OFF:
+            return
+        if self.mode == MEM_MODE_COLLECT:
+            self.collect()
+        if tracemalloc is not None:
+            tracemalloc.reset_peak()
+        self.collectionsBefore = self.numCollections
+        self.allocBefore = memAlloc()
+
+    def commandEnd(self, cmdStr):
+        if self.mode == MEM_MODE_OFF:
+            return
+        if tracemalloc is not None:
+            allocAfter = tracemalloc.get_traced_memory()[1]
+        else:
+            allocAfter = memAlloc()
+            if allocAfter < self.allocBefore:
+                self.numCollections += 1
+        collections = self.numCollections - self.collectionsBefore
+        allocated = allocAfter - self.allocBefore if allocAfter >= self.allocBefore else 0
+        freeBytes = memFree()
+        if freeBytes >= 0 and (self.lowestFree < 0 or freeBytes < self.lowestFree):
+            self.lowestFree = freeBytes
+        cmdName = self.commandName(cmdStr)
+        if cmdName not in self.commandStats and len(self.commandStats) >= MAX_COMMAND_STATS:
+            cmdName = OTHER_COMMANDS_NAME
+        stats = self.commandStats.get(cmdName)
+        if stats is None:
+            stats = [0, 0, 0, 0]
+            self.commandStats[cmdName] = stats
+        stats[0] += 1
+        stats[1] += allocated
+        if allocated > stats[2]:
+            stats[2] = allocated
+        stats[3] += collections
+
+    # Two character command code of a command line (G0, V0, ...) or OTHER_COMMANDS_NAME if it doesn't have one
+    def commandName(self, cmdStr):
+        cmdStr = cmdStr.strip()
+        if len(cmdStr) < 2 or not cmdStr[0].isalpha() or not cmdStr[1].isdigit() or \
+                (len(cmdStr) > 2 and not cmdStr[2].isspace()):
+            return OTHER_COMMANDS_NAME
+        return cmdStr[:2]
+
+    # Memory frame for the host - {M mode:N free:N alloc:N low:N gc:count:totalUs:maxUs name:count:totalBytes:maxBytes:gcs ...}
+    # free and low (the least free seen after a command) are -1 where there's no fixed size heap
+    def getFrameStr(self):
+        frameStr = "{M mode:%d free:%d alloc:%d low:%d gc:%d:%d:%d" % (self.mode, memFree(), memAlloc(),
+                   self.lowestFree, self.numCollections, self.collectTotalUs, self.collectMaxUs)
+        for cmdName in sorted(self.commandStats):
+            stats = self.commandStats[cmdName]
+            frameStr += " %s:%d:%d:%d:%d" % (cmdName, stats[0], stats[1], stats[2], stats[3])
+        return frameStr + "}\r\n"
+
+# The memory profiler used by all the firmware modules
+memProfiler = MemProfiler()
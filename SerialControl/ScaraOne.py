@@ -34,6 +34,18 @@ class ScaraOne:
         self.motorsEnabledLastMillis = 0
         self.motorsEnabledForMillis = 0
 
+        # Optional function called every few steps while the arm is moving
+        # This allows the serial port to be serviced (e.g. status queries answered) during long moves
+        self.motionPollCallback = None
+        self.motionPollIntervalSteps = 20
+        self.motionPollStepCount = 0
+
+        # Optional logger told the axis, direction and time of every step (e.g. a StepTrace.StepTraceWriter)
+        # pyb.micros() wraps every 2^30 usecs (about 17.9 minutes) so the logged time is unwrapped from it
+        self.stepLogger = None
+        self.stepLogLastMicros = 0
+        self.stepLogUsecs = 0
+
         # Pulse width and time between pulses for the stepper motors
         # Setting betweenPulsesUsecs to 300 is medium speed
         # Set betweenPulsesUsecs to a lower number to increase speed of arm movement
@@ -66,6 +78,10 @@ class ScaraOne:
         # So we need to correct lower angle by 1/30th of upper angle
         shoulderGearMismatchFactor = 0
 
+        # Paths (straight lines etc) are split into segments as the arm moves and the pen stays within
+        # this distance of the path
+        chordToleranceMM = 0.1
+
         # Leave motor drivers on for this amount of time after last move
         defaultMotorOnTimeMillis = 1000
 
@@ -86,6 +102,11 @@ class ScaraOne:
                 "stepsPerMM": verticalStepsPerMM,
                 "verticalTravelMax": 100,
             },
+            "path": {
+                "chordToleranceMM": chordToleranceMM,
+                "maxSegmentMM": 10,
+                "minSegmentMM": 0.05
+            },
             "shoulderGearMismatchFactor": shoulderGearMismatchFactor,
             "defaultMotorOnTimeMillis": defaultMotorOnTimeMillis
         }
@@ -122,33 +143,137 @@ class ScaraOne:
     def moveTo(self, x, y):
         return self.scaraRobotManager.moveTo(x, y)
 
+    # Move in a straight line to an x,y point
+    def lineTo(self, x, y):
+        return self.scaraRobotManager.lineTo(x, y)
+
+    # Move around an arc of a circle centred on cx,cy from startDeg to endDeg
+    def arcTo(self, cx, cy, radius, startDeg, endDeg, clockwise):
+        return self.scaraRobotManager.arcTo(cx, cy, radius, startDeg, endDeg, clockwise)
+
+    # Move along a cubic Bezier curve to x,y with control points x1,y1 and x2,y2
+    def bezierTo(self, x1, y1, x2, y2, x, y):
+        return self.scaraRobotManager.bezierTo(x1, y1, x2, y2, x, y)
+
+    # Move along a Catmull-Rom spline through a list of (x, y) points
+    def splineThrough(self, points):
+        return self.scaraRobotManager.splineThrough(points)
+
     # Move vertically
     def moveVertical(self, z):
         return self.scaraRobotManager.moveVertical(z)
 
+    # Move each axis a signed number of steps in one coordinated move (taking durationUsecs if that's given)
+    def moveSteps(self, upperSteps, lowerSteps, verticalSteps=0, durationUsecs=0):
+        return self.scaraRobotManager.moveSteps(upperSteps, lowerSteps, verticalSteps, durationUsecs)
+
+    # Get the step positions of upper, lower and vertical axes
+    def getStepPositions(self):
+        return self.scaraRobotManager.getStepPositions()
+
+    # Get the current x,y,z position of the pen
+    def getCurrentPosition(self):
+        return self.scaraRobotManager.getCurrentPosition()
+
+    # Set a function to be called periodically while stepping (None to disable)
+    def setMotionPollCallback(self, callback):
+        self.motionPollCallback = callback
+        self.motionPollStepCount = 0
+
+    # Set an object whose step(axis, dirn, timeUsecs) method is called for every step (None to disable)
+    # Axes are 0 upper, 1 lower and 2 vertical and the direction is the level of the direction pin
+    def setStepLogger(self, stepLogger):
+        self.stepLogger = stepLogger
+        self.stepLogLastMicros = self.hardwareLibrary.micros()
+        self.stepLogUsecs = self.stepLogLastMicros
+
+    # Time for the step logger - microseconds which keep counting when pyb.micros() wraps
+    # (correct as long as steps are less than a wrap period apart)
+    def stepLogTime(self):
+        nowMicros = self.hardwareLibrary.micros()
+        self.stepLogUsecs += (nowMicros - self.stepLogLastMicros) & 0x3FFFFFFF
+        self.stepLogLastMicros = nowMicros
+        return self.stepLogUsecs
+
+    # Called on every step - calls the motion poll callback every motionPollIntervalSteps steps
+    def checkMotionPoll(self):
+        if self.motionPollCallback is None:
+            return
+        self.motionPollStepCount += 1
+        if self.motionPollStepCount >= self.motionPollIntervalSteps:
+            self.motionPollStepCount = 0
+            self.motionPollCallback()
+
     # Perform a single step of the upper arm
     def stepUpperArm(self, dirn):
         self.upperArmDirn.value(dirn)
         self.upperArmStep.value(1)
+        if self.stepLogger is not None:
+            self.stepLogger.step(0, dirn, self.stepLogTime())
         self.hardwareLibrary.udelay(self.pulseWidthUsecs)
         self.upperArmStep.value(0)
         self.hardwareLibrary.udelay(self.betweenPulsesUsecs[0])
+        self.checkMotionPoll()
 
     # Perform a single step of the lower arm
     def stepLowerArm(self, dirn):
         self.lowerArmDirn.value(dirn)
         self.lowerArmStep.value(1)
+        if self.stepLogger is not None:
+            self.stepLogger.step(1, dirn, self.stepLogTime())
         self.hardwareLibrary.udelay(self.pulseWidthUsecs)
         self.lowerArmStep.value(0)
         self.hardwareLibrary.udelay(self.betweenPulsesUsecs[1])
+        self.checkMotionPoll()
 
     # Perform a single step of the vertical motor
     def stepVertical(self, dirn):
         self.verticalDirn.value(dirn)
         self.verticalStep.value(1)
+        if self.stepLogger is not None:
+            self.stepLogger.step(2, dirn, self.stepLogTime())
         self.hardwareLibrary.udelay(self.pulseWidthUsecs)
         self.verticalStep.value(0)
         self.hardwareLibrary.udelay(self.betweenPulsesUsecs[2])
+        self.checkMotionPoll()
+
+    # Perform a single step of any combination of axes at the same time
+    # Each direction is None if that axis shouldn't step on this occasion
+    # minBetweenPulsesUsecs (if not None) lengthens the time until the next step - it is never shortened below
+    # what the stepping axes need
+    def stepAxes(self, upperDirn, lowerDirn, verticalDirn, minBetweenPulsesUsecs=None):
+        betweenPulsesUsecs = 0
+        if upperDirn is not None:
+            self.upperArmDirn.value(upperDirn)
+            self.upperArmStep.value(1)
+            betweenPulsesUsecs = self.betweenPulsesUsecs[0]
+        if lowerDirn is not None:
+            self.lowerArmDirn.value(lowerDirn)
+            self.lowerArmStep.value(1)
+            betweenPulsesUsecs = max(betweenPulsesUsecs, self.betweenPulsesUsecs[1])
+        if verticalDirn is not None:
+            self.verticalDirn.value(verticalDirn)
+            self.verticalStep.value(1)
+            betweenPulsesUsecs = max(betweenPulsesUsecs, self.betweenPulsesUsecs[2])
+        if minBetweenPulsesUsecs is not None:
+            betweenPulsesUsecs = max(betweenPulsesUsecs, minBetweenPulsesUsecs)
+        if self.stepLogger is not None:
+            self.logAxesStep(upperDirn, lowerDirn, verticalDirn)
+        self.hardwareLibrary.udelay(self.pulseWidthUsecs)
+        self.upperArmStep.value(0)
+        self.lowerArmStep.value(0)
+        self.verticalStep.value(0)
+        self.hardwareLibrary.udelay(betweenPulsesUsecs)
+        self.checkMotionPoll()
+
+    def logAxesStep(self, upperDirn, lowerDirn, verticalDirn):
+        timeUsecs = self.stepLogTime()
+        if upperDirn is not None:
+            self.stepLogger.step(0, upperDirn, timeUsecs)
+        if lowerDirn is not None:
+            self.stepLogger.step(1, lowerDirn, timeUsecs)
+        if verticalDirn is not None:
+            self.stepLogger.step(2, verticalDirn, timeUsecs)
 
     def enableMotorDrive(self, turnMotorsOn, timeLimitForDriveMillis):
         # Check if we are turning the motors off
@@ -166,6 +291,10 @@ class ScaraOne:
         self.motorsEnabledLastMillis = self.hardwareLibrary.millis()
         self.motorsEnabledFlag = True
 
+    # Check if the motor drivers are enabled
+    def isMotorDriveEnabled(self):
+        return self.motorsEnabledFlag
+
     # Enable motor drive for a period of time
     def motorOnTimeLimitCheck(self):
         # Check if motors are on
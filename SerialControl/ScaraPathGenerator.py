@@ -0,0 +1,153 @@
+# Cartesian paths for the pen to follow and the generator which splits them into segments as the arm moves
+# The arm moves between the ends of segments with coordinated steps so the arm angles change in proportion
+# and the pen follows a curve rather than the straight chord between them - segments are kept short enough
+# that the pen stays within chordToleranceMM of the path
+import math
+from ScaraProfiler import profiler, STAGE_IK
+
+# Straight line
+class LinePath:
+
+    def __init__(self, x0, y0, x1, y1):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.length = math.sqrt((x1-x0)*(x1-x0) + (y1-y0)*(y1-y0))
+
+    # Point a fraction u (0 to 1) of the way along the path
+    def pointAt(self, u):
+        return self.x0 + (self.x1-self.x0)*u, self.y0 + (self.y1-self.y0)*u
+
+# Circular arc around cx,cy from startDeg to endDeg - angles are in degrees anticlockwise from the x axis
+# The arc goes clockwise or anticlockwise from the start to the end angle and is a full circle if they're
+# the same (or 360 apart)
+class ArcPath:
+
+    def __init__(self, cx, cy, radius, startDeg, endDeg, clockwise):
+        self.cx = cx
+        self.cy = cy
+        self.radius = radius
+        self.startAngle = startDeg * math.pi / 180
+        if clockwise:
+            sweepDeg = -((startDeg - endDeg) % 360)
+        else:
+            sweepDeg = (endDeg - startDeg) % 360
+        if sweepDeg == 0:
+            sweepDeg = -360 if clockwise else 360
+        self.sweepAngle = sweepDeg * math.pi / 180
+        self.length = abs(self.sweepAngle) * radius
+
+    # Point a fraction u (0 to 1) of the way along the path
+    def pointAt(self, u):
+        angle = self.startAngle + self.sweepAngle * u
+        return self.cx + self.radius * math.cos(angle), self.cy + self.radius * math.sin(angle)
+
+# Point a fraction t (0 to 1) along the cubic Bezier curve from p0 to p3 with control points c1 and c2
+def cubicBezierPoint(p0, c1, c2, p3, t):
+    s = 1.0 - t
+    a = s*s*s
+    b = 3*s*s*t
+    c = 3*s*t*t
+    d = t*t*t
+    return a*p0[0] + b*c1[0] + c*c2[0] + d*p3[0], a*p0[1] + b*c1[1] + c*c2[1] + d*p3[1]
+
+# Length of a curve (which has a pointAt method) found from a polyline of numPoints+1 points on it - this is a
+# little shorter than the real length but is only used to size the first segments
+def approxLength(path, numPoints):
+    length = 0.0
+    lastX, lastY = path.pointAt(0.0)
+    for pointIdx in range(1, numPoints + 1):
+        x, y = path.pointAt(pointIdx / numPoints)
+        length += math.sqrt((x-lastX)*(x-lastX) + (y-lastY)*(y-lastY))
+        lastX, lastY = x, y
+    return length
+
+# Cubic Bezier curve from x0,y0 to x3,y3 with control points x1,y1 and x2,y2
+class BezierPath:
+
+    def __init__(self, x0, y0, x1, y1, x2, y2, x3, y3):
+        self.p0 = (x0, y0)
+        self.c1 = (x1, y1)
+        self.c2 = (x2, y2)
+        self.p3 = (x3, y3)
+        self.length = approxLength(self, 16)
+
+    # Point a fraction u (0 to 1) of the way along the path (by curve parameter rather than distance)
+    def pointAt(self, u):
+        return cubicBezierPoint(self.p0, self.c1, self.c2, self.p3, u)
+
+# Catmull-Rom spline through a list of (x, y) points - the curve passes through every point and its direction
+# at each one is parallel to the line between the points either side of it (the end points are repeated to
+# give the direction at the ends)
+# Each span between two points is the equivalent cubic Bezier curve
+class CatmullRomPath:
+
+    def __init__(self, points):
+        self.points = points
+        self.numSpans = len(points) - 1
+        self.length = approxLength(self, 8 * self.numSpans) if self.numSpans > 0 else 0.0
+
+    # Point a fraction u (0 to 1) of the way along the path - each span takes an equal part of u
+    def pointAt(self, u):
+        spanPos = u * self.numSpans
+        spanIdx = min(int(spanPos), self.numSpans - 1)
+        p0 = self.points[max(spanIdx - 1, 0)]
+        p1 = self.points[spanIdx]
+        p2 = self.points[spanIdx + 1]
+        p3 = self.points[min(spanIdx + 2, self.numSpans)]
+        c1 = (p1[0] + (p2[0]-p0[0])/6, p1[1] + (p2[1]-p0[1])/6)
+        c2 = (p2[0] - (p3[0]-p1[0])/6, p2[1] - (p3[1]-p1[1])/6)
+        return cubicBezierPoint(p1, c1, c2, p2, spanPos - spanIdx)
+
+# Generate the arm angles (as returned by robotManager.calcArmAngles) at the end of each segment of a path
+# startAngles are the actual (thetaUpper, thetaLower) arm angles at the start of the path
+# The pen's distance from the path is checked half way along each segment (with the arm angles half way
+# between their values at the ends) - this grows with the square of the segment length at a rate which
+# depends on how the arm's Jacobian changes where it is - so the length of each segment is predicted from
+# the distance found for the last one and shortened until it's within tolerance
+# Only the current segment is held so paths of any length use the same memory
+# Generates None (and stops) if part of the path can't be reached with the elbow on the side it starts on
+def pathSegments(robotManager, path, startAngles, chordToleranceMM, maxSegmentMM, minSegmentMM):
+    if path.length <= 0:
+        return
+    u = 0.0
+    du = min(maxSegmentMM / path.length, 1.0)
+    minDu = min(minSegmentMM / path.length, 1.0)
+    maxDu = min(maxSegmentMM / path.length, 1.0)
+    thetaUpper, thetaLower = startAngles
+    # The elbow is kept on the same side along the path (rather than chosen afresh for each point)
+    elbowPt = robotManager.calcElbowPosition(thetaUpper)
+    while u < 1.0:
+        startTicks = profiler.start()
+        while True:
+            # The last segment ends exactly at the end of the path
+            if u + du > 1.0 - 1e-9:
+                du = 1.0 - u
+                endU = 1.0
+            else:
+                endU = u + du
+            endX, endY = path.pointAt(endU)
+            armAngles = robotManager.calcArmAngles(endX, endY, elbowPt)
+            midX, midY = path.pointAt(u + du / 2)
+            midAngles = robotManager.calcArmAngles(midX, midY, elbowPt)
+            if armAngles is None or midAngles is None:
+                profiler.stop(STAGE_IK, startTicks)
+                yield None
+                return
+            penX, penY = robotManager.calcPenPosition((thetaUpper + armAngles[0]) / 2, (thetaLower + armAngles[2]) / 2)
+            chordError = math.sqrt((penX-midX)*(penX-midX) + (penY-midY)*(penY-midY))
+            if chordError <= chordToleranceMM or du <= minDu:
+                break
+            du = max(du * max(0.9 * math.sqrt(chordToleranceMM / chordError), 0.1), minDu)
+        profiler.stop(STAGE_IK, startTicks)
+        yield armAngles
+        u = endU
+        thetaUpper = armAngles[0]
+        thetaLower = armAngles[2]
+        elbowPt = armAngles[3]
+        # Next segment as long as the error allows (but no more than twice as long)
+        if chordError > 0:
+            du = min(du * min(0.9 * math.sqrt(chordToleranceMM / chordError), 2.0), maxDu)
+        else:
+            du = min(du * 2.0, maxDu)
@@ -0,0 +1,73 @@
+# Lightweight cumulative timing of the stages of handling a command
+# Each stage keeps a total time, a count and the longest single time in microseconds - timing a stage
+# is two calls and an addition so it can be left on in production
+# The counters are returned over the serial link by Q0 and reset by Q1 (see RobotCommandInterpreter)
+# Time comes from utime.ticks_us on the PyBoard and a microsecond wall clock elsewhere - use
+# setTimeSource to time against something else (e.g. the HardwareLibrary stub's virtual clock)
+try:
+    import utime
+    ticks_us = utime.ticks_us
+    ticks_diff = utime.ticks_diff
+except ImportError:
+    import time
+
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(endTicks, startTicks):
+        return endTicks - startTicks
+
+# Stages
+STAGE_COMMAND = 0
+STAGE_PARSE = 1
+STAGE_IK = 2
+STAGE_BOUNDS = 3
+STAGE_STEPPING = 4
+STAGE_DISPLAY = 5
+STAGE_UART_WRITE = 6
+STAGE_NAMES = ["command", "parse", "ik", "bounds", "stepping", "display", "uartWrite"]
+
+class StageProfiler:
+
+    def __init__(self):
+        self.enabled = True
+        self.ticksUs = ticks_us
+        self.ticksDiff = ticks_diff
+        self.reset()
+
+    def setTimeSource(self, ticksUs, ticksDiff):
+        self.ticksUs = ticksUs
+        self.ticksDiff = ticksDiff
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+
+    def reset(self):
+        self.totalUs = [0] * len(STAGE_NAMES)
+        self.counts = [0] * len(STAGE_NAMES)
+        self.maxUs = [0] * len(STAGE_NAMES)
+
+    # Call at the start of a stage and pass the result to stop() at the end
+    def start(self):
+        if not self.enabled:
+            return 0
+        return self.ticksUs()
+
+    def stop(self, stage, startTicks):
+        if not self.enabled:
+            return
+        elapsedUs = self.ticksDiff(self.ticksUs(), startTicks)
+        self.totalUs[stage] += elapsedUs
+        self.counts[stage] += 1
+        if elapsedUs > self.maxUs[stage]:
+            self.maxUs[stage] = elapsedUs
+
+    # Profile frame for the host - {P name:totalUs:count:maxUs ...}
+    def getFrameStr(self):
+        frameStr = "{P"
+        for stage in range(len(STAGE_NAMES)):
+            frameStr += " %s:%d:%d:%d" % (STAGE_NAMES[stage], self.totalUs[stage], self.counts[stage], self.maxUs[stage])
+        return frameStr + "}\r\n"
+
+# The profiler used by all the firmware modules
+profiler = StageProfiler()
@@ -2,6 +2,8 @@
 # ScaraGeometry contains calculations used for arm position
 import ScaraGeometry
 import math
+from ScaraProfiler import profiler, STAGE_IK, STAGE_BOUNDS, STAGE_STEPPING
+from ScaraPathGenerator import LinePath, ArcPath, BezierPath, CatmullRomPath, pathSegments
 
 class ScaraRobotManager:
 
@@ -23,6 +25,9 @@ class ScaraRobotManager:
         self.shoulderGearMismatchFactor = self.robotConfiguration["shoulderGearMismatchFactor"]
         self.verticalStepsPerMM = self.robotConfiguration["vertical"]["stepsPerMM"]
         self.verticalTravelMax = self.robotConfiguration["vertical"]["verticalTravelMax"]
+        self.chordToleranceMM = self.robotConfiguration["path"]["chordToleranceMM"]
+        self.maxSegmentMM = self.robotConfiguration["path"]["maxSegmentMM"]
+        self.minSegmentMM = self.robotConfiguration["path"]["minSegmentMM"]
 
         # Accumulated movement and elbow x,y position
         self.curLowerStepsFromZero = 0
@@ -44,21 +49,45 @@ class ScaraRobotManager:
         self.curVerticalStepsFromZero = 0
         return True
 
-    # Move to an x,y point
-    # Does not attempt to move in a completely straight line
-    # But does move upper and lower arm proportionately - so if upper needs to move
-    # 100 steps and lower to move 500 steps to reach destination then move the lower
-    # arm 5 steps for every one step of the upper
-    def moveTo(self, x,y):
+    # Current position in steps from home of upper, lower and vertical axes
+    def getStepPositions(self):
+        return self.curUpperStepsFromZero, self.curLowerStepsFromZero, self.curVerticalStepsFromZero
+
+    # Current pen x,y,z position calculated from the step positions (forward kinematics)
+    def getCurrentPosition(self):
+        thetaUpper, thetaLower = self.getArmAngles()
+        x, y = self.calcPenPosition(thetaUpper, thetaLower)
+        z = self.curVerticalStepsFromZero / self.verticalStepsPerMM
+        return x, y, z
+
+    # Inverse kinematics - the arm angles (in degrees) which put the pen at x,y
+    # Returns (thetaUpper, thetaLower, uncorrectedThetaLower, targetElbowPt, otherIntersectPt) or None if the
+    # point can't be reached - thetaLower includes the shoulder gear mismatch correction (so is what the lower
+    # arm motor has to turn to) and uncorrectedThetaLower is the actual angle of the lower arm
+    # When nearElbowPt is given (e.g. while following a path) the elbow position nearest to it is chosen
+    def calcArmAngles(self, x, y, nearElbowPt=None):
 
         # Find the intersection point of the circles centred on the "shoulder" and the pen
-        p1, p2 = ScaraGeometry.circleIntersection((self.xOrigin,self.yOrigin,self.upperArmLen), (x,y,self.lowerArmLen))
+        intersectPts = ScaraGeometry.circleIntersection((self.xOrigin,self.yOrigin,self.upperArmLen), (x,y,self.lowerArmLen))
+        if intersectPts is None:
+            return None
+        p1, p2 = intersectPts
 
         # Check the y values of each alternative geometrical solutions for the "elbow" position
         # If only one of the solutions has y value > 0 then choose that one
         targetElbowPt = p1
         otherIntersectPt = p2
-        if p1[1] >= 0 and p2[1] > 0:
+        if nearElbowPt is not None:
+            # Keep the elbow on the same side as it follows a path - the path can't be followed if that
+            # would take the elbow below y = 0 (allowing for rounding where the elbow ends up at y = 0)
+            dist1 = (p1[0]-nearElbowPt[0])*(p1[0]-nearElbowPt[0]) + (p1[1]-nearElbowPt[1])*(p1[1]-nearElbowPt[1])
+            dist2 = (p2[0]-nearElbowPt[0])*(p2[0]-nearElbowPt[0]) + (p2[1]-nearElbowPt[1])*(p2[1]-nearElbowPt[1])
+            if dist2 < dist1:
+                targetElbowPt = p2
+                otherIntersectPt = p1
+            if targetElbowPt[1] < -1e-6:
+                return None
+        elif p1[1] >= 0 and p2[1] > 0:
             # Both have y > 0 so choose the point while moves the elbow the least
             # This should avoid moving the elbow back an forth unnecessarily as it moves small distances
             delta1 = math.atan2(p1[0]-self.curElbowX, p1[1]-self.curElbowY)
@@ -68,14 +97,11 @@ class ScaraRobotManager:
                 otherIntersectPt = p1
         elif p1[1] < 0 and p2[1] < 0:
             # Can't reach this position
-            print("XXXX Requested MoveTo x,y ", x, y, " intersection points ", p1, p2)
-            print("XXXX Can't reach this point")
-            return False
+            return None
         elif p1[1] < 0:
             # Choose second point
             targetElbowPt = p2
             otherIntersectPt = p1
-        print("MoveTo", x, y, "TargetElbow", targetElbowPt, "OtherIntersect", otherIntersectPt)
         x1 = targetElbowPt[0]
         y1 = targetElbowPt[1]
 
@@ -87,18 +113,18 @@ class ScaraRobotManager:
         # The lower arm may be rotated when the upper arm rotates if the gears at the shoulder joint are
         # mismatched - this code corrects for this by applying an adjustment to the lower arm angle based
         # on the upper arm angle
-        debugUncorrectedThetaLower = thetaLower
+        uncorrectedThetaLower = thetaLower
         thetaLower += thetaUpper * self.shoulderGearMismatchFactor
-        uncorrStr = ""
-        if self.shoulderGearMismatchFactor != 0:
-            uncorrStr = "uncorrected thetaLower {0:0.2f}".format(debugUncorrectedThetaLower)
-        print("Theta Upper/Lower", thetaUpper, thetaLower, uncorrStr)
+        return thetaUpper, thetaLower, uncorrectedThetaLower, targetElbowPt, otherIntersectPt
+
+    # Steps the upper and lower arms need to move from their current positions to reach the arm angles
+    def calcMoveSteps(self, thetaUpper, thetaLower):
         lowerSteps = int(round(thetaLower*self.lowerStepsPerDegree - self.curLowerStepsFromZero))
         upperSteps = int(round(thetaUpper*self.upperStepsPerDegree - self.curUpperStepsFromZero))
-        print("Moving upper(total) ", upperSteps, "(", self.curUpperStepsFromZero, ") lower(total) ", lowerSteps, "(",
-              self.curLowerStepsFromZero, ")")
+        return upperSteps, lowerSteps
 
-        # Check the angles calculated against the robot capabilities to ensure the arm can actually move to the required position
+    # Check the angles calculated against the robot capabilities to ensure the arm can actually move to the required position
+    def checkMoveBounds(self, upperSteps, lowerSteps):
         if (self.curUpperStepsFromZero + upperSteps > self.upperArmMaxAngle * self.upperStepsPerDegree) \
                         or (self.curUpperStepsFromZero + upperSteps < -self.upperArmMaxAngle * self.upperStepsPerDegree):
             print("Upper arm movement out of bounds - angle would be ", self.curUpperStepsFromZero*upperSteps/self.upperStepsPerDegree)
@@ -107,13 +133,64 @@ class ScaraRobotManager:
                         or (self.curLowerStepsFromZero + lowerSteps < -self.lowerArmMaxAngle * self.lowerStepsPerDegree):
             print("Lower arm movement out of bounds - angle would be ", self.curLowerStepsFromZero*lowerSteps/self.lowerStepsPerDegree)
             return False
+        return True
+
+    # Actual angles (in degrees) of the upper and lower arms calculated from the step positions
+    def getArmAngles(self):
+        thetaUpper = self.curUpperStepsFromZero / self.upperStepsPerDegree
+        # Remove the shoulder gear mismatch correction applied in moveTo
+        thetaLower = self.curLowerStepsFromZero / self.lowerStepsPerDegree - thetaUpper * self.shoulderGearMismatchFactor
+        return thetaUpper, thetaLower
+
+    # Elbow x,y position for an upper arm angle
+    def calcElbowPosition(self, thetaUpper):
+        d2r = math.pi/180
+        return self.xOrigin + self.upperArmLen * math.sin(thetaUpper * d2r), self.yOrigin + self.upperArmLen * math.cos(thetaUpper * d2r)
+
+    # Pen x,y position for actual arm angles (forward kinematics)
+    def calcPenPosition(self, thetaUpper, thetaLower):
+        d2r = math.pi/180
+        x = self.xOrigin + self.upperArmLen * math.sin(thetaUpper * d2r) + self.lowerArmLen * math.sin(thetaLower * d2r)
+        y = self.yOrigin + self.upperArmLen * math.cos(thetaUpper * d2r) + self.lowerArmLen * math.cos(thetaLower * d2r)
+        return x, y
+
+    # Move to an x,y point
+    # Does not attempt to move in a completely straight line
+    # But does move upper and lower arm proportionately - so if upper needs to move
+    # 100 steps and lower to move 500 steps to reach destination then move the lower
+    # arm 5 steps for every one step of the upper
+    def moveTo(self, x,y):
+        startTicks = profiler.start()
+        armAngles = self.calcArmAngles(x, y)
+        if armAngles is None:
+            print("XXXX Requested MoveTo x,y ", x, y)
+            print("XXXX Can't reach this point")
+            profiler.stop(STAGE_IK, startTicks)
+            return False
+        thetaUpper, thetaLower, debugUncorrectedThetaLower, targetElbowPt, otherIntersectPt = armAngles
+        print("MoveTo", x, y, "TargetElbow", targetElbowPt, "OtherIntersect", otherIntersectPt)
+        uncorrStr = ""
+        if self.shoulderGearMismatchFactor != 0:
+            uncorrStr = "uncorrected thetaLower {0:0.2f}".format(debugUncorrectedThetaLower)
+        print("Theta Upper/Lower", thetaUpper, thetaLower, uncorrStr)
+        upperSteps, lowerSteps = self.calcMoveSteps(thetaUpper, thetaLower)
+        print("Moving upper(total) ", upperSteps, "(", self.curUpperStepsFromZero, ") lower(total) ", lowerSteps, "(",
+              self.curLowerStepsFromZero, ")")
+        profiler.stop(STAGE_IK, startTicks)
+        startTicks = profiler.start()
 
+        # Check the move is within the robot capabilities
+        if not self.checkMoveBounds(upperSteps, lowerSteps):
+            profiler.stop(STAGE_BOUNDS, startTicks)
+            return False
         # Check movement is required
         lowerAbsSteps = abs(lowerSteps)
         upperAbsSteps = abs(upperSteps)
         if lowerAbsSteps == 0 and upperAbsSteps == 0:
             print("Neither upper or lower arms need to move to reach destination")
+            profiler.stop(STAGE_BOUNDS, startTicks)
             return False
+        profiler.stop(STAGE_BOUNDS, startTicks)
 
         # # Use an integer form of Bresenham's line algorithm https://en.wikipedia.org/wiki/Bresenham%27s_line_algorithm
         # # The good thing about this is that it involves only repeated addition to generate a smooth stepping motion
@@ -152,17 +229,171 @@ class ScaraRobotManager:
         #             break
 
         # Move each section independently
+        startTicks = profiler.start()
         for iStp in range(upperAbsSteps):
             self.robotControl.stepUpperArm(upperSteps > 0)
         # The motor on the lower arm is upside down so steps in opposite direction
         for iStp in range(lowerAbsSteps):
             self.robotControl.stepLowerArm(lowerSteps < 0)
+        profiler.stop(STAGE_STEPPING, startTicks)
 
         # Update the current arm position
         self.curUpperStepsFromZero += upperSteps
         self.curLowerStepsFromZero += lowerSteps
         return True
 
+    # Move the pen in a straight line from its current position to an x,y point
+    # The line is split into segments as the arm moves (see ScaraPathGenerator)
+    def lineTo(self, x, y):
+        curX, curY, curZ = self.getCurrentPosition()
+        return self.followPath(LinePath(curX, curY, x, y))
+
+    # Move the pen around an arc (see ScaraPathGenerator.ArcPath) - if the pen isn't already at the start of
+    # the arc it first moves there in a straight line
+    def arcTo(self, cx, cy, radius, startDeg, endDeg, clockwise):
+        path = ArcPath(cx, cy, radius, startDeg, endDeg, clockwise)
+        startX, startY = path.pointAt(0.0)
+        curX, curY, curZ = self.getCurrentPosition()
+        if math.sqrt((startX-curX)*(startX-curX) + (startY-curY)*(startY-curY)) > self.chordToleranceMM:
+            if not self.lineTo(startX, startY):
+                return False
+        return self.followPath(path)
+
+    # Move the pen along a cubic Bezier curve from its current position to x,y with control points x1,y1 and x2,y2
+    def bezierTo(self, x1, y1, x2, y2, x, y):
+        curX, curY, curZ = self.getCurrentPosition()
+        return self.followPath(BezierPath(curX, curY, x1, y1, x2, y2, x, y))
+
+    # Move the pen along a Catmull-Rom spline from its current position through a list of (x, y) points
+    def splineThrough(self, points):
+        curX, curY, curZ = self.getCurrentPosition()
+        return self.followPath(CatmullRomPath([(curX, curY)] + points))
+
+    # Arm angles (as calcArmAngles) at the end of a path with the elbow carried along it from its current
+    # position as pathSegments does - None if the path goes out of reach on that side
+    # The path is walked in maxSegmentMM steps which is much cheaper than generating the segments
+    def calcPathEndArmAngles(self, path):
+        elbowPt = self.calcElbowPosition(self.getArmAngles()[0])
+        numSteps = max(int(math.ceil(path.length / self.maxSegmentMM)), 1)
+        armAngles = None
+        for stepIdx in range(1, numSteps + 1):
+            x, y = path.pointAt(stepIdx / numSteps)
+            armAngles = self.calcArmAngles(x, y, elbowPt)
+            if armAngles is None:
+                return None
+            elbowPt = armAngles[3]
+        return armAngles
+
+    # Move the pen along a path (which should start at its current position) keeping within chordToleranceMM
+    # The elbow stays on the side it starts on - if part of the path can only be reached with the elbow on the
+    # other side (or is out of reach) the arm stops there and False is returned
+    def followPath(self, path):
+
+        # Check the end of the path can be reached before moving
+        startTicks = profiler.start()
+        endX, endY = path.pointAt(1.0)
+        endAngles = self.calcPathEndArmAngles(path)
+        profiler.stop(STAGE_IK, startTicks)
+        if endAngles is None:
+            print("Path end", endX, endY, "can't be reached")
+            return False
+        startTicks = profiler.start()
+        upperSteps, lowerSteps = self.calcMoveSteps(endAngles[0], endAngles[1])
+        inBounds = self.checkMoveBounds(upperSteps, lowerSteps)
+        profiler.stop(STAGE_BOUNDS, startTicks)
+        if not inBounds:
+            return False
+
+        # Generate each segment just before moving along it
+        numSegments = 0
+        for armAngles in pathSegments(self, path, self.getArmAngles(), self.chordToleranceMM, self.maxSegmentMM,
+                                      self.minSegmentMM):
+            if armAngles is None:
+                print("Path stopped after", numSegments, "segments - the next is out of reach")
+                return False
+            startTicks = profiler.start()
+            upperSteps, lowerSteps = self.calcMoveSteps(armAngles[0], armAngles[1])
+            inBounds = self.checkMoveBounds(upperSteps, lowerSteps)
+            profiler.stop(STAGE_BOUNDS, startTicks)
+            if not inBounds:
+                print("Path stopped after", numSegments, "segments - the next is out of bounds")
+                return False
+            self.stepCoordinated(upperSteps, lowerSteps)
+            numSegments += 1
+        print("Path to", endX, endY, "length", path.length, "in", numSegments, "segments")
+        return True
+
+    # Move each axis a signed number of steps as a single coordinated move
+    # The step directions are the same as those used by moveTo and the tracked position is updated so
+    # moves made this way (e.g. from a precompiled step program) can be freely mixed with moveTo
+    # If durationUsecs is given the steps are spread out so the move takes that long - but no axis steps
+    # faster than it normally would so a move can take longer
+    def moveSteps(self, upperSteps, lowerSteps, verticalSteps=0, durationUsecs=0):
+
+        # Check the final position is within the robot capabilities
+        startTicks = profiler.start()
+        if abs(self.curUpperStepsFromZero + upperSteps) > self.upperArmMaxAngle * self.upperStepsPerDegree:
+            print("Upper arm step movement out of bounds", self.curUpperStepsFromZero, upperSteps)
+            profiler.stop(STAGE_BOUNDS, startTicks)
+            return False
+        if abs(self.curLowerStepsFromZero + lowerSteps) > self.lowerArmMaxAngle * self.lowerStepsPerDegree:
+            print("Lower arm step movement out of bounds", self.curLowerStepsFromZero, lowerSteps)
+            profiler.stop(STAGE_BOUNDS, startTicks)
+            return False
+        finalVerticalSteps = self.curVerticalStepsFromZero + verticalSteps
+        if finalVerticalSteps < 0 or finalVerticalSteps > self.verticalTravelMax * self.verticalStepsPerMM:
+            print("Vertical step movement out of bounds", self.curVerticalStepsFromZero, verticalSteps)
+            profiler.stop(STAGE_BOUNDS, startTicks)
+            return False
+        profiler.stop(STAGE_BOUNDS, startTicks)
+        print("MoveSteps upper", upperSteps, "lower", lowerSteps, "vertical", verticalSteps)
+        betweenPulsesUsecs = None
+        majorSteps = max(abs(upperSteps), abs(lowerSteps), abs(verticalSteps))
+        if durationUsecs > 0 and majorSteps > 0:
+            betweenPulsesUsecs = max(durationUsecs // majorSteps - self.robotControl.pulseWidthUsecs, 0)
+        self.stepCoordinated(upperSteps, lowerSteps, verticalSteps, betweenPulsesUsecs)
+        return True
+
+    # Step each axis a signed number of steps together (no bounds checks) and update the current position
+    # betweenPulsesUsecs (if not None) is the time between steps when that's longer than the axes need
+    def stepCoordinated(self, upperSteps, lowerSteps, verticalSteps=0, betweenPulsesUsecs=None):
+
+        # Use a multi-axis form of Bresenham's line algorithm so the axis with the most steps steps every
+        # time and the others are interleaved evenly - this involves only repeated addition
+        upperAbsSteps = abs(upperSteps)
+        lowerAbsSteps = abs(lowerSteps)
+        verticalAbsSteps = abs(verticalSteps)
+        majorSteps = max(upperAbsSteps, lowerAbsSteps, verticalAbsSteps)
+        # The motor on the lower arm is upside down so steps in opposite direction
+        upperDirn = upperSteps > 0
+        lowerDirn = lowerSteps < 0
+        verticalDirn = verticalSteps > 0
+        upperAccum = lowerAccum = verticalAccum = majorSteps // 2
+        startTicks = profiler.start()
+        for iStp in range(majorSteps):
+            upperAccum += upperAbsSteps
+            lowerAccum += lowerAbsSteps
+            verticalAccum += verticalAbsSteps
+            stepUpper = None
+            stepLower = None
+            stepVertical = None
+            if upperAccum >= majorSteps:
+                upperAccum -= majorSteps
+                stepUpper = upperDirn
+            if lowerAccum >= majorSteps:
+                lowerAccum -= majorSteps
+                stepLower = lowerDirn
+            if verticalAccum >= majorSteps:
+                verticalAccum -= majorSteps
+                stepVertical = verticalDirn
+            self.robotControl.stepAxes(stepUpper, stepLower, stepVertical, betweenPulsesUsecs)
+        profiler.stop(STAGE_STEPPING, startTicks)
+
+        # Update the current position
+        self.curUpperStepsFromZero += upperSteps
+        self.curLowerStepsFromZero += lowerSteps
+        self.curVerticalStepsFromZero += verticalSteps
+
     def moveVertical(self, z):
         finalStepPos = z * self.verticalStepsPerMM
         if finalStepPos > self.verticalTravelMax * self.verticalStepsPerMM:
@@ -175,7 +406,9 @@ class ScaraRobotManager:
         # print("Req steps", requiredSteps)
         # Step in the required direction
         # print("Int req", int(abs(requiredSteps)))
+        startTicks = profiler.start()
         for i in range(int(abs(requiredSteps))):
             self.robotControl.stepVertical(requiredSteps > 0)
+        profiler.stop(STAGE_STEPPING, startTicks)
         self.curVerticalStepsFromZero += requiredSteps
         return True
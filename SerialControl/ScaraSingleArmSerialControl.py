@@ -5,8 +5,20 @@
 # Each command is on a separate line and is terminated with an LF (newline or linefeed \n) (CR \r is ignored)
 # Commands include:
 # G0 XXXXX YYYYY      ... go to X,Y position            ... XXXXX and YYYYY are floating point ascii numbers   
+# G1 XXXXX YYYYY      ... go to X,Y position in a straight line (split into segments on the robot)
+# G2 CX CY R SSS EEE  ... clockwise arc of radius R around CX,CY from angle SSS to EEE (degrees anticlockwise
+#                         from the x axis, a full circle if they're the same) - starts with a straight line to
+#                         the start of the arc if the pen isn't there
+# G3 CX CY R SSS EEE  ... anticlockwise arc (as G2)
+# B0 X1 Y1 X2 Y2 X Y  ... cubic Bezier curve from the current position to X,Y with control points X1,Y1 and X2,Y2
+# B1 X1 Y1 ... Xn Yn  ... Catmull-Rom spline from the current position through up to 16 X,Y points
 # S0 NNNNN            ... move upper arm NNNNN steps    ... NNNNN is an integer between -1000 and 1000         
 # S1 NNNNN            ... move lower arm NNNNN steps    ... NNNNN is an integer between -1000 and 1000         
+# S2 UUUUU LLLLL [VVVVV] ... move upper, lower (and optionally vertical) axes signed numbers of steps
+#                         in one coordinated move - directions match G0 and the tracked position is updated
+# S3 UUUUU LLLLL DDDDD ... move upper and lower arms signed numbers of steps in one coordinated move taking
+#                         DDDDD microseconds (played back from a timed step program, see ScaraTrajectoryPlanner)
+#                         - the move takes longer if the arms can't step that fast
 # C0                  ... calibrate, which means set the current position as the home (straight out) position
 # P0                  ... pen up
 # P1                  ... pen down
@@ -14,6 +26,17 @@
 # E1                  ... disable motor drive
 # D0 TTTTT            ... set default motor on time     ... TTTTT is in milliseconds
 # V0 ZZZZZ            ... move to Z position
+# Q0                  ... get the profiling counters (see ScaraProfiler)
+# Q1                  ... reset the profiling counters
+# M0                  ... get the heap counters (see ScaraMemProfiler)
+# M1                  ... reset the heap counters
+# M2 N                ... set heap profiling mode (0 off, 1 measure each command, 2 also collect before each command)
+# ?                   ... status query - answered immediately (even during a move), see RobotCommandInterpreter
+
+# The main loop is a set of cooperating uasyncio tasks (UART receive, command execution, motor
+# power management and display refresh) - in test mode this runs under CPython asyncio
+# On the PyBoard the UART receive task awaits reads from a uasyncio stream on the UART so a received
+# character wakes it straight away - the stub UART isn't a stream so in test mode the task polls it
 
 # Handle test mode using a stub of hardware library
 TEST_MODE = False
@@ -22,10 +45,27 @@ if TEST_MODE:
 else:
     import pyb as HardwareLibrary
 
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 # ScaraOne is the library supporting the ScaraOne Single Arm Scara robot
 from ScaraOne import ScaraOne
 from RobotCommandInterpreter import RobotCommandInterpreter
 from PyBoardDisplay import PyBoardDisplay
+from ScaraProfiler import profiler, STAGE_UART_WRITE
+
+# Intervals at which motor power and the display are checked
+MOTOR_CHECK_INTERVAL_SECS = 0.01
+DISPLAY_REFRESH_INTERVAL_SECS = 0.1
+
+# Most characters taken from the UART stream at a time
+UART_READ_CHUNK = 64
+
+# Time the UART receive task sleeps in test mode when no characters have arrived - seconds rather than
+# sleep_ms as CPython's asyncio has no sleep_ms
+UART_IDLE_POLL_SECS = 0.001
 
 # Serial Connection - this uses pins Y1 and Y2 (Tx and Rx)
 uart = HardwareLibrary.UART(6, 115200)
@@ -34,7 +74,7 @@ uart = HardwareLibrary.UART(6, 115200)
 scaraOne = ScaraOne(HardwareLibrary)
 
 # Create display
-pyBoardDisplay = PyBoardDisplay(HardwareLibrary, True)
+pyBoardDisplay = PyBoardDisplay(HardwareLibrary, True, deferUpdates=True)
 
 # Create the command interpreter
 robotCommandInterpreter = RobotCommandInterpreter(scaraOne, pyBoardDisplay)
@@ -45,17 +85,81 @@ print("SCARA Arm Awaiting Command")
 statusStr = "Ready"
 pyBoardDisplay.showStatus(statusStr)
 
-def receiveAndExecuteCommands():
-    # Check for any characters waiting to be handled
-    if uart.any() > 0:
-        for i in range(uart.any()):
-            ch = uart.readchar()
-            rslt = robotCommandInterpreter.handleChar(ch)
-            for ch in rslt:
-                uart.write(ch)
-
-# Loop here indefinitely receiving serial commands and executing them
-while(True):
-    receiveAndExecuteCommands()
-    scaraOne.motorOnTimeLimitCheck()
-    HardwareLibrary.delay(10)
+# Set when a complete command has been received and is waiting to be executed
+commandReceivedEvent = asyncio.Event()
+
+# Handle a character from the host - complete commands are queued and status queries answered straight away
+def handleReceivedChar(ch):
+    rslt = robotCommandInterpreter.receiveChar(ch)
+    if len(rslt) > 0:
+        uart.write(rslt)
+
+# Receive any characters waiting to be handled - this is also called during moves to keep the serial
+# port serviced
+# Returns True if any characters were received
+def receiveCommandChars():
+    charsReceived = False
+    while uart.any() > 0:
+        charsReceived = True
+        handleReceivedChar(uart.readchar())
+    if robotCommandInterpreter.commandsWaiting() > 0:
+        commandReceivedEvent.set()
+    return charsReceived
+
+scaraOne.setMotionPollCallback(receiveCommandChars)
+
+# Receive from the UART - on the PyBoard the task sleeps in the scheduler's poll of the UART stream until
+# a character arrives (the read can come back empty if the characters were taken during a move)
+async def uartReceiveTask():
+    if TEST_MODE:
+        await uartPollTask()
+        return
+    reader = asyncio.StreamReader(uart)
+    while True:
+        rxBytes = await reader.read(UART_READ_CHUNK)
+        if rxBytes:
+            for ch in rxBytes:
+                handleReceivedChar(ch)
+        receiveCommandChars()
+
+# Poll the stub UART - while characters are arriving just yield to the other tasks between polls and when
+# idle sleep briefly rather than spinning
+async def uartPollTask():
+    while True:
+        if receiveCommandChars():
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(UART_IDLE_POLL_SECS)
+
+# Execute queued commands as they arrive
+async def commandExecuteTask():
+    while True:
+        await commandReceivedEvent.wait()
+        commandReceivedEvent.clear()
+        while robotCommandInterpreter.commandsWaiting() > 0:
+            rslt = robotCommandInterpreter.executeNextCommand()
+            startTicks = profiler.start()
+            uart.write(rslt)
+            profiler.stop(STAGE_UART_WRITE, startTicks)
+            await asyncio.sleep(0)
+
+# Turn the motors off when their time limit has elapsed
+async def motorPowerTask():
+    while True:
+        scaraOne.motorOnTimeLimitCheck()
+        await asyncio.sleep(MOTOR_CHECK_INTERVAL_SECS)
+
+# Redraw the display when the status changes
+async def displayRefreshTask():
+    while True:
+        pyBoardDisplay.refresh()
+        await asyncio.sleep(DISPLAY_REFRESH_INTERVAL_SECS)
+
+async def main():
+    asyncio.create_task(commandExecuteTask())
+    asyncio.create_task(motorPowerTask())
+    asyncio.create_task(displayRefreshTask())
+    await uartReceiveTask()
+
+# Run the tasks indefinitely receiving serial commands and executing them
+asyncio.run(main())
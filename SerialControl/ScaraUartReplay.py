@@ -0,0 +1,168 @@
+# Replay a captured serial session (or a file of commands) into the firmware running on the HardwareLibrary stub
+# Captures are written by the stub's UART (HardwareLibrary.startUartCapture) or by the host's ScaraSerialClient
+# (captureFileName) - see HardwareLibrary for the format
+# The replayed robot's results are compared with the ones in the capture and the throughput is reported so
+# recorded jobs can be used as load tests for the interpreter and command queue
+#
+# Timing
+#   default             the host's characters are sent as soon as the replies the host waited for have been
+#                       written (keeping the host's pipelining) and the virtual clock runs as fast as it can
+#   --original-timing   the host's characters also wait until the times they were captured
+#   --real-time         the virtual clock follows the wall clock (with --original-timing this replays the
+#                       session at its original speed)
+#
+# Usage: python3 ScaraUartReplay.py capture.txt [--original-timing] [--real-time] [--capture replayed.txt]
+import argparse
+import contextlib
+import os
+import re
+import sys
+import time
+
+import HardwareLibrary
+from ScaraOne import ScaraOne
+from RobotCommandInterpreter import RobotCommandInterpreter
+from PyBoardDisplay import PyBoardDisplay
+
+# Command result lines - e.g. [CMDG0 10 150]<0>
+RESULT_LINE_RE = re.compile(rb"\[CMD[^\]\r\n]*\]<-?\d+>")
+
+# Result code of a command rejected because the queue was full
+RSLT_QUEUE_FULL = b"<-5>"
+
+
+class ScaraUartReplay:
+
+    def __init__(self, script, commandProcessingUsecs=0, realTime=False, quiet=True):
+        self.clock = HardwareLibrary.useClock(HardwareLibrary.VirtualClock(realTime))
+        self.script = HardwareLibrary.useUartScript(script)
+        self.commandProcessingUsecs = commandProcessingUsecs
+        self.quiet = quiet
+        # Where the firmware's output goes in quiet mode - opened once and closed by close()
+        self.devnull = open(os.devnull, "w") if quiet else None
+        with self.firmwareOutput():
+            self.uart = HardwareLibrary.UART(6, 115200)
+            self.robot = ScaraOne(HardwareLibrary)
+            self.display = PyBoardDisplay(HardwareLibrary, False, deferUpdates=True)
+            self.interpreter = RobotCommandInterpreter(self.robot, self.display)
+        HardwareLibrary.useUartScript(None)
+        self.robot.setMotionPollCallback(self.receiveCommandChars)
+
+        # Statistics
+        self.commandsExecuted = 0
+        self.maxCommandsWaiting = 0
+        self.forcedBursts = 0
+
+    # The firmware prints a lot - send it nowhere in quiet mode
+    def firmwareOutput(self):
+        if self.quiet:
+            return contextlib.redirect_stdout(self.devnull)
+        return contextlib.nullcontext()
+
+    # As the firmware's receiveCommandChars - also called every few steps during moves
+    def receiveCommandChars(self):
+        while self.uart.any() > 0:
+            rslt = self.interpreter.receiveChar(self.uart.readchar())
+            if len(rslt) > 0:
+                self.uart.write(rslt)
+        self.maxCommandsWaiting = max(self.maxCommandsWaiting, self.interpreter.commandsWaiting())
+
+    def executeCommands(self):
+        while self.interpreter.commandsWaiting() > 0:
+            self.clock.advance(self.commandProcessingUsecs)
+            self.uart.write(self.interpreter.executeNextCommand())
+            self.commandsExecuted += 1
+            self.receiveCommandChars()
+
+    # Run until the script has been sent and every command executed
+    def run(self):
+        with self.firmwareOutput():
+            while True:
+                self.receiveCommandChars()
+                self.executeCommands()
+                self.robot.motorOnTimeLimitCheck()
+                self.display.refresh()
+                if self.uart.any() > 0 or self.interpreter.commandsWaiting() > 0:
+                    continue
+                if self.script.finished():
+                    return
+                # Nothing to do until the host sends more
+                nextBurstUsecs = self.script.nextBurstUsecs()
+                if nextBurstUsecs is not None and nextBurstUsecs > self.clock.nowUsecs():
+                    self.clock.advanceTo(nextBurstUsecs)
+                elif self.script.releaseNextBurst():
+                    # The robot hasn't written the reply the host waited for in the capture
+                    self.forcedBursts += 1
+
+    def close(self):
+        if self.devnull is not None:
+            self.devnull.close()
+            self.devnull = None
+
+
+# Compare the command results written during the replay with those in the capture
+# Returns (number of results replayed, number in the capture, index of the first difference or None)
+def compareResults(replayedData, capturedData):
+    replayedResults = RESULT_LINE_RE.findall(replayedData)
+    capturedResults = RESULT_LINE_RE.findall(capturedData)
+    for resultIdx in range(min(len(replayedResults), len(capturedResults))):
+        if replayedResults[resultIdx] != capturedResults[resultIdx]:
+            return len(replayedResults), len(capturedResults), resultIdx
+    if len(replayedResults) != len(capturedResults):
+        return len(replayedResults), len(capturedResults), min(len(replayedResults), len(capturedResults))
+    return len(replayedResults), len(capturedResults), None
+
+
+def replayFile(fileName, originalTiming=False, realTime=False, commandProcessingUsecs=0, captureFileName=None,
+               quiet=True):
+    script = HardwareLibrary.UartScript.fromFile(fileName, originalTiming)
+    replay = ScaraUartReplay(script, commandProcessingUsecs, realTime, quiet)
+    if captureFileName is not None:
+        HardwareLibrary.startUartCapture()
+    startTime = time.perf_counter()
+    try:
+        replay.run()
+    finally:
+        replay.close()
+        replayCapture = HardwareLibrary.stopUartCapture()
+    elapsedSecs = time.perf_counter() - startTime
+    if replayCapture is not None:
+        replayCapture.save(captureFileName)
+
+    virtualSecs = replay.clock.nowUsecs() / 1e6
+    print("Commands {0}, wall time {1:.3f}s ({2:.1f} per second), virtual time {3:.3f}s".format(
+        replay.commandsExecuted, elapsedSecs, replay.commandsExecuted / max(elapsedSecs, 1e-9), virtualSecs))
+    print("Most commands waiting {0}, rejected as queue full {1}, bursts sent without their reply {2}".format(
+        replay.maxCommandsWaiting, script.writtenData.count(RSLT_QUEUE_FULL), replay.forcedBursts))
+
+    # Only captures have results to compare with
+    try:
+        capturedData = HardwareLibrary.UartCapture.load(fileName).data(HardwareLibrary.UART_CAPTURE_WRITE)
+    except ValueError:
+        return True
+    numReplayed, numCaptured, firstDiffIdx = compareResults(bytes(script.writtenData), capturedData)
+    if firstDiffIdx is None:
+        print("All {0} results match the capture".format(numCaptured))
+        return True
+    replayedResults = RESULT_LINE_RE.findall(bytes(script.writtenData))
+    capturedResults = RESULT_LINE_RE.findall(capturedData)
+    print("Results differ from the capture at result {0} ({1} replayed, {2} captured): {3} (captured {4})".format(
+        firstDiffIdx, numReplayed, numCaptured,
+        replayedResults[firstDiffIdx].decode("ascii") if firstDiffIdx < numReplayed else "none",
+        capturedResults[firstDiffIdx].decode("ascii") if firstDiffIdx < numCaptured else "none"))
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a captured serial session into the emulated firmware")
+    parser.add_argument("fileName", help="UART capture or text file of commands")
+    parser.add_argument("--original-timing", action="store_true", help="send the host's characters at their captured times")
+    parser.add_argument("--real-time", action="store_true", help="run the virtual clock at wall clock speed")
+    parser.add_argument("--processing-usecs", type=int, default=0, help="time added for parsing each command")
+    parser.add_argument("--capture", help="capture the replayed session to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the firmware's own output")
+    args = parser.parse_args()
+
+    matched = replayFile(args.fileName, args.original_timing, args.real_time, args.processing_usecs, args.capture,
+                         not args.verbose)
+    sys.exit(0 if matched else 1)
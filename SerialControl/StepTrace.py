@@ -0,0 +1,284 @@
+# Run length encoded step traces - the steps each axis took, in runs of steps in the same direction at a
+# steady rate, so a job of millions of steps is a few thousand runs
+# Traces can be written
+#   on the robot - give ScaraOne a StepTraceWriter with setStepLogger (the writer keeps ended runs in
+#                  memory and only touches the file every bufferRuns runs)
+#   from a HardwareLibrary pin trace (stub or ScaraEmulator) - see writePinTraceSteps
+# and are read back lazily a run at a time so long traces never need to be held in memory
+#
+# File format (little endian)
+#   magic "SCST", uint16 version, uint16 reserved
+#   then a record for each run in the order the runs ended
+#   uint8 axis, uint8 direction (step direction pin level), uint32 count, uint64 first step time (usecs),
+#   uint64 last step time (usecs)
+# The steps of a run are evenly spaced between the first and last step times - with an interval tolerance
+# of 0 (the default) this is exact and otherwise each step time is within about the tolerance
+# Runs of each axis are in time order but runs of different axes may be interleaved in any order
+#
+# On the robot timer jitter means consecutive step intervals are rarely exactly equal, so with a tolerance
+# of 0 nearly every step would end a run - use STEP_TRACE_ROBOT_TOLERANCE_USECS (or more) there
+#
+# Usage: python3 StepTrace.py summary trace.scst
+#        python3 StepTrace.py convert pintrace.scpt trace.scst [--tolerance-usecs N]
+#        python3 StepTrace.py profile trace.scst [--axis upper] [--sample-ms 10]
+import struct
+
+AXIS_UPPER = 0
+AXIS_LOWER = 1
+AXIS_VERTICAL = 2
+AXIS_NAMES = ["upper", "lower", "vertical"]
+
+# Step and direction pins of each axis (see ScaraOne)
+AXIS_PINS = [("Y11", "Y12"), ("Y9", "Y10"), ("Y6", "Y5")]
+
+STEP_TRACE_MAGIC = b"SCST"
+STEP_TRACE_VERSION = 1
+# Formats are plain strings as MicroPython's struct module has pack/unpack/calcsize but no Struct class
+STEP_TRACE_HEADER_FORMAT = "<4sHH"
+STEP_TRACE_RUN_FORMAT = "<BBIQQ"
+STEP_TRACE_HEADER_SIZE = struct.calcsize(STEP_TRACE_HEADER_FORMAT)
+STEP_TRACE_RUN_SIZE = struct.calcsize(STEP_TRACE_RUN_FORMAT)
+
+# Interval tolerance to use when writing traces on the robot - enough to absorb timer jitter
+STEP_TRACE_ROBOT_TOLERANCE_USECS = 50
+
+class StepTraceWriter:
+
+    def __init__(self, fileName, intervalToleranceUsecs=0, bufferRuns=64):
+        self.outFile = open(fileName, "wb")
+        self.outFile.write(struct.pack(STEP_TRACE_HEADER_FORMAT, STEP_TRACE_MAGIC, STEP_TRACE_VERSION, 0))
+        self.intervalToleranceUsecs = intervalToleranceUsecs
+        # Open run of each axis - [direction, count, first time, last time] or None
+        self.openRuns = [None] * len(AXIS_NAMES)
+        # Ended runs waiting to be written - flushed every bufferRuns runs and on close
+        self.bufferRuns = bufferRuns
+        self.runBuffer = []
+        self.numRuns = 0
+        self.numSteps = 0
+
+    def step(self, axis, dirn, timeUsecs):
+        self.numSteps += 1
+        dirn = 1 if dirn else 0
+        run = self.openRuns[axis]
+        if run is not None and run[0] == dirn:
+            interval = timeUsecs - run[3]
+            if interval > 0:
+                if run[1] == 1:
+                    run[1] = 2
+                    run[3] = timeUsecs
+                    return
+                runInterval = (run[3] - run[2]) / (run[1] - 1)
+                if abs(interval - runInterval) <= self.intervalToleranceUsecs:
+                    run[1] += 1
+                    run[3] = timeUsecs
+                    return
+        if run is not None:
+            self.writeRun(axis, run)
+        self.openRuns[axis] = [dirn, 1, timeUsecs, timeUsecs]
+
+    def writeRun(self, axis, run):
+        self.runBuffer.append(struct.pack(STEP_TRACE_RUN_FORMAT, axis, run[0], run[1], run[2], run[3]))
+        self.numRuns += 1
+        if len(self.runBuffer) >= self.bufferRuns:
+            self.flush()
+
+    def flush(self):
+        if self.runBuffer:
+            self.outFile.write(b"".join(self.runBuffer))
+            self.runBuffer = []
+
+    def close(self):
+        if self.outFile is None:
+            return
+        for axis in range(len(self.openRuns)):
+            if self.openRuns[axis] is not None:
+                self.writeRun(axis, self.openRuns[axis])
+                self.openRuns[axis] = None
+        self.flush()
+        self.outFile.close()
+        self.outFile = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        self.close()
+
+# Lazy reader - runs() can be iterated as many times as required and reads the file a chunk at a time
+class StepTraceReader:
+
+    def __init__(self, fileName, chunkRuns=4096):
+        self.fileName = fileName
+        self.chunkRuns = chunkRuns
+        with open(fileName, "rb") as inFile:
+            magic, version, reserved = struct.unpack(STEP_TRACE_HEADER_FORMAT, inFile.read(STEP_TRACE_HEADER_SIZE))
+        if magic != STEP_TRACE_MAGIC or version != STEP_TRACE_VERSION:
+            raise ValueError("Not a step trace file (or unsupported version): " + fileName)
+
+    # Generate (axis, direction, count, first time, last time) for the runs (of one axis or all of them)
+    def runs(self, axis=None):
+        with open(self.fileName, "rb") as inFile:
+            inFile.seek(STEP_TRACE_HEADER_SIZE)
+            # Reading is host only so the Struct class is fine here
+            runStruct = struct.Struct(STEP_TRACE_RUN_FORMAT)
+            while True:
+                chunk = inFile.read(STEP_TRACE_RUN_SIZE * self.chunkRuns)
+                numRuns = len(chunk) // STEP_TRACE_RUN_SIZE
+                for run in runStruct.iter_unpack(chunk[:numRuns * STEP_TRACE_RUN_SIZE]):
+                    if axis is None or run[0] == axis:
+                        yield run
+                if len(chunk) < STEP_TRACE_RUN_SIZE * self.chunkRuns:
+                    return
+
+    # Generate (time, direction) for every step of an axis
+    def steps(self, axis):
+        for runAxis, dirn, count, firstUsecs, lastUsecs in self.runs(axis):
+            interval = (lastUsecs - firstUsecs) / (count - 1) if count > 1 else 0
+            for stepIdx in range(count):
+                yield int(round(firstUsecs + stepIdx * interval)), dirn
+
+# Generate (time, axis, direction) for every step in a HardwareLibrary pin trace in time order
+# ScaraOne sets a direction pin before raising the step pin (at the same clock time) so direction
+# changes are applied before the step edges at each time
+def pinTraceSteps(pinTrace):
+    stepPinAxes = {}
+    dirnPinAxes = {}
+    for axis in range(len(AXIS_PINS)):
+        stepPinAxes[AXIS_PINS[axis][0]] = axis
+        dirnPinAxes[AXIS_PINS[axis][1]] = axis
+    dirnLevels = [0] * len(AXIS_PINS)
+    edgesTime = None
+    edges = []
+    for timeUsecs, pinName, level in pinTrace.transitions():
+        if timeUsecs != edgesTime:
+            for axis, dirn in pinEdgeSteps(edges, stepPinAxes, dirnPinAxes, dirnLevels):
+                yield edgesTime, axis, dirn
+            edgesTime = timeUsecs
+            edges = []
+        edges.append((pinName, level))
+    for axis, dirn in pinEdgeSteps(edges, stepPinAxes, dirnPinAxes, dirnLevels):
+        yield edgesTime, axis, dirn
+
+def pinEdgeSteps(edges, stepPinAxes, dirnPinAxes, dirnLevels):
+    for pinName, level in edges:
+        if pinName in dirnPinAxes:
+            dirnLevels[dirnPinAxes[pinName]] = level
+    return [(stepPinAxes[pinName], dirnLevels[stepPinAxes[pinName]]) for pinName, level in edges
+            if level == 1 and pinName in stepPinAxes]
+
+# Write the steps in a pin trace to a step trace file - returns the number of runs
+def writePinTraceSteps(pinTrace, fileName, intervalToleranceUsecs=0):
+    with StepTraceWriter(fileName, intervalToleranceUsecs) as writer:
+        for timeUsecs, axis, dirn in pinTraceSteps(pinTrace):
+            writer.step(axis, dirn, timeUsecs)
+    return writer.numRuns
+
+# Signed velocity (steps per second - positive with the direction pin high) of an axis sampled every
+# sampleUsecs - generates (sample start time, velocity, acceleration in steps per second per second)
+# Steps in each sample are counted from the runs without expanding them
+def velocityProfile(reader, axis, sampleUsecs=10000):
+    sampleStart = None
+    sampleSteps = 0.0
+    lastVelocity = None
+    for runAxis, dirn, count, firstUsecs, lastUsecs in reader.runs(axis):
+        sign = 1 if dirn else -1
+        if sampleStart is None:
+            sampleStart = firstUsecs
+        interval = (lastUsecs - firstUsecs) / (count - 1) if count > 1 else 0
+        stepIdx = 0
+        while stepIdx < count:
+            stepUsecs = firstUsecs + stepIdx * interval
+            if stepUsecs >= sampleStart + sampleUsecs:
+                velocity = sampleSteps * 1e6 / sampleUsecs
+                yield sampleStart, velocity, 0.0 if lastVelocity is None else (velocity - lastVelocity) * 1e6 / sampleUsecs
+                lastVelocity = velocity
+                sampleStart += sampleUsecs
+                sampleSteps = 0.0
+                continue
+            # Steps of the run which fall in this sample
+            if interval > 0:
+                inSample = min(count - stepIdx, int((sampleStart + sampleUsecs - stepUsecs - 1e-9) // interval) + 1)
+            else:
+                inSample = count - stepIdx
+            sampleSteps += sign * inSample
+            stepIdx += inSample
+    if sampleStart is not None:
+        velocity = sampleSteps * 1e6 / sampleUsecs
+        yield sampleStart, velocity, 0.0 if lastVelocity is None else (velocity - lastVelocity) * 1e6 / sampleUsecs
+
+# Per axis totals - steps, net steps, runs, direction reversals, first and last step times and the highest
+# step rate (steps per second, from the shortest time between consecutive steps)
+def summarise(reader):
+    summary = {}
+    lastRuns = {}
+    for axis, dirn, count, firstUsecs, lastUsecs in reader.runs():
+        axisSummary = summary.get(axis)
+        if axisSummary is None:
+            axisSummary = {"steps": 0, "netSteps": 0, "runs": 0, "reversals": 0, "firstUsecs": firstUsecs,
+                           "lastUsecs": lastUsecs, "minIntervalUsecs": None}
+            summary[axis] = axisSummary
+        axisSummary["steps"] += count
+        axisSummary["netSteps"] += count if dirn else -count
+        axisSummary["runs"] += 1
+        axisSummary["lastUsecs"] = lastUsecs
+        intervals = []
+        if count > 1:
+            intervals.append((lastUsecs - firstUsecs) / (count - 1))
+        lastRun = lastRuns.get(axis)
+        if lastRun is not None:
+            intervals.append(firstUsecs - lastRun[4])
+            if lastRun[1] != dirn:
+                axisSummary["reversals"] += 1
+        for interval in intervals:
+            if interval > 0 and (axisSummary["minIntervalUsecs"] is None or interval < axisSummary["minIntervalUsecs"]):
+                axisSummary["minIntervalUsecs"] = interval
+        lastRuns[axis] = (axis, dirn, count, firstUsecs, lastUsecs)
+    for axisSummary in summary.values():
+        minInterval = axisSummary.pop("minIntervalUsecs")
+        axisSummary["maxStepsPerSec"] = 1e6 / minInterval if minInterval is not None else 0
+    return summary
+
+# Times of the direction reversals of an axis - generates (time of the first step after reversing, new direction)
+def directionReversals(reader, axis):
+    lastDirn = None
+    for runAxis, dirn, count, firstUsecs, lastUsecs in reader.runs(axis):
+        if lastDirn is not None and dirn != lastDirn:
+            yield firstUsecs, dirn
+        lastDirn = dirn
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import HardwareLibrary
+
+    parser = argparse.ArgumentParser(description="Convert and analyse step traces")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    summaryParser = subparsers.add_parser("summary", help="per axis totals")
+    summaryParser.add_argument("traceFileName")
+    convertParser = subparsers.add_parser("convert", help="make a step trace from a HardwareLibrary pin trace")
+    convertParser.add_argument("pinTraceFileName")
+    convertParser.add_argument("traceFileName")
+    convertParser.add_argument("--tolerance-usecs", type=float, default=0, help="interval variation allowed in a run")
+    profileParser = subparsers.add_parser("profile", help="velocity and acceleration of an axis as CSV")
+    profileParser.add_argument("traceFileName")
+    profileParser.add_argument("--axis", choices=AXIS_NAMES, default="upper")
+    profileParser.add_argument("--sample-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    if args.action == "convert":
+        numRuns = writePinTraceSteps(HardwareLibrary.PinTrace.load(args.pinTraceFileName), args.traceFileName,
+                                     args.tolerance_usecs)
+        print("Wrote", numRuns, "runs to", args.traceFileName)
+    elif args.action == "summary":
+        for axis, axisSummary in sorted(summarise(StepTraceReader(args.traceFileName)).items()):
+            print("{0:<9s} steps {1:9d} net {2:+9d} runs {3:7d} reversals {4:6d} max rate {5:8.1f}/s time {6:.3f}s-{7:.3f}s".format(
+                AXIS_NAMES[axis], axisSummary["steps"], axisSummary["netSteps"], axisSummary["runs"],
+                axisSummary["reversals"], axisSummary["maxStepsPerSec"], axisSummary["firstUsecs"] / 1e6,
+                axisSummary["lastUsecs"] / 1e6))
+    else:
+        print("timeSecs,stepsPerSec,stepsPerSec2")
+        for sampleUsecs, velocity, acceleration in velocityProfile(StepTraceReader(args.traceFileName),
+                                                                   AXIS_NAMES.index(args.axis), args.sample_ms * 1000):
+            print("{0:.4f},{1:.1f},{2:.1f}".format(sampleUsecs / 1e6, velocity, acceleration))
+    sys.exit(0)
@@ -0,0 +1,93 @@
+# Tests the heap counters (M0, M1, M2) on CPython against the HardwareLibrary stub
+# Usage: python3 TestScaraMemProfiler.py
+import contextlib
+import os
+import sys
+
+import HardwareLibrary
+from ScaraOne import ScaraOne
+from RobotCommandInterpreter import RobotCommandInterpreter
+from PyBoardDisplay import PyBoardDisplay
+from ScaraMemProfiler import memProfiler, MemProfiler, MEM_MODE_OFF, MEM_MODE_RECORD, MAX_COMMAND_STATS, \
+    OTHER_COMMANDS_NAME
+
+
+# Command name to (count, totalBytes, maxBytes, gcs) from the {M ...} frame in a reply
+def memoryFrameCommands(replyStr):
+    frameStr = replyStr[replyStr.index("{M ") + 1:replyStr.index("}")]
+    commands = {}
+    for field in frameStr.split()[1:]:
+        parts = field.split(":")
+        if parts[0] not in ("mode", "free", "alloc", "low", "gc"):
+            commands[parts[0]] = tuple(int(part) for part in parts[1:])
+    return commands
+
+
+# Run command lines through the firmware's interpreter (with the stub's clock running in fast forward)
+def runCommands(cmdStrs):
+    HardwareLibrary.useClock(HardwareLibrary.VirtualClock(False))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        robot = ScaraOne(HardwareLibrary)
+        interpreter = RobotCommandInterpreter(robot, PyBoardDisplay(HardwareLibrary, False))
+        replies = []
+        try:
+            for cmdStr in cmdStrs:
+                replies.append("".join(interpreter.handleChar(ch) for ch in (cmdStr + "\n").encode("ascii")))
+        finally:
+            memProfiler.setMode(MEM_MODE_OFF)
+            memProfiler.reset()
+    return replies
+
+
+def test_resetCommandNotChargedForHeap():
+    replies = runCommands(["M2 1", "G0 0 150", "M1", "M0"])
+    commands = memoryFrameCommands(replies[-1])
+    assert list(commands) == ["M1"]
+    assert commands["M1"][0] == 1
+    assert commands["M1"][1] < 1024
+
+
+def test_countedByCommandCode():
+    replies = runCommands(["M2 1", "G0 0 150", "G0 50 150", "V0 1", "M0"])
+    commands = memoryFrameCommands(replies[-1])
+    assert commands["G0"][0] == 2
+    assert commands["V0"][0] == 1
+    assert commands["M2"][0] == 1
+
+
+def test_oddNamesCannotBreakFrame():
+    profiler = MemProfiler()
+    profiler.setMode(MEM_MODE_RECORD)
+    try:
+        for cmdStr in ["G0 1 2", "bad}:x", "X}", "G01", "", "  P1 "]:
+            profiler.commandStart()
+            profiler.commandEnd(cmdStr)
+    finally:
+        profiler.setMode(MEM_MODE_OFF)
+    frameStr = profiler.getFrameStr()
+    assert frameStr.count("{") == 1 and frameStr.count("}") == 1
+    commands = memoryFrameCommands(frameStr)
+    assert sorted(commands) == [OTHER_COMMANDS_NAME, "G0", "P1"]
+    assert commands[OTHER_COMMANDS_NAME][0] == 4
+
+
+def test_numberOfCommandsCapped():
+    profiler = MemProfiler()
+    profiler.setMode(MEM_MODE_RECORD)
+    try:
+        for cmdIdx in range(100):
+            profiler.commandStart()
+            profiler.commandEnd("%s%d" % (chr(ord("A") + cmdIdx // 10), cmdIdx % 10))
+    finally:
+        profiler.setMode(MEM_MODE_OFF)
+    commands = memoryFrameCommands(profiler.getFrameStr())
+    assert len(commands) <= MAX_COMMAND_STATS + 1
+    assert sum(stats[0] for stats in commands.values()) == 100
+
+
+if __name__ == "__main__":
+    for testName, testFn in list(globals().items()):
+        if testName.startswith("test_"):
+            testFn()
+            print(testName, "ok")
+    sys.exit(0)
@@ -0,0 +1,142 @@
+# Checks the path moves (G1 lines, G2/G3 arcs and B1 splines) on CPython against the HardwareLibrary stub
+# The pen position is worked out from every step the firmware makes so the whole path is checked, not just its end
+# Usage: python3 TestScaraPathMoves.py
+import contextlib
+import math
+import os
+import sys
+
+import HardwareLibrary
+from ScaraOne import ScaraOne
+from RobotCommandInterpreter import RobotCommandInterpreter
+from PyBoardDisplay import PyBoardDisplay
+
+
+# Step logger which keeps track of the pen position after each step (forward kinematics as in ScaraRobotManager)
+class PenTracker:
+
+    def __init__(self, robotManager):
+        self.robotManager = robotManager
+        self.upperSteps, self.lowerSteps, _ = robotManager.getStepPositions()
+        self.penPoints = []
+
+    def step(self, axis, dirn, timeUsecs):
+        # The motor on the lower arm is upside down so its direction pin is the other way round
+        if axis == 0:
+            self.upperSteps += 1 if dirn else -1
+        elif axis == 1:
+            self.lowerSteps += -1 if dirn else 1
+        else:
+            return
+        manager = self.robotManager
+        thetaUpper = self.upperSteps / manager.upperStepsPerDegree
+        thetaLower = self.lowerSteps / manager.lowerStepsPerDegree - thetaUpper * manager.shoulderGearMismatchFactor
+        self.penPoints.append(manager.calcPenPosition(thetaUpper, thetaLower))
+
+
+# Robot and interpreter running on the stub (with its clock in fast forward) - firmware output is discarded
+class StubRobot:
+
+    def __init__(self):
+        HardwareLibrary.useClock(HardwareLibrary.VirtualClock(False))
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            self.robot = ScaraOne(HardwareLibrary)
+            self.interpreter = RobotCommandInterpreter(self.robot, PyBoardDisplay(HardwareLibrary, False))
+        self.robotManager = self.robot.scaraRobotManager
+
+    # Result code and the pen positions passed through for a command
+    def run(self, cmdStr):
+        tracker = PenTracker(self.robotManager)
+        self.robot.setStepLogger(tracker)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            rslt = self.interpreter.interpCommand(cmdStr)
+        self.robot.setStepLogger(None)
+        return rslt, tracker.penPoints
+
+    def position(self):
+        return self.robotManager.getCurrentPosition()[:2]
+
+    # Allowed distance of the pen from the ideal path - the chord tolerance plus the furthest one step of
+    # either arm can move the pen
+    def allowedDeviationMM(self):
+        manager = self.robotManager
+        upperStepMM = (manager.upperArmLen + manager.lowerArmLen) * math.radians(1 / manager.upperStepsPerDegree)
+        lowerStepMM = manager.lowerArmLen * math.radians(1 / manager.lowerStepsPerDegree)
+        return manager.chordToleranceMM + max(upperStepMM, lowerStepMM)
+
+
+def distanceToSegment(point, startPt, endPt):
+    dx = endPt[0] - startPt[0]
+    dy = endPt[1] - startPt[1]
+    lenSq = dx * dx + dy * dy
+    t = 0 if lenSq == 0 else ((point[0] - startPt[0]) * dx + (point[1] - startPt[1]) * dy) / lenSq
+    t = max(0, min(1, t))
+    return math.hypot(startPt[0] + t * dx - point[0], startPt[1] + t * dy - point[1])
+
+
+def checkLine(stubRobot, endPt):
+    startPt = stubRobot.position()
+    rslt, penPoints = stubRobot.run("G1 {0:.2f} {1:.2f}".format(endPt[0], endPt[1]))
+    assert rslt == 0
+    assert len(penPoints) > 0
+    assert max(distanceToSegment(point, startPt, endPt) for point in penPoints) <= stubRobot.allowedDeviationMM()
+    assert math.hypot(stubRobot.position()[0] - endPt[0], stubRobot.position()[1] - endPt[1]) <= \
+        stubRobot.allowedDeviationMM()
+
+
+# Full circle from the point at startDeg
+def checkCircle(stubRobot, cmdName, cx, cy, radius, startDeg):
+    startPt = (cx + radius * math.cos(math.radians(startDeg)), cy + radius * math.sin(math.radians(startDeg)))
+    assert stubRobot.run("G0 {0:.2f} {1:.2f}".format(startPt[0], startPt[1]))[0] == 0
+    rslt, penPoints = stubRobot.run("{0} {1} {2} {3} {4} {4}".format(cmdName, cx, cy, radius, startDeg))
+    assert rslt == 0
+    assert max(abs(math.hypot(point[0] - cx, point[1] - cy) - radius) for point in penPoints) <= \
+        stubRobot.allowedDeviationMM()
+    # All the way round
+    angles = [math.degrees(math.atan2(point[1] - cy, point[0] - cx)) for point in penPoints]
+    assert max(angles) - min(angles) > 350
+
+
+def test_linesWithinTolerance():
+    stubRobot = StubRobot()
+    assert stubRobot.run("G0 0 150")[0] == 0
+    for endPt in [(100, 100), (-100, 100), (0, 200), (100, 150), (150, 60)]:
+        checkLine(stubRobot, endPt)
+
+
+def test_circlesWithinTolerance():
+    stubRobot = StubRobot()
+    checkCircle(stubRobot, "G3", 0, 120, 40, 90)
+    checkCircle(stubRobot, "G2", 0, 120, 40, -90)
+    checkCircle(stubRobot, "G2", 50, 150, 20, 0)
+
+
+def test_unreachableLineFails():
+    stubRobot = StubRobot()
+    # Both ends can be reached but the line between them passes too close to the shoulder
+    assert stubRobot.run("G0 -80 80")[0] == 0
+    startPt = stubRobot.position()
+    assert stubRobot.run("G1 80 80") == (-2, [])
+    # End out of reach
+    assert stubRobot.run("G1 150 150") == (-2, [])
+    # The arm doesn't set off along a path it can't finish
+    assert stubRobot.position() == startPt
+
+
+def test_splinePointCountChecked():
+    stubRobot = StubRobot()
+    assert stubRobot.run("G0 0 150")[0] == 0
+    assert stubRobot.run("B1 10 150 20")[0] == -1
+    assert stubRobot.run("B1")[0] == -1
+    maxPoints = stubRobot.interpreter.maxSplinePoints
+    points = ["{0} {1}".format(pointIdx * 5 - 40, 150 + (pointIdx % 2) * 5) for pointIdx in range(maxPoints + 1)]
+    assert stubRobot.run("B1 " + " ".join(points))[0] == -1
+    assert stubRobot.run("B1 " + " ".join(points[:maxPoints]))[0] == 0
+
+
+if __name__ == "__main__":
+    for testName, testFn in list(globals().items()):
+        if testName.startswith("test_"):
+            testFn()
+            print(testName, "ok")
+    sys.exit(0)
@@ -0,0 +1,522 @@
+# Streaming import of SVG paths and DXF polylines/arcs into the job pipeline
+# Drawings are read incrementally and points are generated lazily as (x, y, penDown) tuples - penDown is
+# False for the first point of each path (a move with the pen up) - so a multi-megabyte drawing is never
+# held in memory and the first command can go to the robot before the file has been fully parsed
+# Curves are flattened adaptively so the flattened path is within a tolerance of the curve - by default
+# the finest step resolution of the arm
+import asyncio
+import math
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+
+# SVG path data tokens - command letters and numbers
+SVG_PATH_TOKEN_RE = re.compile(r"[MmLlHhVvCcSsQqTtAaZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+SVG_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+SVG_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate)\s*\(([^)]*)\)")
+
+# Elements whose contents aren't drawn (they're only used by reference) - <use> isn't supported so their
+# contents are skipped
+SVG_NON_RENDERED_TAGS = ("defs", "clipPath", "symbol", "mask")
+
+# Limit on subdivision so a degenerate curve can't run away
+MAX_CURVE_SUBDIVISION_DEPTH = 16
+
+
+# Finest pen position resolution of the arm anywhere in the reachable workspace (mm)
+def armToleranceMM(robotConfiguration=None):
+    import numpy as np
+    from ScaraKinematics import ScaraKinematics
+    kinematics = ScaraKinematics(robotConfiguration)
+    reach = kinematics.upperArmLen + kinematics.lowerArmLen
+    gridX, gridY = np.meshgrid(np.linspace(-reach, reach, 81), np.linspace(-reach, reach, 81))
+    gridX = gridX.ravel() + kinematics.xOrigin
+    gridY = gridY.ravel() + kinematics.yOrigin
+    upperSteps, lowerSteps, valid = kinematics.jointSteps(gridX, gridY)
+    return float(np.min(kinematics.stepResolution(gridX[valid], gridY[valid])))
+
+
+# Points along a cubic Bezier (excluding the start point) - subdivided until each piece is flat to within tolerance
+def flattenCubic(p0, p1, p2, p3, tolerance):
+    stack = [(p0, p1, p2, p3, 0)]
+    while len(stack) > 0:
+        q0, q1, q2, q3, depth = stack.pop()
+        if depth >= MAX_CURVE_SUBDIVISION_DEPTH or (distanceFromLine(q1, q0, q3) <= tolerance and
+                                                    distanceFromLine(q2, q0, q3) <= tolerance):
+            yield q3
+            continue
+        # de Casteljau split at t = 0.5 - push the second half first so the first half comes out first
+        q01 = midPoint(q0, q1)
+        q12 = midPoint(q1, q2)
+        q23 = midPoint(q2, q3)
+        q012 = midPoint(q01, q12)
+        q123 = midPoint(q12, q23)
+        qMid = midPoint(q012, q123)
+        stack.append((qMid, q123, q23, q3, depth + 1))
+        stack.append((q0, q01, q012, qMid, depth + 1))
+
+
+def flattenQuadratic(p0, p1, p2, tolerance):
+    c1 = (p0[0] + 2 * (p1[0] - p0[0]) / 3, p0[1] + 2 * (p1[1] - p0[1]) / 3)
+    c2 = (p2[0] + 2 * (p1[0] - p2[0]) / 3, p2[1] + 2 * (p1[1] - p2[1]) / 3)
+    return flattenCubic(p0, c1, c2, p2, tolerance)
+
+
+# Points along a circular arc (excluding the start point) - angles in radians, sweep positive anticlockwise
+# The angle between points is chosen so the chord sagitta is within tolerance
+def flattenArc(centre, radius, startAngle, sweepAngle, tolerance):
+    if radius <= tolerance:
+        maxStepAngle = math.pi / 2
+    else:
+        maxStepAngle = 2 * math.acos(1 - tolerance / radius)
+    numSegments = max(1, int(math.ceil(abs(sweepAngle) / maxStepAngle)))
+    for segIdx in range(1, numSegments + 1):
+        angle = startAngle + sweepAngle * segIdx / numSegments
+        yield (centre[0] + radius * math.cos(angle), centre[1] + radius * math.sin(angle))
+
+
+# Points along an elliptical arc (excluding the start point) - xRotation in radians
+def flattenEllipseArc(centre, rx, ry, xRotation, startAngle, sweepAngle, tolerance):
+    cosRot = math.cos(xRotation)
+    sinRot = math.sin(xRotation)
+    for x, y in flattenArc((0, 0), max(rx, ry), startAngle, sweepAngle, tolerance):
+        ex = x * rx / max(rx, ry)
+        ey = y * ry / max(rx, ry)
+        yield (centre[0] + ex * cosRot - ey * sinRot, centre[1] + ex * sinRot + ey * cosRot)
+
+
+def midPoint(p, q):
+    return ((p[0] + q[0]) / 2, (p[1] + q[1]) / 2)
+
+
+def distanceFromLine(p, lineStart, lineEnd):
+    dx = lineEnd[0] - lineStart[0]
+    dy = lineEnd[1] - lineStart[1]
+    lineLen = math.hypot(dx, dy)
+    if lineLen == 0:
+        return math.hypot(p[0] - lineStart[0], p[1] - lineStart[1])
+    return abs(dx * (lineStart[1] - p[1]) - dy * (lineStart[0] - p[0])) / lineLen
+
+
+# Points along an SVG endpoint parameterised arc (excluding the start point) - see SVG spec appendix F.6.5
+def flattenSvgArc(p0, rx, ry, xRotationDeg, largeArc, sweep, p1, tolerance):
+    rx = abs(rx)
+    ry = abs(ry)
+    if rx == 0 or ry == 0 or p0 == p1:
+        yield p1
+        return
+    xRotation = math.radians(xRotationDeg)
+    cosRot = math.cos(xRotation)
+    sinRot = math.sin(xRotation)
+    dx2 = (p0[0] - p1[0]) / 2
+    dy2 = (p0[1] - p1[1]) / 2
+    x1p = cosRot * dx2 + sinRot * dy2
+    y1p = -sinRot * dx2 + cosRot * dy2
+    # Scale up radii which are too small to reach
+    radiiScale = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if radiiScale > 1:
+        rx *= math.sqrt(radiiScale)
+        ry *= math.sqrt(radiiScale)
+    numerator = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    denominator = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(0, numerator / denominator))
+    if largeArc == sweep:
+        coef = -coef
+    cxp = coef * rx * y1p / ry
+    cyp = -coef * ry * x1p / rx
+    centre = (cosRot * cxp - sinRot * cyp + (p0[0] + p1[0]) / 2, sinRot * cxp + cosRot * cyp + (p0[1] + p1[1]) / 2)
+    startAngle = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    endAngle = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+    sweepAngle = endAngle - startAngle
+    if sweep and sweepAngle < 0:
+        sweepAngle += 2 * math.pi
+    elif not sweep and sweepAngle > 0:
+        sweepAngle -= 2 * math.pi
+    for point in flattenEllipseArc(centre, rx, ry, xRotation, startAngle, sweepAngle, tolerance):
+        yield point
+
+
+# Multiply 2D affine transforms held as (a, b, c, d, e, f) as in SVG
+def multiplyTransforms(m1, m2):
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + c1 * b2, b1 * a2 + d1 * b2, a1 * c2 + c1 * d2, b1 * c2 + d1 * d2,
+            a1 * e2 + c1 * f2 + e1, b1 * e2 + d1 * f2 + f1)
+
+
+def parseSvgTransform(transformStr):
+    transform = (1, 0, 0, 1, 0, 0)
+    for match in SVG_TRANSFORM_RE.finditer(transformStr or ""):
+        args = [float(arg) for arg in SVG_NUMBER_RE.findall(match.group(2))]
+        name = match.group(1)
+        if name == "matrix" and len(args) == 6:
+            step = tuple(args)
+        elif name == "translate" and len(args) > 0:
+            step = (1, 0, 0, 1, args[0], args[1] if len(args) > 1 else 0)
+        elif name == "scale" and len(args) > 0:
+            step = (args[0], 0, 0, args[1] if len(args) > 1 else args[0], 0, 0)
+        elif name == "rotate" and len(args) > 0:
+            angle = math.radians(args[0])
+            step = (math.cos(angle), math.sin(angle), -math.sin(angle), math.cos(angle), 0, 0)
+            if len(args) == 3:
+                step = multiplyTransforms(multiplyTransforms((1, 0, 0, 1, args[1], args[2]), step),
+                                          (1, 0, 0, 1, -args[1], -args[2]))
+        else:
+            continue
+        transform = multiplyTransforms(transform, step)
+    return transform
+
+
+# Paths in an SVG path data string - yields (x, y, penDown) in path coordinates
+def svgPathPoints(pathData, tolerance):
+    tokens = SVG_PATH_TOKEN_RE.finditer(pathData)
+    cmd = None
+    curPt = (0.0, 0.0)
+    subpathStart = curPt
+    lastControl = None
+
+    # Next token - path data which stops part way through a command is an error
+    def nextTokenStr():
+        token = next(tokens, None)
+        if token is None:
+            raise ValueError("SVG path data ends part way through a command: " + pathData)
+        return token.group(0)
+
+    def nextNumber():
+        tokenStr = nextTokenStr()
+        if tokenStr.isalpha():
+            raise ValueError("SVG path data is missing a number before " + tokenStr + ": " + pathData)
+        return float(tokenStr)
+
+    while True:
+        token = next(tokens, None)
+        if token is None:
+            return
+        tokenStr = token.group(0)
+        if tokenStr.isalpha():
+            cmd = tokenStr
+            if cmd in "Zz":
+                if curPt != subpathStart:
+                    yield (subpathStart[0], subpathStart[1], True)
+                curPt = subpathStart
+                lastControl = None
+                continue
+            tokenStr = nextTokenStr()
+            if tokenStr.isalpha():
+                raise ValueError("SVG path data is missing a number before " + tokenStr + ": " + pathData)
+        elif cmd is None:
+            return
+        # tokenStr is the first number of the command's arguments (commands repeat while numbers follow)
+        firstNum = float(tokenStr)
+        relative = cmd.islower()
+        base = curPt if relative else (0.0, 0.0)
+        cmdUpper = cmd.upper()
+        controlPt = None
+        if cmdUpper == "M":
+            curPt = (base[0] + firstNum, base[1] + nextNumber())
+            subpathStart = curPt
+            yield (curPt[0], curPt[1], False)
+            # Further coordinate pairs are implicit lineto commands
+            cmd = "l" if relative else "L"
+        elif cmdUpper == "L":
+            curPt = (base[0] + firstNum, base[1] + nextNumber())
+            yield (curPt[0], curPt[1], True)
+        elif cmdUpper == "H":
+            curPt = (base[0] + firstNum, curPt[1])
+            yield (curPt[0], curPt[1], True)
+        elif cmdUpper == "V":
+            curPt = (curPt[0], (curPt[1] if relative else 0.0) + firstNum)
+            yield (curPt[0], curPt[1], True)
+        elif cmdUpper in "CS":
+            if cmdUpper == "C":
+                c1 = (base[0] + firstNum, base[1] + nextNumber())
+                c2 = (base[0] + nextNumber(), base[1] + nextNumber())
+            else:
+                c1 = curPt if lastControl is None else (2 * curPt[0] - lastControl[0], 2 * curPt[1] - lastControl[1])
+                c2 = (base[0] + firstNum, base[1] + nextNumber())
+            endPt = (base[0] + nextNumber(), base[1] + nextNumber())
+            for x, y in flattenCubic(curPt, c1, c2, endPt, tolerance):
+                yield (x, y, True)
+            curPt = endPt
+            controlPt = c2
+        elif cmdUpper in "QT":
+            if cmdUpper == "Q":
+                c1 = (base[0] + firstNum, base[1] + nextNumber())
+                endPt = (base[0] + nextNumber(), base[1] + nextNumber())
+            else:
+                c1 = curPt if lastControl is None else (2 * curPt[0] - lastControl[0], 2 * curPt[1] - lastControl[1])
+                endPt = (base[0] + firstNum, base[1] + nextNumber())
+            for x, y in flattenQuadratic(curPt, c1, endPt, tolerance):
+                yield (x, y, True)
+            curPt = endPt
+            controlPt = c1
+        elif cmdUpper == "A":
+            rx = firstNum
+            ry = nextNumber()
+            xRotation = nextNumber()
+            largeArc = nextNumber() != 0
+            sweep = nextNumber() != 0
+            endPt = (base[0] + nextNumber(), base[1] + nextNumber())
+            for x, y in flattenSvgArc(curPt, rx, ry, xRotation, largeArc, sweep, endPt, tolerance):
+                yield (x, y, True)
+            curPt = endPt
+        # Only consecutive curves of the same family reflect the previous control point
+        lastControl = controlPt
+
+
+# Points for a single SVG shape element in element coordinates
+def svgElementPoints(elem, tagName, tolerance):
+    def attrNum(name):
+        return float(SVG_NUMBER_RE.match(elem.get(name, "0")).group(0))
+
+    if tagName == "path":
+        try:
+            for point in svgPathPoints(elem.get("d", ""), tolerance):
+                yield point
+        except ValueError as excp:
+            raise ValueError("Path " + elem.get("id", "(no id)") + " - " + str(excp)) from excp
+    elif tagName in ("polyline", "polygon"):
+        coords = SVG_NUMBER_RE.finditer(elem.get("points", ""))
+        firstPt = None
+        for xMatch in coords:
+            yMatch = next(coords, None)
+            if yMatch is None:
+                break
+            point = (float(xMatch.group(0)), float(yMatch.group(0)))
+            yield (point[0], point[1], firstPt is not None)
+            if firstPt is None:
+                firstPt = point
+        if tagName == "polygon" and firstPt is not None:
+            yield (firstPt[0], firstPt[1], True)
+    elif tagName == "line":
+        yield (attrNum("x1"), attrNum("y1"), False)
+        yield (attrNum("x2"), attrNum("y2"), True)
+    elif tagName == "rect":
+        x, y, width, height = attrNum("x"), attrNum("y"), attrNum("width"), attrNum("height")
+        yield (x, y, False)
+        for point in ((x + width, y), (x + width, y + height), (x, y + height), (x, y)):
+            yield (point[0], point[1], True)
+    elif tagName in ("circle", "ellipse"):
+        cx, cy = attrNum("cx"), attrNum("cy")
+        rx = attrNum("r") if tagName == "circle" else attrNum("rx")
+        ry = attrNum("r") if tagName == "circle" else attrNum("ry")
+        yield (cx + rx, cy, False)
+        for x, y in flattenEllipseArc((cx, cy), rx, ry, 0, 0, 2 * math.pi, tolerance):
+            yield (x, y, True)
+
+
+# Stream points from an SVG file - scale is mm per SVG unit and the y axis is flipped (SVG y is down)
+# Element and group transforms are applied and the contents of defs, clipPath, symbol and mask are skipped
+def svgPoints(fileName, toleranceMM=None, scale=1.0, offset=(0.0, 0.0), flipY=True, robotConfiguration=None):
+    if toleranceMM is None:
+        toleranceMM = armToleranceMM(robotConfiguration)
+    ySign = -1 if flipY else 1
+    baseTransform = (scale, 0, 0, ySign * scale, offset[0], offset[1])
+    transformStack = [baseTransform]
+    elemStack = []
+    # Depth within elements which aren't drawn
+    skipDepth = 0
+    for event, elem in ElementTree.iterparse(fileName, events=("start", "end")):
+        tagName = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            elemStack.append(elem)
+            transformStack.append(multiplyTransforms(transformStack[-1], parseSvgTransform(elem.get("transform"))))
+            if skipDepth > 0 or tagName in SVG_NON_RENDERED_TAGS:
+                skipDepth += 1
+            continue
+        transform = transformStack.pop()
+        elemStack.pop()
+        if skipDepth > 0:
+            skipDepth -= 1
+            elem.clear()
+            if len(elemStack) > 0:
+                elemStack[-1].remove(elem)
+            continue
+        # Flatten in element coordinates with the tolerance scaled to match
+        transformScale = math.sqrt(abs(transform[0] * transform[3] - transform[1] * transform[2]))
+        elemTolerance = toleranceMM / transformScale if transformScale > 0 else toleranceMM
+        for x, y, penDown in svgElementPoints(elem, tagName, elemTolerance):
+            yield (transform[0] * x + transform[2] * y + transform[4],
+                   transform[1] * x + transform[3] * y + transform[5], penDown)
+        # Free the element so memory use doesn't grow with the file size
+        elem.clear()
+        if len(elemStack) > 0:
+            elemStack[-1].remove(elem)
+
+
+# Group code / value pairs from a DXF file
+def dxfGroups(dxfFile):
+    while True:
+        codeLine = dxfFile.readline()
+        valueLine = dxfFile.readline()
+        if not codeLine or not valueLine:
+            return
+        yield int(codeLine.strip()), valueLine.strip()
+
+
+# Points along a DXF polyline segment with a bulge (excluding the start point)
+def dxfBulgePoints(p0, p1, bulge, tolerance):
+    if bulge == 0:
+        yield p1
+        return
+    includedAngle = 4 * math.atan(bulge)
+    dx = p1[0] - p0[0]
+    dy = p1[1] - p0[1]
+    chordLen = math.hypot(dx, dy)
+    if chordLen == 0:
+        return
+    radius = abs(chordLen / (2 * math.sin(includedAngle / 2)))
+    # Centre is to the left of the chord for positive (anticlockwise) bulges
+    centreOffset = chordLen / 2 / math.tan(includedAngle / 2)
+    centre = ((p0[0] + p1[0]) / 2 - dy / chordLen * centreOffset, (p0[1] + p1[1]) / 2 + dx / chordLen * centreOffset)
+    startAngle = math.atan2(p0[1] - centre[1], p0[0] - centre[0])
+    for point in flattenArc(centre, radius, startAngle, includedAngle, tolerance):
+        yield point
+
+
+# Points for a polyline given as a list of vertices (x, y, bulge)
+def dxfPolylinePoints(vertices, closed, tolerance):
+    if len(vertices) == 0:
+        return
+    yield (vertices[0][0], vertices[0][1], False)
+    if closed:
+        vertices = vertices + [vertices[0]]
+    for vertIdx in range(1, len(vertices)):
+        prevVertex = vertices[vertIdx - 1]
+        for x, y in dxfBulgePoints(prevVertex[:2], vertices[vertIdx][:2], prevVertex[2], tolerance):
+            yield (x, y, True)
+
+
+# Points for a complete DXF entity - groups is the list of (code, value) pairs
+def dxfEntityPoints(entityType, groups, tolerance):
+    values = {}
+    for code, value in groups:
+        values.setdefault(code, value)
+    if entityType == "LINE":
+        yield (float(values.get(10, 0)), float(values.get(20, 0)), False)
+        yield (float(values.get(11, 0)), float(values.get(21, 0)), True)
+    elif entityType in ("ARC", "CIRCLE"):
+        centre = (float(values.get(10, 0)), float(values.get(20, 0)))
+        radius = float(values.get(40, 0))
+        startAngle = math.radians(float(values.get(50, 0))) if entityType == "ARC" else 0
+        endAngle = math.radians(float(values.get(51, 360))) if entityType == "ARC" else 2 * math.pi
+        sweepAngle = endAngle - startAngle
+        if sweepAngle <= 0:
+            sweepAngle += 2 * math.pi
+        yield (centre[0] + radius * math.cos(startAngle), centre[1] + radius * math.sin(startAngle), False)
+        for x, y in flattenArc(centre, radius, startAngle, sweepAngle, tolerance):
+            yield (x, y, True)
+    elif entityType == "LWPOLYLINE":
+        vertices = []
+        for code, value in groups:
+            if code == 10:
+                vertices.append([float(value), 0.0, 0.0])
+            elif code == 20 and len(vertices) > 0:
+                vertices[-1][1] = float(value)
+            elif code == 42 and len(vertices) > 0:
+                vertices[-1][2] = float(value)
+        for point in dxfPolylinePoints(vertices, int(values.get(70, 0)) & 1, tolerance):
+            yield point
+
+
+# Stream points from the ENTITIES section of an ASCII DXF file - LINE, ARC, CIRCLE, LWPOLYLINE and POLYLINE
+# scale is mm per drawing unit
+def dxfPoints(fileName, toleranceMM=None, scale=1.0, offset=(0.0, 0.0), robotConfiguration=None):
+    if toleranceMM is None:
+        toleranceMM = armToleranceMM(robotConfiguration)
+    tolerance = toleranceMM / scale
+    with open(fileName, "r") as dxfFile:
+        inEntities = False
+        entityType = None
+        entityGroups = []
+        polylineVertices = None
+        polylineClosed = False
+        for code, value in dxfGroups(dxfFile):
+            if code != 0:
+                if code == 2 and entityType == "SECTION":
+                    inEntities = (value == "ENTITIES")
+                entityGroups.append((code, value))
+                continue
+            # Start of a new entity so handle the one just finished
+            if inEntities and entityType is not None:
+                points = ()
+                if entityType == "POLYLINE":
+                    polylineVertices = []
+                    polylineClosed = any(groupCode == 70 and int(groupValue) & 1 for groupCode, groupValue in entityGroups)
+                elif entityType == "VERTEX" and polylineVertices is not None:
+                    vertexValues = dict(entityGroups)
+                    polylineVertices.append([float(vertexValues.get(10, 0)), float(vertexValues.get(20, 0)),
+                                             float(vertexValues.get(42, 0))])
+                elif entityType == "SEQEND" and polylineVertices is not None:
+                    points = dxfPolylinePoints(polylineVertices, polylineClosed, tolerance)
+                    polylineVertices = None
+                else:
+                    points = dxfEntityPoints(entityType, entityGroups, tolerance)
+                for x, y, penDown in points:
+                    yield (x * scale + offset[0], y * scale + offset[1], penDown)
+            if entityType == "ENDSEC":
+                inEntities = False
+            entityType = value
+            entityGroups = []
+
+
+# Points from an SVG or DXF file depending on the file extension
+def drawingPoints(fileName, **kwargs):
+    if fileName.lower().endswith(".dxf"):
+        return dxfPoints(fileName, **kwargs)
+    return svgPoints(fileName, **kwargs)
+
+
+# Send drawing points to the robot with a ScaraSerialClient - commands are queued as points are generated
+# so (with pipelineDepth > 1) parsing continues while the robot is moving
+# Points which wouldn't move either arm a whole step from the last point sent aren't sent (the firmware
+# would fail the G0 as it doesn't move)
+# Returns the number of commands which failed
+async def streamDrawing(client, points, robotConfiguration=None):
+    from ScaraKinematics import ScaraKinematics
+    from ScaraJobCompiler import pointsToSteps
+    kinematics = ScaraKinematics(robotConfiguration)
+    failedCmds = []
+    penIsDown = False
+    lastSteps = None
+
+    def checkResponse(future):
+        if future.cancelled() or future.exception() is not None or not future.result().ok():
+            failedCmds.append(future)
+
+    for x, y, penDown in points:
+        # Steps as they'll be after the point is rounded for sending
+        pointSteps, pointValid = pointsToSteps([[round(x, 2), round(y, 2)]], kinematics)
+        pointSteps = tuple(pointSteps[0][:2]) if pointValid[0] else None
+        if penDown != penIsDown:
+            (await client.queueCommand("P1" if penDown else "P0")).add_done_callback(checkResponse)
+            penIsDown = penDown
+        if pointSteps is not None and pointSteps == lastSteps:
+            continue
+        if pointSteps is not None:
+            lastSteps = pointSteps
+        (await client.queueCommand("G0 {0:.2f} {1:.2f}".format(x, y))).add_done_callback(checkResponse)
+    if penIsDown:
+        (await client.queueCommand("P0")).add_done_callback(checkResponse)
+    await client.drain()
+    return len(failedCmds)
+
+
+async def plotDrawing(serialPortName, fileName, scale, offset):
+    from ScaraSerialClient import ScaraSerialClient
+    client = ScaraSerialClient(pipelineDepth=4)
+    await client.open(serialPortName)
+    try:
+        numFailed = await streamDrawing(client, drawingPoints(fileName, scale=scale, offset=offset))
+        print("Drawing sent", numFailed, "commands failed")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: ScaraDrawingImport.py serialPort drawing.svg|drawing.dxf [scale [xOffset yOffset]]")
+        sys.exit(1)
+    drawingScale = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    drawingOffset = (float(sys.argv[4]), float(sys.argv[5])) if len(sys.argv) > 5 else (0.0, 0.0)
+    asyncio.run(plotDrawing(sys.argv[1], sys.argv[2], drawingScale, drawingOffset))
@@ -0,0 +1,152 @@
+# Drill order optimisation in joint-time space
+# The time for a hop between holes depends on how far each joint has to turn, not on the distance
+# between the holes - joint step positions are scaled by the time per step of each axis and then
+#   coordinated moves (S2) cost the larger of the two joint travel times (Chebyshev distance)
+#   sequential moves (G0 moves the upper arm then the lower arm) cost the sum (Manhattan distance)
+# The order is seeded with nearest neighbour and then improved with 2-opt and Or-opt moves
+# The start position is fixed (where the arm is when drilling starts) and the path doesn't return
+import time
+import numpy as np
+
+from ScaraKinematics import ScaraKinematics
+
+
+class DrillOrderOptimiser:
+
+    def __init__(self, points, robotConfiguration=None, startPoint=None, coordinated=True):
+        kinematics = ScaraKinematics(robotConfiguration)
+        points = np.asarray(points, dtype=np.float64)
+        upperSteps, lowerSteps, valid = kinematics.jointSteps(points[:, 0], points[:, 1])
+        if not np.all(valid):
+            raise ValueError("Hole " + str(np.flatnonzero(~valid)[0]) + " can't be reached")
+        stepPeriods = kinematics.stepPeriodsSecs()[:2]
+        self.holeCoords = np.stack((upperSteps, lowerSteps), axis=1) * stepPeriods
+        self.startCoords = np.zeros(2)
+        if startPoint is not None:
+            startUpper, startLower, startValid = kinematics.jointSteps([startPoint[0]], [startPoint[1]])
+            if not startValid[0]:
+                raise ValueError("Start point can't be reached")
+            self.startCoords = np.array([startUpper[0], startLower[0]]) * stepPeriods
+        self.coordinated = coordinated
+
+    # Travel time between p and each row of q (or corresponding rows of p and q)
+    def travelTime(self, p, q):
+        if self.coordinated:
+            return np.max(np.abs(p - q), axis=-1)
+        return np.sum(np.abs(p - q), axis=-1)
+
+    # Total travel time to visit the holes in the given order
+    def pathTime(self, order):
+        path = np.vstack((self.startCoords, self.holeCoords[order]))
+        return float(np.sum(self.travelTime(path[:-1], path[1:])))
+
+    def nearestNeighbourOrder(self):
+        numHoles = len(self.holeCoords)
+        order = np.empty(numHoles, dtype=np.int64)
+        visited = np.zeros(numHoles, dtype=bool)
+        curCoords = self.startCoords
+        for orderIdx in range(numHoles):
+            hopTimes = self.travelTime(curCoords, self.holeCoords)
+            hopTimes[visited] = np.inf
+            nextHole = int(np.argmin(hopTimes))
+            order[orderIdx] = nextHole
+            visited[nextHole] = True
+            curCoords = self.holeCoords[nextHole]
+        return order
+
+    # Reverse sections of the path while that reduces the total time
+    # For each position i every possible end j is evaluated at once
+    def twoOpt(self, order, deadline):
+        order = order.copy()
+        path = np.vstack((self.startCoords, self.holeCoords[order]))
+        numHoles = len(order)
+        anyImproved = False
+        improved = True
+        while improved and time.time() < deadline:
+            improved = False
+            hopTimes = self.travelTime(path[:-1], path[1:])
+            for i in range(1, numHoles):
+                # Reversing path[i..j] replaces hops (i-1, i) and (j, j+1) with (i-1, j) and (i, j+1)
+                newFirstHop = self.travelTime(path[i-1], path[i+1:])
+                newLastHop = np.zeros(numHoles - i)
+                newLastHop[:-1] = self.travelTime(path[i], path[i+2:])
+                oldLastHop = np.zeros(numHoles - i)
+                oldLastHop[:-1] = hopTimes[i+1:]
+                gains = newFirstHop + newLastHop - hopTimes[i-1] - oldLastHop
+                bestIdx = int(np.argmin(gains))
+                if gains[bestIdx] < -1e-12:
+                    j = i + 1 + bestIdx
+                    path[i:j+1] = path[i:j+1][::-1].copy()
+                    order[i-1:j] = order[i-1:j][::-1].copy()
+                    hopTimes = self.travelTime(path[:-1], path[1:])
+                    improved = True
+                    anyImproved = True
+                if i % 64 == 0 and time.time() > deadline:
+                    break
+        return order, anyImproved
+
+    # Move short runs of 1 to 3 holes (possibly reversed) to wherever in the path they cost least
+    def orOpt(self, order, deadline, maxSegmentLen=3):
+        order = order.copy()
+        numHoles = len(order)
+        anyImproved = False
+        path = np.vstack((self.startCoords, self.holeCoords[order]))
+        for segLen in range(1, maxSegmentLen + 1):
+            i = 1
+            while i + segLen - 1 <= numHoles:
+                if i % 64 == 0 and time.time() > deadline:
+                    break
+                segStart = path[i]
+                segEnd = path[i + segLen - 1]
+                # Time saved by taking the segment out
+                if i + segLen <= numHoles:
+                    removeGain = self.travelTime(path[i-1], segStart) + self.travelTime(segEnd, path[i+segLen]) - \
+                                 self.travelTime(path[i-1], path[i+segLen])
+                else:
+                    removeGain = self.travelTime(path[i-1], segStart)
+                # Time added by putting it back after each position in the remaining path (forwards or reversed)
+                restPath = np.vstack((path[:i], path[i+segLen:]))
+                restHops = self.travelTime(restPath[:-1], restPath[1:])
+                insertFwd = np.append(self.travelTime(restPath[:-1], segStart) +
+                                      self.travelTime(segEnd, restPath[1:]) - restHops,
+                                      self.travelTime(restPath[-1], segStart))
+                insertRev = np.append(self.travelTime(restPath[:-1], segEnd) +
+                                      self.travelTime(segStart, restPath[1:]) - restHops,
+                                      self.travelTime(restPath[-1], segEnd))
+                bestFwd = int(np.argmin(insertFwd))
+                bestRev = int(np.argmin(insertRev))
+                reverse = insertRev[bestRev] < insertFwd[bestFwd]
+                insertIdx = bestRev if reverse else bestFwd
+                insertCost = insertRev[bestRev] if reverse else insertFwd[bestFwd]
+                if insertCost < removeGain - 1e-12:
+                    segment = order[i-1:i-1+segLen]
+                    if reverse:
+                        segment = segment[::-1]
+                    restOrder = np.concatenate((order[:i-1], order[i-1+segLen:]))
+                    order = np.concatenate((restOrder[:insertIdx], segment, restOrder[insertIdx:]))
+                    path = np.vstack((self.startCoords, self.holeCoords[order]))
+                    anyImproved = True
+                i += 1
+        return order, anyImproved
+
+    # Find a good drilling order within the time limit - returns the order (indices into points)
+    def optimise(self, timeLimitSecs=10.0):
+        deadline = time.time() + timeLimitSecs
+        order = self.nearestNeighbourOrder()
+        if len(order) < 3:
+            return order
+        improved = True
+        while improved and time.time() < deadline:
+            order, twoOptImproved = self.twoOpt(order, deadline)
+            order, orOptImproved = self.orOpt(order, deadline)
+            improved = twoOptImproved or orOptImproved
+        return order
+
+
+# Reorder points to minimise the joint travel time between them
+def optimiseDrillOrder(points, robotConfiguration=None, startPoint=None, coordinated=True, timeLimitSecs=10.0):
+    optimiser = DrillOrderOptimiser(points, robotConfiguration, startPoint, coordinated)
+    order = optimiser.optimise(timeLimitSecs)
+    print("Drill order travel time {0:.1f}s (file order {1:.1f}s)".format(
+        optimiser.pathTime(order), optimiser.pathTime(np.arange(len(points)))))
+    return [points[idx] for idx in order]
@@ -0,0 +1,153 @@
+# Offline job compiler - turns a list of [x, y(, z)] points into a step program of relative
+# (upper, lower, vertical) steps which the robot plays back with S2 commands, so no on-board IK is needed
+# Compiled programs are cached on disk keyed by a hash of the points, robot configuration and start
+# position so re-running an unchanged job skips planning entirely
+import hashlib
+import json
+import os
+import struct
+import sys
+import numpy as np
+
+from ScaraKinematics import ScaraKinematics
+
+# Step program file format (little endian)
+#   magic "SCSP", uint16 version, uint16 numAxes, uint32 numMoves
+#   int32 startSteps[numAxes] - absolute step position the program starts from
+#   int32 steps[numMoves][numAxes] - relative steps for each move
+#   version 2 only - uint32 durationsUsecs[numMoves] - time each move should take (0 for as fast as possible)
+# Version 2 (timed) programs are made by ScaraTrajectoryPlanner and played back with S3 commands
+STEP_PROGRAM_MAGIC = b"SCSP"
+STEP_PROGRAM_VERSION = 1
+STEP_PROGRAM_TIMED_VERSION = 2
+STEP_PROGRAM_HEADER = struct.Struct("<4sHHI")
+
+# Change this when the compiler output changes so cached programs are rebuilt
+COMPILER_VERSION = 1
+
+defaultCacheDir = os.path.join(os.path.expanduser("~"), ".cache", "scara-step-programs")
+
+
+class StepProgram:
+
+    def __init__(self, steps, startSteps=(0, 0, 0), durationsUsecs=None):
+        self.steps = np.asarray(steps, dtype=np.int32).reshape(-1, len(startSteps))
+        self.startSteps = np.asarray(startSteps, dtype=np.int32)
+        self.durationsUsecs = None
+        if durationsUsecs is not None:
+            self.durationsUsecs = np.asarray(durationsUsecs, dtype=np.uint32).reshape(len(self.steps))
+
+    def __len__(self):
+        return len(self.steps)
+
+    # Absolute step position after each move
+    def absoluteSteps(self):
+        return self.startSteps + np.cumsum(self.steps, axis=0, dtype=np.int64)
+
+    # Commands to play the program back - S3 (which only moves the arms) for timed programs
+    def commands(self):
+        if self.durationsUsecs is None:
+            for moveSteps in self.steps:
+                yield "S2 " + " ".join(str(int(axisSteps)) for axisSteps in moveSteps)
+            return
+        if self.steps.shape[1] > 2 and np.any(self.steps[:, 2:] != 0):
+            raise ValueError("Timed step programs can't move the vertical axis")
+        for moveSteps, durationUsecs in zip(self.steps, self.durationsUsecs):
+            yield "S3 {0:d} {1:d} {2:d}".format(int(moveSteps[0]), int(moveSteps[1]), int(durationUsecs))
+
+    def save(self, fileName):
+        tmpFileName = fileName + ".tmp"
+        version = STEP_PROGRAM_VERSION if self.durationsUsecs is None else STEP_PROGRAM_TIMED_VERSION
+        with open(tmpFileName, "wb") as outFile:
+            outFile.write(STEP_PROGRAM_HEADER.pack(STEP_PROGRAM_MAGIC, version, len(self.startSteps), len(self.steps)))
+            outFile.write(self.startSteps.astype("<i4").tobytes())
+            outFile.write(self.steps.astype("<i4").tobytes())
+            if self.durationsUsecs is not None:
+                outFile.write(self.durationsUsecs.astype("<u4").tobytes())
+        os.replace(tmpFileName, fileName)
+
+    @staticmethod
+    def load(fileName):
+        with open(fileName, "rb") as inFile:
+            magic, version, numAxes, numMoves = STEP_PROGRAM_HEADER.unpack(inFile.read(STEP_PROGRAM_HEADER.size))
+            if magic != STEP_PROGRAM_MAGIC or version not in (STEP_PROGRAM_VERSION, STEP_PROGRAM_TIMED_VERSION):
+                raise ValueError("Not a step program file (or unsupported version): " + fileName)
+            startSteps = np.frombuffer(inFile.read(4 * numAxes), dtype="<i4")
+            steps = np.frombuffer(inFile.read(4 * numAxes * numMoves), dtype="<i4")
+            durationsUsecs = None
+            if version == STEP_PROGRAM_TIMED_VERSION:
+                durationsUsecs = np.frombuffer(inFile.read(4 * numMoves), dtype="<u4")
+        if len(steps) != numAxes * numMoves or (durationsUsecs is not None and len(durationsUsecs) != numMoves):
+            raise ValueError("Step program file is truncated: " + fileName)
+        return StepProgram(steps, startSteps, durationsUsecs)
+
+
+# Hash of everything the compiled output depends on
+def jobHash(points, robotConfiguration, startPoint):
+    hasher = hashlib.sha256()
+    hasher.update(struct.pack("<I", COMPILER_VERSION))
+    hasher.update(np.ascontiguousarray(points, dtype="<f8").tobytes())
+    hasher.update(json.dumps(robotConfiguration, sort_keys=True).encode("utf-8"))
+    hasher.update(json.dumps(startPoint).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+# Convert points to absolute step positions - returns an (N, 3) array and the mask of valid points
+def pointsToSteps(points, kinematics):
+    points = np.asarray(points, dtype=np.float64)
+    upperSteps, lowerSteps, valid = kinematics.jointSteps(points[:, 0], points[:, 1])
+    if points.shape[1] > 2:
+        verticalSteps = kinematics.verticalSteps(points[:, 2])
+    else:
+        verticalSteps = np.zeros(len(points), dtype=np.int64)
+    return np.stack((upperSteps, lowerSteps, verticalSteps), axis=1), valid
+
+
+# Compile a job - points is a sequence of [x, y] or [x, y, z]
+# startPoint is the [x, y(, z)] position the arm is at when the program starts (None for home)
+# Points which can't be reached are left out (as the firmware would skip them)
+def compileJob(points, robotConfiguration=None, startPoint=None, cacheDir=defaultCacheDir):
+    kinematics = ScaraKinematics(robotConfiguration)
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] < 2:
+        raise ValueError("Points must be a list of [x, y] or [x, y, z]")
+
+    # Check the cache
+    cacheFileName = None
+    if cacheDir is not None:
+        cacheFileName = os.path.join(cacheDir, jobHash(points, kinematics.robotConfiguration, startPoint) + ".scsp")
+        if os.path.exists(cacheFileName):
+            return StepProgram.load(cacheFileName)
+
+    # Step position to start from
+    startSteps = np.zeros(3, dtype=np.int64)
+    if startPoint is not None:
+        startAbsSteps, startValid = pointsToSteps([startPoint], kinematics)
+        if not startValid[0]:
+            raise ValueError("Start point can't be reached")
+        startSteps = startAbsSteps[0]
+
+    # Absolute steps for every point then the relative moves between them
+    absSteps, valid = pointsToSteps(points, kinematics)
+    if not np.all(valid):
+        print("Skipping", np.count_nonzero(~valid), "unreachable points, first is", np.flatnonzero(~valid)[0])
+    absSteps = absSteps[valid]
+    relSteps = np.diff(absSteps, axis=0, prepend=startSteps[np.newaxis, :])
+    stepProgram = StepProgram(relSteps, startSteps)
+
+    if cacheFileName is not None:
+        os.makedirs(cacheDir, exist_ok=True)
+        stepProgram.save(cacheFileName)
+    return stepProgram
+
+
+# Compile a JSON file containing a list of points to a step program file
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: ScaraJobCompiler.py points.json output.scsp")
+        sys.exit(1)
+    with open(sys.argv[1]) as pointsFile:
+        jobPoints = json.load(pointsFile)
+    compiledProgram = compileJob(jobPoints)
+    compiledProgram.save(sys.argv[2])
+    print("Compiled", len(jobPoints), "points to", len(compiledProgram), "moves")
@@ -0,0 +1,202 @@
+# Job duration estimator - predicts how long a job will take from the step counts of each move, the step
+# pulse timing and the serial link speed, without running it
+# Each move is either
+#   motion bound - the arm is still stepping when the next command could have been sent and acknowledged
+#   link bound - the serial link (sending the command, the echo and the reply) takes longer than the motion
+# Firmware modes which can be compared
+#   G0 - moveTo steps the upper arm and then the lower arm (sequential) and V0 moves the vertical axis
+#   S2 - moveSteps steps all axes together (coordinated) from a compiled step program
+#   S3 - as S2 but each move takes (at least) the time given by a timed step program from ScaraTrajectoryPlanner
+# each either stop-and-wait (one command at a time) or pipelined (the host keeps the firmware's command
+# queue topped up so commands are received while the previous move is stepping)
+import json
+import sys
+import numpy as np
+
+from ScaraKinematics import ScaraKinematics
+from ScaraJobCompiler import StepProgram, compileJob, pointsToSteps
+
+# Characters in the reply "[CMD<cmd>]<0>\r\n" in addition to the command itself - "[CMD", "]", "<0>" and
+# "\r\n" (a failed command's negative result is one more)
+REPLY_OVERHEAD_CHARS = 10
+
+
+class JobEstimate:
+
+    def __init__(self, name, commands, motionSecs, sendSecs, echoSecs, replySecs, processingSecs,
+                 hostTurnaroundSecs, pipelined):
+        self.name = name
+        self.commands = commands
+        self.motionSecs = motionSecs
+        self.pipelined = pipelined
+        if pipelined:
+            # The next command is received while this one executes so only the slowest of the robot and the
+            # two directions of the link counts - plus filling and draining the pipeline at each end
+            self.linkSecs = np.maximum(sendSecs, echoSecs + replySecs)
+            self.robotSecs = processingSecs + motionSecs
+            self.moveSecs = np.maximum(self.robotSecs, self.linkSecs)
+            fillDrainSecs = hostTurnaroundSecs + sendSecs[0] + replySecs[-1] if len(commands) > 0 else 0
+        else:
+            # Send the command (the echo comes back at the same time), execute it, get the reply, then the
+            # host sends the next one
+            self.linkSecs = hostTurnaroundSecs + sendSecs + replySecs
+            self.robotSecs = processingSecs + motionSecs
+            self.moveSecs = self.robotSecs + self.linkSecs
+            fillDrainSecs = 0
+        self.linkBound = self.linkSecs > self.robotSecs
+        self.totalSecs = float(np.sum(self.moveSecs)) + fillDrainSecs
+
+    def __len__(self):
+        return len(self.commands)
+
+    def summary(self):
+        linkBoundSecs = float(np.sum(self.moveSecs[self.linkBound]))
+        return "{0:<22s} {1:9.1f}s  motion {2:8.1f}s  link {3:7.1f}s  link bound {4:5d}/{5:<5d} ({6:4.1f}% of time)".format(
+            self.name, self.totalSecs, float(np.sum(self.motionSecs)), float(np.sum(self.linkSecs)),
+            int(np.count_nonzero(self.linkBound)), len(self.commands),
+            100 * linkBoundSecs / max(self.totalSecs, 1e-9))
+
+
+class JobEstimator:
+
+    def __init__(self, robotConfiguration=None):
+        self.kinematics = ScaraKinematics(robotConfiguration)
+        config = self.kinematics.robotConfiguration
+        self.stepPeriodsSecs = self.kinematics.stepPeriodsSecs()
+        self.accelStepsPerSec2 = np.asarray(config["stepTiming"]["accelStepsPerSec2"], dtype=np.float64)
+        self.charSecs = 10.0 / config["link"]["baudRate"]
+        self.commandProcessingSecs = config["link"]["commandProcessingUsecs"] / 1e6
+        self.hostTurnaroundSecs = config["link"]["hostTurnaroundUsecs"] / 1e6
+
+    # Time for each axis to make the given numbers of steps on its own - steps is (..., 3)
+    # With acceleration each axis follows a trapezoidal (or triangular for short moves) speed profile
+    def axisTimes(self, steps):
+        absSteps = np.abs(np.asarray(steps, dtype=np.float64))
+        axisSecs = absSteps * self.stepPeriodsSecs
+        for axisIdx in np.flatnonzero(self.accelStepsPerSec2 > 0):
+            accel = self.accelStepsPerSec2[axisIdx]
+            maxRate = 1 / self.stepPeriodsSecs[axisIdx]
+            axisSteps = absSteps[..., axisIdx]
+            # Steps spent accelerating and decelerating combined
+            rampSteps = maxRate * maxRate / accel
+            axisSecs[..., axisIdx] = np.where(axisSteps >= rampSteps, axisSteps / maxRate + maxRate / accel,
+                                            2 * np.sqrt(axisSteps / accel))
+        return axisSecs
+
+    # G0 then V0 - each axis moves in turn
+    def sequentialMotionTimes(self, steps):
+        return np.sum(self.axisTimes(steps), axis=-1)
+
+    # S2 - every Bresenham iteration steps the axis with the most steps and waits for the slowest axis
+    # stepping on that iteration - minor axis steps are spread evenly so the slower axes are assumed to
+    # overlap in proportion to how often they step (exact when the stepping axes have the same period)
+    def coordinatedMotionTimes(self, steps):
+        absSteps = np.abs(np.asarray(steps, dtype=np.float64))
+        majorSteps = np.max(absSteps, axis=-1)
+        majorSafe = np.where(majorSteps > 0, majorSteps, 1)
+        pulseWidthSecs = self.kinematics.pulseWidthUsecs / 1e6
+        betweenSecs = self.stepPeriodsSecs - pulseWidthSecs
+        motionSecs = majorSteps * pulseWidthSecs
+        # Iterations not yet accounted for by a slower axis
+        remainingFraction = np.ones(majorSteps.shape)
+        for axisIdx in np.argsort(-betweenSecs, kind="stable"):
+            stepFraction = absSteps[..., axisIdx] / majorSafe
+            motionSecs += majorSteps * stepFraction * remainingFraction * betweenSecs[axisIdx]
+            remainingFraction *= 1 - stepFraction
+        # Acceleration slows the whole move down by as much as it slows the limiting axis
+        if np.any(self.accelStepsPerSec2 > 0):
+            axisSecs = self.axisTimes(steps)
+            motionSecs += np.max(axisSecs - absSteps * self.stepPeriodsSecs, axis=-1)
+        return motionSecs
+
+    # Time for the command to reach the firmware and for the echo and the reply to come back
+    def linkTimes(self, commands):
+        cmdLens = np.array([len(cmdStr) for cmdStr in commands], dtype=np.float64)
+        sendSecs = (cmdLens + 1) * self.charSecs
+        echoSecs = cmdLens * self.charSecs
+        replySecs = (cmdLens + REPLY_OVERHEAD_CHARS) * self.charSecs
+        return sendSecs, echoSecs, replySecs
+
+    def estimate(self, name, commands, steps, coordinated, pipelined, durationsUsecs=None):
+        steps = np.asarray(steps, dtype=np.int64).reshape(-1, 3)
+        if coordinated:
+            motionSecs = self.coordinatedMotionTimes(steps)
+        else:
+            motionSecs = self.sequentialMotionTimes(steps)
+        # Timed moves are slowed down to their durations
+        if durationsUsecs is not None:
+            motionSecs = np.maximum(motionSecs, np.asarray(durationsUsecs, dtype=np.float64) / 1e6)
+        sendSecs, echoSecs, replySecs = self.linkTimes(commands)
+        return JobEstimate(name, commands, motionSecs, sendSecs, echoSecs, replySecs, self.commandProcessingSecs,
+                           self.hostTurnaroundSecs, pipelined)
+
+    # Points sent as G0 (plus V0 where z changes) commands - points which can't be reached still cost a
+    # command but don't move the arm
+    def estimatePoints(self, points, startPoint=None, pipelined=False):
+        points = np.asarray(points, dtype=np.float64)
+        absSteps, valid = pointsToSteps(points, self.kinematics)
+        startSteps = np.zeros(3, dtype=np.int64)
+        if startPoint is not None:
+            startSteps = pointsToSteps([startPoint], self.kinematics)[0][0]
+        # The arm stays where it is for unreachable points
+        validIdxs = np.maximum.accumulate(np.where(valid, np.arange(len(points)), -1))
+        heldSteps = np.vstack((startSteps, absSteps))[validIdxs + 1]
+        heldSteps[:, 2] = absSteps[:, 2]
+        relSteps = np.diff(heldSteps, axis=0, prepend=startSteps[np.newaxis, :])
+
+        # G0 moves the arms and V0 the vertical axis
+        numPoints = len(points)
+        moveSteps = np.zeros((2 * numPoints, 3), dtype=np.int64)
+        moveSteps[0::2, :2] = relSteps[:, :2]
+        moveSteps[1::2, 2] = relSteps[:, 2]
+        isMove = np.ones(2 * numPoints, dtype=bool)
+        isMove[1::2] = relSteps[:, 2] != 0
+        commands = []
+        for pointIdx, point in enumerate(points):
+            commands.append("G0 {0:.2f} {1:.2f}".format(point[0], point[1]))
+            if isMove[2 * pointIdx + 1]:
+                commands.append("V0 {0:.2f}".format(point[2]))
+        name = "G0 " + ("pipelined" if pipelined else "stop-and-wait")
+        return self.estimate(name, commands, moveSteps[isMove], False, pipelined)
+
+    # A compiled step program sent as S2 commands (or S3 if it's timed)
+    def estimateStepProgram(self, stepProgram, pipelined=False):
+        name = ("S2 " if stepProgram.durationsUsecs is None else "S3 ") + ("pipelined" if pipelined else "stop-and-wait")
+        return self.estimate(name, list(stepProgram.commands()), stepProgram.steps, True, pipelined,
+                             stepProgram.durationsUsecs)
+
+    # Estimate the job in each firmware mode
+    def compareModes(self, points, startPoint=None):
+        stepProgram = compileJob(points, self.kinematics.robotConfiguration, startPoint, cacheDir=None)
+        return [self.estimatePoints(points, startPoint, False),
+                self.estimatePoints(points, startPoint, True),
+                self.estimateStepProgram(stepProgram, False),
+                self.estimateStepProgram(stepProgram, True)]
+
+
+def printReport(estimates):
+    for jobEstimate in estimates:
+        print(jobEstimate.summary())
+    fastest = min(estimates, key=lambda est: est.totalSecs)
+    print("Fastest is", fastest.name)
+    linkBoundFraction = np.count_nonzero(fastest.linkBound) / max(len(fastest), 1)
+    if linkBoundFraction > 0.5:
+        print("Mostly link bound - shorter commands, fewer moves (simplification) or a faster baud rate would help")
+    else:
+        print("Mostly motion bound - step timing, acceleration or a better point order / placement would help")
+
+
+# Estimate a JSON file containing a list of points or a compiled step program file
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: ScaraJobEstimator.py points.json|program.scsp")
+        sys.exit(1)
+    jobEstimator = JobEstimator()
+    if sys.argv[1].endswith(".scsp"):
+        jobProgram = StepProgram.load(sys.argv[1])
+        printReport([jobEstimator.estimateStepProgram(jobProgram, False),
+                     jobEstimator.estimateStepProgram(jobProgram, True)])
+    else:
+        with open(sys.argv[1]) as pointsFile:
+            jobPoints = json.load(pointsFile)
+        printReport(jobEstimator.compareModes(jobPoints))
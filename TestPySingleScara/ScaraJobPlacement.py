@@ -0,0 +1,140 @@
+# Job placement optimiser - finds where in the workspace to put a workpiece
+# Where a job sits relative to the shoulder changes how far the joints have to turn between points and how
+# finely the pen can be positioned (the step resolution varies with the radius and elbow angle), so a grid
+# of translations and rotations of the job is searched and each placement scored by
+#   estimated motion time (from the step counts and step timing, see ScaraJobEstimator)
+#   worst case positional quantisation error (see ScaraKinematics.stepResolution)
+# Placements with any point outside the reach of the arm or beyond armMaxAngle are rejected
+# All candidates in a chunk are evaluated at once as (candidates x points) arrays
+import json
+import sys
+import numpy as np
+
+from ScaraKinematics import ScaraKinematics
+from ScaraJobEstimator import JobEstimator
+
+
+class JobPlacement:
+
+    def __init__(self, offset, rotationDeg, timeSecs, worstErrorMM, score):
+        self.offset = offset
+        self.rotationDeg = rotationDeg
+        self.timeSecs = timeSecs
+        self.worstErrorMM = worstErrorMM
+        self.score = score
+
+    def __str__(self):
+        return "offset ({0:.1f}, {1:.1f}) rotation {2:.1f}deg time {3:.1f}s worst error {4:.3f}mm".format(
+            self.offset[0], self.offset[1], self.rotationDeg, self.timeSecs, self.worstErrorMM)
+
+
+class JobPlacementOptimiser:
+
+    # points are the job's [x, y] points - placements rotate them about their centre and then move the
+    # centre to the offset
+    def __init__(self, points, robotConfiguration=None, startPoint=None, coordinated=True):
+        self.kinematics = ScaraKinematics(robotConfiguration)
+        self.estimator = JobEstimator(self.kinematics.robotConfiguration)
+        points = np.asarray(points, dtype=np.float64)[:, :2]
+        self.centre = (np.min(points, axis=0) + np.max(points, axis=0)) / 2
+        self.jobPoints = points - self.centre
+        self.startSteps = np.zeros(2, dtype=np.int64)
+        if startPoint is not None:
+            startUpper, startLower, startValid = self.kinematics.jointSteps([startPoint[0]], [startPoint[1]])
+            if not startValid[0]:
+                raise ValueError("Start point can't be reached")
+            self.startSteps = np.array([startUpper[0], startLower[0]])
+        self.coordinated = coordinated
+
+    # Job points for each placement - offsets is (K, 2) and rotations (K,) in degrees - returns (K, N, 2)
+    def placePoints(self, offsets, rotationsDeg):
+        rotations = np.radians(np.asarray(rotationsDeg, dtype=np.float64))[:, np.newaxis]
+        cosRot = np.cos(rotations)
+        sinRot = np.sin(rotations)
+        px = self.jobPoints[:, 0]
+        py = self.jobPoints[:, 1]
+        x = px * cosRot - py * sinRot + offsets[:, 0:1]
+        y = px * sinRot + py * cosRot + offsets[:, 1:2]
+        return np.stack((x, y), axis=-1)
+
+    # Motion time, worst quantisation error and validity for each placement
+    def evaluate(self, offsets, rotationsDeg):
+        placed = self.placePoints(offsets, rotationsDeg)
+        upperSteps, lowerSteps, valid = self.kinematics.jointSteps(placed[..., 0], placed[..., 1])
+        placementValid = np.all(valid, axis=1)
+        absSteps = np.zeros(upperSteps.shape + (3,), dtype=np.int64)
+        absSteps[..., 0] = upperSteps
+        absSteps[..., 1] = lowerSteps
+        startSteps = np.zeros(3, dtype=np.int64)
+        startSteps[:2] = self.startSteps
+        relSteps = np.diff(absSteps, axis=1, prepend=np.broadcast_to(startSteps, (len(absSteps), 1, 3)))
+        if self.coordinated:
+            moveSecs = self.estimator.coordinatedMotionTimes(relSteps)
+        else:
+            moveSecs = self.estimator.sequentialMotionTimes(relSteps)
+        timeSecs = np.sum(moveSecs, axis=1)
+        worstErrorMM = np.max(self.kinematics.stepResolution(placed[..., 0], placed[..., 1]), axis=1)
+        return timeSecs, worstErrorMM, placementValid
+
+    # Search a grid of placements over the bounding box of the arm's reach
+    # Placements are ranked by time + errorWeightSecsPerMM * worst error - returns the best numBest
+    def search(self, gridStepMM=5.0, rotationStepDeg=15.0, errorWeightSecsPerMM=10.0, numBest=10,
+               maxChunkElements=2000000):
+        reach = self.kinematics.upperArmLen + self.kinematics.lowerArmLen
+        xs = np.arange(self.kinematics.xOrigin - reach, self.kinematics.xOrigin + reach + gridStepMM / 2, gridStepMM)
+        ys = np.arange(self.kinematics.yOrigin - self.kinematics.lowerArmLen,
+                       self.kinematics.yOrigin + reach + gridStepMM / 2, gridStepMM)
+        rotations = np.arange(0, 360, rotationStepDeg)
+        gridX, gridY, gridRot = np.meshgrid(xs, ys, rotations, indexing="ij")
+        offsets = np.stack((gridX.ravel(), gridY.ravel()), axis=1)
+        rotations = gridRot.ravel()
+
+        # A placement can only be reachable if the job's bounding circle fits in the annulus the pen can reach
+        jobRadius = float(np.max(np.hypot(self.jobPoints[:, 0], self.jobPoints[:, 1])))
+        centreDist = np.hypot(offsets[:, 0] - self.kinematics.xOrigin, offsets[:, 1] - self.kinematics.yOrigin)
+        innerRadius = abs(self.kinematics.upperArmLen - self.kinematics.lowerArmLen)
+        possible = (centreDist + jobRadius <= reach) & (centreDist - jobRadius >= innerRadius)
+        offsets = offsets[possible]
+        rotations = rotations[possible]
+
+        timeSecs = np.full(len(offsets), np.inf)
+        worstErrorMM = np.full(len(offsets), np.inf)
+        chunkSize = max(1, maxChunkElements // max(len(self.jobPoints), 1))
+        for chunkStart in range(0, len(offsets), chunkSize):
+            chunk = slice(chunkStart, chunkStart + chunkSize)
+            chunkTimes, chunkErrors, chunkValid = self.evaluate(offsets[chunk], rotations[chunk])
+            timeSecs[chunk] = np.where(chunkValid, chunkTimes, np.inf)
+            worstErrorMM[chunk] = np.where(chunkValid, chunkErrors, np.inf)
+
+        scores = timeSecs + errorWeightSecsPerMM * worstErrorMM
+        bestIdxs = np.argsort(scores, kind="stable")[:numBest]
+        return [JobPlacement(offsets[idx], rotations[idx], timeSecs[idx], worstErrorMM[idx], scores[idx])
+                for idx in bestIdxs if np.isfinite(scores[idx])]
+
+    # The job's points moved to a placement
+    def placedJob(self, placement):
+        return self.placePoints(placement.offset[np.newaxis, :], [placement.rotationDeg])[0].tolist()
+
+
+# Find the best placement for a job and return its points in that placement
+def optimisePlacement(points, robotConfiguration=None, startPoint=None, coordinated=True, **searchArgs):
+    optimiser = JobPlacementOptimiser(points, robotConfiguration, startPoint, coordinated)
+    placements = optimiser.search(**searchArgs)
+    if len(placements) == 0:
+        raise ValueError("The job doesn't fit anywhere in the workspace")
+    for placement in placements:
+        print(placement)
+    return optimiser.placedJob(placements[0])
+
+
+# Find placements for a JSON file containing a list of points
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: ScaraJobPlacement.py points.json [placed.json]")
+        sys.exit(1)
+    with open(sys.argv[1]) as pointsFile:
+        jobPoints = json.load(pointsFile)
+    placedPoints = optimisePlacement(jobPoints)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w") as placedFile:
+            json.dump(placedPoints, placedFile)
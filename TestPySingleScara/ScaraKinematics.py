@@ -0,0 +1,179 @@
+# Vectorized (NumPy) kinematics for the single arm SCARA robot used by the host side tools
+# The inverse kinematics, elbow branch selection and step rounding match ScaraRobotManager.moveTo in
+# SerialControl so the steps calculated here are the steps the firmware would take
+import copy
+import numpy as np
+
+# Robot configuration - the same structure and values as ScaraOne.robotConfiguration
+defaultRobotConfiguration = {
+    "origin": [0, 0],
+    "upperArm": {
+        "armLen": 100,
+        "stepsPerDegree": 1/((1.8/16)*(20/62)),
+        "armMaxAngle": 90
+        },
+    "lowerArm": {
+        "armLen": 100,
+        "stepsPerDegree": 1/((1.8/16)*(20/60)),
+        "armMaxAngle": 160
+        },
+    "vertical": {
+        "stepsPerMM": 400,
+        "verticalTravelMax": 100,
+    },
+    "shoulderGearMismatchFactor": 0,
+    "defaultMotorOnTimeMillis": 1000,
+    # Step pulse timing for the upper, lower and vertical axes - ScaraOne.pulseWidthUsecs and betweenPulsesUsecs
+    "stepTiming": {
+        "pulseWidthUsecs": 10,
+        "betweenPulsesUsecs": [3000, 3000, 750],
+        # Acceleration of each axis in steps/sec^2 - 0 means the axis starts and stops at full speed
+        # (the current firmware doesn't ramp)
+        "accelStepsPerSec2": [0, 0, 0]
+    },
+    # Serial link to the host - baud rate, time the firmware takes to parse a command and do the
+    # kinematics, and the host's turnaround between receiving a reply and sending the next command
+    "link": {
+        "baudRate": 115200,
+        "commandProcessingUsecs": 1500,
+        "hostTurnaroundUsecs": 1000
+    }
+}
+
+
+# Merge a (possibly partial) robot configuration over the defaults in the same way as ScaraOne does
+def mergeRobotConfig(robotConfig=None):
+    mergedConfig = copy.deepcopy(defaultRobotConfiguration)
+    if robotConfig is None:
+        return mergedConfig
+    for key in robotConfig.keys():
+        if key in mergedConfig and type(mergedConfig[key]) is dict:
+            mergedConfig[key].update(robotConfig[key])
+        else:
+            mergedConfig[key] = copy.deepcopy(robotConfig[key])
+    return mergedConfig
+
+
+class ScaraKinematics:
+
+    def __init__(self, robotConfiguration=None):
+        self.robotConfiguration = mergeRobotConfig(robotConfiguration)
+        config = self.robotConfiguration
+        self.xOrigin = config["origin"][0]
+        self.yOrigin = config["origin"][1]
+        self.upperArmLen = config["upperArm"]["armLen"]
+        self.lowerArmLen = config["lowerArm"]["armLen"]
+        self.upperStepsPerDegree = config["upperArm"]["stepsPerDegree"]
+        self.lowerStepsPerDegree = config["lowerArm"]["stepsPerDegree"]
+        self.upperArmMaxAngle = config["upperArm"]["armMaxAngle"]
+        self.lowerArmMaxAngle = config["lowerArm"]["armMaxAngle"]
+        self.shoulderGearMismatchFactor = config["shoulderGearMismatchFactor"]
+        self.verticalStepsPerMM = config["vertical"]["stepsPerMM"]
+        self.verticalTravelMax = config["vertical"]["verticalTravelMax"]
+        self.pulseWidthUsecs = config["stepTiming"]["pulseWidthUsecs"]
+        self.betweenPulsesUsecs = config["stepTiming"]["betweenPulsesUsecs"]
+        # Elbow position used for branch selection - the firmware never updates this from home
+        self.elbowRefX = 0
+        self.elbowRefY = self.upperArmLen
+
+    # Time taken by a single step of the upper, lower and vertical axes in seconds
+    def stepPeriodsSecs(self):
+        return np.array([self.pulseWidthUsecs + betweenUsecs for betweenUsecs in self.betweenPulsesUsecs]) / 1e6
+
+    # Elbow positions for arrays of x,y - chosen as moveTo does or, if elbowSide is given, always on that side
+    # of the line from the shoulder to the pen (as when following a path - 1 is to the left and -1 the right)
+    # Returns elbowX, elbowY, the side each elbow is on and a mask which is False where the point can't be reached
+    def elbowPositions(self, x, y, elbowSide=None):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        r1 = self.upperArmLen
+        r2 = self.lowerArmLen
+
+        # Intersection points of the circles centred on the "shoulder" and the pen (ScaraGeometry.circleIntersection)
+        dx = x - self.xOrigin
+        dy = y - self.yOrigin
+        d = np.hypot(dx, dy)
+        reachable = (d <= r1 + r2) & (d >= abs(r1 - r2)) & (d > 0)
+        dSafe = np.where(d > 0, d, 1.0)
+        a = (r1*r1 - r2*r2 + d*d) / (2*dSafe)
+        h = np.sqrt(np.maximum(r1*r1 - a*a, 0))
+        xm = self.xOrigin + a*dx/dSafe
+        ym = self.yOrigin + a*dy/dSafe
+        p1x = xm + h*dy/dSafe
+        p1y = ym - h*dx/dSafe
+        p2x = xm - h*dy/dSafe
+        p2y = ym + h*dx/dSafe
+
+        # Elbow branch selection as in ScaraRobotManager.moveTo - p2 is to the left of the line from the
+        # shoulder to the pen and p1 to the right
+        if elbowSide is None:
+            bothPositive = (p1y >= 0) & (p2y > 0)
+            delta1 = np.arctan2(p1x - self.elbowRefX, p1y - self.elbowRefY)
+            delta2 = np.arctan2(p2x - self.elbowRefX, p2y - self.elbowRefY)
+            chooseP2 = np.where(bothPositive, delta2 < delta1, p1y < 0)
+            reachable &= ~((p1y < 0) & (p2y < 0))
+        else:
+            chooseP2 = np.full(np.shape(reachable), elbowSide > 0)
+        elbowX = np.where(chooseP2, p2x, p1x)
+        elbowY = np.where(chooseP2, p2y, p1y)
+        if elbowSide is not None:
+            # Allowing for rounding where the elbow ends up at y = 0
+            reachable &= elbowY >= -1e-6
+        return elbowX, elbowY, np.where(chooseP2, 1, -1), reachable
+
+    # Joint angles in degrees (lower angle includes the shoulder gear correction) for arrays of x,y
+    # Returns thetaUpper, thetaLower and a mask which is False where the point can't be reached
+    # elbowSide is as for elbowPositions
+    def jointAngles(self, x, y, elbowSide=None):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        elbowX, elbowY, elbowSides, reachable = self.elbowPositions(x, y, elbowSide)
+
+        thetaUpper = np.degrees(np.arctan2(elbowX - self.xOrigin, elbowY - self.yOrigin))
+        thetaLower = np.degrees(np.arctan2(x - elbowX, y - elbowY))
+        thetaLower += thetaUpper * self.shoulderGearMismatchFactor
+        return thetaUpper, thetaLower, reachable
+
+    # Absolute upper and lower arm step positions (from home) for arrays of x,y
+    # Returns upperSteps, lowerSteps and a mask which is False where the point is unreachable or out of bounds
+    def jointSteps(self, x, y):
+        thetaUpper, thetaLower, valid = self.jointAngles(x, y)
+        upperSteps = np.round(thetaUpper * self.upperStepsPerDegree).astype(np.int64)
+        lowerSteps = np.round(thetaLower * self.lowerStepsPerDegree).astype(np.int64)
+        valid &= np.abs(upperSteps) <= self.upperArmMaxAngle * self.upperStepsPerDegree
+        valid &= np.abs(lowerSteps) <= self.lowerArmMaxAngle * self.lowerStepsPerDegree
+        return upperSteps, lowerSteps, valid
+
+    # Absolute vertical step positions for an array of z values (clipped to the travel as in moveVertical)
+    def verticalSteps(self, z):
+        finalStepPos = np.clip(np.asarray(z, dtype=np.float64) * self.verticalStepsPerMM,
+                               0, self.verticalTravelMax * self.verticalStepsPerMM)
+        return np.round(finalStepPos).astype(np.int64)
+
+    # Pen x,y position for arrays of upper and lower step positions (forward kinematics)
+    def penPosition(self, upperSteps, lowerSteps):
+        thetaUpper = np.radians(np.asarray(upperSteps, dtype=np.float64) / self.upperStepsPerDegree)
+        thetaLower = np.asarray(lowerSteps, dtype=np.float64) / self.lowerStepsPerDegree
+        thetaLower = np.radians(thetaLower - np.degrees(thetaUpper) * self.shoulderGearMismatchFactor)
+        x = self.xOrigin + self.upperArmLen * np.sin(thetaUpper) + self.lowerArmLen * np.sin(thetaLower)
+        y = self.yOrigin + self.upperArmLen * np.cos(thetaUpper) + self.lowerArmLen * np.cos(thetaLower)
+        return x, y
+
+    # Worst case pen position error (mm) due to rounding each joint to a whole step at arrays of x,y
+    # The pen moves further per step when the arms are at right angles than when folded or extended
+    def stepResolution(self, x, y):
+        thetaUpper, thetaLower, reachable = self.jointAngles(x, y)
+        thetaUpper = np.radians(thetaUpper)
+        thetaLower = np.radians(thetaLower - np.degrees(thetaUpper) * self.shoulderGearMismatchFactor)
+        upperRadsPerStep = np.radians(1 / self.upperStepsPerDegree)
+        lowerRadsPerStep = np.radians(1 / self.lowerStepsPerDegree)
+        # Pen movement for a single step of each arm - an upper arm step also turns the lower arm
+        # by the shoulder gear mismatch
+        lowerStepX = self.lowerArmLen * np.cos(thetaLower) * lowerRadsPerStep
+        lowerStepY = -self.lowerArmLen * np.sin(thetaLower) * lowerRadsPerStep
+        mismatchRatio = self.shoulderGearMismatchFactor * upperRadsPerStep / lowerRadsPerStep
+        upperStepX = self.upperArmLen * np.cos(thetaUpper) * upperRadsPerStep - mismatchRatio * lowerStepX
+        upperStepY = -self.upperArmLen * np.sin(thetaUpper) * upperRadsPerStep - mismatchRatio * lowerStepY
+        # Each joint can be out by up to half a step in either direction
+        return 0.5 * np.maximum(np.hypot(upperStepX + lowerStepX, upperStepY + lowerStepY),
+                                np.hypot(upperStepX - lowerStepX, upperStepY - lowerStepY))
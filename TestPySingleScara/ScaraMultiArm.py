@@ -0,0 +1,333 @@
+# Drive several identical arms (each on its own serial port) from one process
+# Jobs (lists of commands, e.g. one part each) go into a shared queue and each arm takes a few at a
+# time into its own backlog so it never waits for the host between jobs
+# The time each arm takes per command is tracked (exponentially weighted) and used to
+#   return queued jobs from an arm which has fallen well behind the others to the shared queue (and only
+#   give it one job at a time while it's behind)
+#   let an arm with nothing left to do take the last job from the arm which will finish last
+# If a command times out (or its response is lost) but the arm still answers a status query the job is put
+# back in the shared queue
+# and the arm carries on - if it doesn't answer (or times out too often in a row) its current job and
+# backlog go back in the shared queue for the other arms
+# Everything runs on one asyncio event loop - there are no threads
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+
+from ScaraSerialClient import ScaraSerialClient, ScaraClientError, ScaraLostResponseError
+
+
+class ArmJob:
+
+    def __init__(self, name, commands):
+        self.name = name
+        self.commands = commands
+        self.attempts = 0
+        self.armName = None
+        self.failedCommands = []
+        self.startTime = None
+        self.endTime = None
+
+    def __repr__(self):
+        return "ArmJob({0!r}, {1} commands)".format(self.name, len(self.commands))
+
+
+class ArmWorker:
+
+    def __init__(self, name, client, orchestrator):
+        self.name = name
+        self.client = client
+        self.orchestrator = orchestrator
+        self.backlog = deque()
+        self.currentJob = None
+        self.currentCmdIdx = 0
+        self.secsPerCommand = None
+        self.commandsDone = 0
+        self.jobsDone = 0
+        self.failed = False
+        self.consecutiveTimeouts = 0
+
+    # Commands this arm still has to send (current job and backlog)
+    def commandsRemaining(self):
+        numCommands = sum(len(job.commands) for job in self.backlog)
+        if self.currentJob is not None:
+            numCommands += len(self.currentJob.commands) - self.currentCmdIdx
+        return numCommands
+
+    # Estimated seconds until this arm runs out of work
+    def projectedFinishSecs(self):
+        secsPerCommand = self.secsPerCommand if self.secsPerCommand is not None else \
+            self.orchestrator.typicalSecsPerCommand()
+        return self.commandsRemaining() * secsPerCommand
+
+    def updateThroughput(self, numCommands, elapsedSecs):
+        if numCommands == 0:
+            return
+        sample = elapsedSecs / numCommands
+        if self.secsPerCommand is None:
+            self.secsPerCommand = sample
+        else:
+            alpha = self.orchestrator.ewmaAlpha
+            self.secsPerCommand = alpha * sample + (1 - alpha) * self.secsPerCommand
+
+    async def runJob(self, job):
+        self.currentJob = job
+        self.currentCmdIdx = 0
+        job.armName = self.name
+        job.attempts += 1
+        job.failedCommands = []
+        job.startTime = time.time()
+        # Commands are pipelined by the client - throughput is measured over each batch of responses
+        futures = deque()
+        batchStart = time.time()
+        batchCommands = 0
+        try:
+            for cmdStr in job.commands:
+                futures.append(await self.client.queueCommand(cmdStr))
+                while len(futures) > 0 and futures[0].done():
+                    self.completeCommand(await self.client.waitFor(futures.popleft()))
+                    batchCommands += 1
+                if batchCommands >= self.orchestrator.throughputBatchCommands:
+                    self.updateThroughput(batchCommands, time.time() - batchStart)
+                    batchStart = time.time()
+                    batchCommands = 0
+            while len(futures) > 0:
+                self.completeCommand(await self.client.waitFor(futures.popleft()))
+                batchCommands += 1
+        except Exception:
+            # The responses still outstanding won't be needed - stop waiting for them so they don't hold
+            # pipeline slots if the arm carries on
+            for future in futures:
+                if future.done() and not future.cancelled():
+                    future.exception()
+                else:
+                    self.client.abandonCommand(future)
+            raise
+        self.updateThroughput(batchCommands, time.time() - batchStart)
+        job.endTime = time.time()
+        self.currentJob = None
+        self.jobsDone += 1
+
+    def completeCommand(self, response):
+        if not response.ok():
+            self.currentJob.failedCommands.append((self.currentCmdIdx, response.rslt))
+        self.currentCmdIdx += 1
+        self.commandsDone += 1
+
+    # After a command has timed out or lost its response - True if the arm answers a status query (and hasn't timed out too
+    # many times in a row) so it can carry on
+    async def stillResponding(self):
+        self.consecutiveTimeouts += 1
+        if self.consecutiveTimeouts > self.orchestrator.maxArmTimeouts:
+            return False
+        try:
+            await self.client.queryStatus()
+        except (ScaraClientError, asyncio.TimeoutError, OSError):
+            return False
+        return True
+
+    async def run(self):
+        while True:
+            job = await self.orchestrator.nextJob(self)
+            if job is None:
+                return
+            try:
+                await self.runJob(job)
+            except (asyncio.TimeoutError, ScaraLostResponseError) as excp:
+                if await self.stillResponding():
+                    print("Arm", self.name, "interrupted during", job.name, "-", str(excp) or "timed out",
+                          "- it still answers so the job is retried")
+                    self.orchestrator.jobInterrupted(self, job)
+                    continue
+                print("Arm", self.name, "failed during", job.name, "-", str(excp) or "timed out")
+                self.failed = True
+                self.orchestrator.armFailed(self, job)
+                return
+            except (ScaraClientError, OSError) as excp:
+                print("Arm", self.name, "failed during", job.name, "-", excp)
+                self.failed = True
+                self.orchestrator.armFailed(self, job)
+                return
+            self.consecutiveTimeouts = 0
+            self.orchestrator.jobFinished(job)
+
+
+class MultiArmOrchestrator:
+
+    # clients is a dictionary of arm name to an open ScaraSerialClient
+    def __init__(self, clients, backlogDepth=2, ewmaAlpha=0.3, rebalanceIntervalSecs=2.0, slowFactor=1.5,
+                 maxAttempts=2, throughputBatchCommands=10, maxArmTimeouts=2):
+        self.workers = [ArmWorker(name, client, self) for name, client in clients.items()]
+        self.backlogDepth = backlogDepth
+        self.ewmaAlpha = ewmaAlpha
+        self.rebalanceIntervalSecs = rebalanceIntervalSecs
+        self.slowFactor = slowFactor
+        self.maxAttempts = maxAttempts
+        self.throughputBatchCommands = throughputBatchCommands
+        self.maxArmTimeouts = maxArmTimeouts
+        self.jobQueue = deque()
+        self.jobsOutstanding = 0
+        self.finishedJobs = []
+        self.abandonedJobs = []
+        self.jobsChanged = asyncio.Condition()
+
+    def addJob(self, name, commands):
+        self.jobQueue.append(ArmJob(name, commands))
+        self.jobsOutstanding += 1
+
+    def activeWorkers(self):
+        return [worker for worker in self.workers if not worker.failed]
+
+    # Used for arms which haven't finished any commands yet
+    def typicalSecsPerCommand(self):
+        measured = sorted(worker.secsPerCommand for worker in self.workers if worker.secsPerCommand is not None)
+        return measured[len(measured) // 2] if len(measured) > 0 else 1.0
+
+    # True for an arm which is much slower than typical
+    def isSlow(self, worker):
+        return worker.secsPerCommand is not None and \
+            worker.secsPerCommand > self.typicalSecsPerCommand() * self.slowFactor
+
+    # Next job for an arm - from its backlog, then the shared queue (topping the backlog up), then the
+    # backlog of the arm which is projected to finish last - waits if other arms still have jobs running
+    # which might come back if an arm fails - returns None when everything is done
+    # A slow arm only takes the job it's about to run so it can't take back the jobs rebalance returned
+    async def nextJob(self, worker):
+        async with self.jobsChanged:
+            while True:
+                if len(worker.backlog) == 0:
+                    backlogDepth = 1 if self.isSlow(worker) else self.backlogDepth
+                    while len(self.jobQueue) > 0 and len(worker.backlog) < backlogDepth:
+                        worker.backlog.append(self.jobQueue.popleft())
+                if len(worker.backlog) == 0:
+                    self.stealJob(worker)
+                if len(worker.backlog) > 0:
+                    return worker.backlog.popleft()
+                if self.jobsOutstanding == 0:
+                    return None
+                await self.jobsChanged.wait()
+
+    def stealJob(self, worker):
+        victims = [other for other in self.activeWorkers() if other is not worker and len(other.backlog) > 0]
+        if len(victims) == 0:
+            return
+        victim = max(victims, key=lambda other: other.projectedFinishSecs())
+        worker.backlog.append(victim.backlog.pop())
+
+    def notifyJobsChanged(self):
+        async def notifyAll():
+            async with self.jobsChanged:
+                self.jobsChanged.notify_all()
+        asyncio.ensure_future(notifyAll())
+
+    def jobFinished(self, job):
+        self.jobsOutstanding -= 1
+        self.finishedJobs.append(job)
+        if self.jobsOutstanding == 0:
+            self.notifyJobsChanged()
+
+    # A job which didn't finish goes back to the front of the shared queue (to be restarted from the
+    # beginning) unless it has already had maxAttempts
+    def requeueJob(self, job):
+        if job.attempts < self.maxAttempts:
+            self.jobQueue.appendleft(job)
+        else:
+            print("Giving up on", job.name, "after", job.attempts, "attempts")
+            self.abandonedJobs.append(job)
+            self.jobsOutstanding -= 1
+
+    # The arm's current job was interrupted (by a timeout) but the arm is carrying on
+    def jobInterrupted(self, worker, job):
+        self.requeueJob(job)
+        worker.currentJob = None
+        self.notifyJobsChanged()
+
+    # The arm's current job (restarted from the beginning) and its backlog go back to the shared queue
+    def armFailed(self, worker, job):
+        self.requeueJob(job)
+        while len(worker.backlog) > 0:
+            self.jobQueue.appendleft(worker.backlog.pop())
+        worker.currentJob = None
+        if len(self.activeWorkers()) == 0:
+            # Nobody left to do the work
+            self.abandonedJobs.extend(self.jobQueue)
+            self.jobsOutstanding -= len(self.jobQueue)
+            self.jobQueue.clear()
+        self.notifyJobsChanged()
+
+    # Arms which are much slower than typical give their queued jobs back to the shared queue
+    def rebalance(self):
+        typicalSecs = self.typicalSecsPerCommand()
+        for worker in self.activeWorkers():
+            if not self.isSlow(worker) or len(worker.backlog) == 0:
+                continue
+            print("Arm", worker.name, "is behind ({0:.3f}s per command, typical {1:.3f}s) - returning {2} jobs".format(
+                worker.secsPerCommand, typicalSecs, len(worker.backlog)))
+            while len(worker.backlog) > 0:
+                self.jobQueue.appendleft(worker.backlog.pop())
+        self.notifyJobsChanged()
+
+    async def rebalanceTask(self):
+        while self.jobsOutstanding > 0:
+            await asyncio.sleep(self.rebalanceIntervalSecs)
+            self.rebalance()
+
+    # Run all the jobs - returns the finished jobs
+    async def run(self):
+        rebalancer = asyncio.ensure_future(self.rebalanceTask())
+        try:
+            await asyncio.gather(*(worker.run() for worker in self.workers))
+        finally:
+            rebalancer.cancel()
+        return self.finishedJobs
+
+    def printStats(self):
+        for worker in self.workers:
+            secsPerCommand = "-" if worker.secsPerCommand is None else "{0:.3f}s".format(worker.secsPerCommand)
+            print("Arm {0:<16s} jobs {1:4d} commands {2:6d} per command {3}{4}".format(
+                worker.name, worker.jobsDone, worker.commandsDone, secsPerCommand,
+                " FAILED" if worker.failed else ""))
+        if len(self.abandonedJobs) > 0:
+            print("Abandoned jobs:", ", ".join(job.name for job in self.abandonedJobs))
+
+
+# Open a client for each serial port
+async def openArms(serialPortNames, baudRate=115200, pipelineDepth=2):
+    clients = {}
+    for serialPortName in serialPortNames:
+        client = ScaraSerialClient(pipelineDepth=pipelineDepth)
+        await client.open(serialPortName, baudRate)
+        clients[serialPortName] = client
+    return clients
+
+
+# Job files are JSON lists of [x, y] points (sent as G0) or command strings
+def loadJobCommands(fileName):
+    with open(fileName) as jobFile:
+        jobItems = json.load(jobFile)
+    return [item if isinstance(item, str) else "G0 {0:.2f} {1:.2f}".format(item[0], item[1]) for item in jobItems]
+
+
+async def runJobFiles(serialPortNames, jobFileNames):
+    clients = await openArms(serialPortNames)
+    try:
+        orchestrator = MultiArmOrchestrator(clients)
+        for jobFileName in jobFileNames:
+            orchestrator.addJob(jobFileName, loadJobCommands(jobFileName))
+        startTime = time.time()
+        await orchestrator.run()
+        print("All jobs finished in {0:.1f}s".format(time.time() - startTime))
+        orchestrator.printStats()
+    finally:
+        for client in clients.values():
+            client.close()
+
+
+if __name__ == "__main__":
+    if "--" not in sys.argv or sys.argv.index("--") < 2:
+        print("Usage: ScaraMultiArm.py serialPort [serialPort ...] -- job.json [job.json ...]")
+        sys.exit(1)
+    separatorIdx = sys.argv.index("--")
+    asyncio.run(runJobFiles(sys.argv[1:separatorIdx], sys.argv[separatorIdx + 1:]))
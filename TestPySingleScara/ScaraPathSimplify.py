@@ -0,0 +1,73 @@
+# Path simplification before streaming - drops polyline vertices which don't change the plotted result
+# by more than a tolerance (Ramer-Douglas-Peucker)
+# The tolerance at each vertex is never less than the arm's step resolution at that location as the arm
+# can't position the pen any more accurately than that - and vertices which round to the same joint
+# steps as the previous vertex are dropped as the firmware wouldn't move for them anyway
+# With [x, y, z] points the vertices either side of every change in z (pen or drill up and down) are always
+# kept and each run at a constant z is simplified on its own
+import numpy as np
+
+from ScaraKinematics import ScaraKinematics
+
+
+# Distance of each point from the line segment start-end
+def distanceFromSegment(points, start, end):
+    segVec = end - start
+    segLenSq = float(np.dot(segVec, segVec))
+    if segLenSq == 0:
+        return np.hypot(points[:, 0] - start[0], points[:, 1] - start[1])
+    t = np.clip(((points - start) @ segVec) / segLenSq, 0, 1)
+    closest = start + t[:, np.newaxis] * segVec
+    return np.hypot(points[:, 0] - closest[:, 0], points[:, 1] - closest[:, 1])
+
+
+# Returns a mask of the vertices to keep
+def simplifyPathMask(points, toleranceMM=0.1, robotConfiguration=None):
+    numPoints = len(points)
+    keep = np.zeros(numPoints, dtype=bool)
+    if numPoints == 0:
+        return keep
+    points = np.asarray(points, dtype=np.float64)
+    xy = points[:, :2]
+    kinematics = ScaraKinematics(robotConfiguration)
+    vertexTolerance = np.maximum(toleranceMM, kinematics.stepResolution(xy[:, 0], xy[:, 1]))
+
+    # Runs of points at the same z - the first and last point of each run are kept
+    runStarts = [0]
+    if points.shape[1] > 2:
+        runStarts = [0] + list(np.flatnonzero(np.diff(points[:, 2]) != 0) + 1)
+    runEnds = runStarts[1:] + [numPoints]
+    sections = []
+    for runStart, runEnd in zip(runStarts, runEnds):
+        keep[runStart] = True
+        keep[runEnd - 1] = True
+        sections.append((runStart, runEnd - 1))
+
+    # Ramer-Douglas-Peucker using a stack rather than recursion so long paths are fine
+    while len(sections) > 0:
+        startIdx, endIdx = sections.pop()
+        if endIdx - startIdx < 2:
+            continue
+        errorRatio = distanceFromSegment(xy[startIdx+1:endIdx], xy[startIdx], xy[endIdx]) / \
+                     vertexTolerance[startIdx+1:endIdx]
+        worstIdx = int(np.argmax(errorRatio))
+        if errorRatio[worstIdx] > 1:
+            splitIdx = startIdx + 1 + worstIdx
+            keep[splitIdx] = True
+            sections.append((startIdx, splitIdx))
+            sections.append((splitIdx, endIdx))
+
+    # Drop vertices which the arm can't distinguish from the previous one
+    keptIdxs = np.flatnonzero(keep)
+    upperSteps, lowerSteps, valid = kinematics.jointSteps(xy[keptIdxs, 0], xy[keptIdxs, 1])
+    sameSteps = (np.diff(upperSteps) == 0) & (np.diff(lowerSteps) == 0) & valid[1:] & valid[:-1]
+    if points.shape[1] > 2:
+        sameSteps &= np.diff(points[keptIdxs, 2]) == 0
+    keep[keptIdxs[1:][sameSteps]] = False
+    return keep
+
+
+# Simplify a polyline of [x, y] or [x, y, z] points - returns the points which are kept
+def simplifyPath(points, toleranceMM=0.1, robotConfiguration=None):
+    keep = simplifyPathMask(points, toleranceMM, robotConfiguration)
+    return [point for point, keepPoint in zip(points, keep) if keepPoint]
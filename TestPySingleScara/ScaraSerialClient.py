@@ -0,0 +1,438 @@
+# Asynchronous host client for the SCARA serial protocol (see SerialControl/RobotCommandInterpreter.py)
+# Uses an asyncio transport on the serial port file descriptor so no time is spent polling
+# Commands can be pipelined - up to pipelineDepth commands are sent before the first response arrives
+# (the firmware queues commands received while a move is in progress)
+import asyncio
+import os
+import re
+import sys
+import time
+import tty
+
+# Result code reported when the firmware command queue is full
+RSLT_QUEUE_FULL = -5
+
+
+class ScaraClientError(Exception):
+    pass
+
+
+# A command's response never arrived (a later command's response came first) - the robot is still talking
+class ScaraLostResponseError(ScaraClientError):
+    pass
+
+
+# Response to a single command
+class ScaraResponse:
+
+    def __init__(self, cmdStr):
+        self.cmdStr = cmdStr
+        self.rslt = None
+        # Any {...} data frames (other than status replies) received with the response
+        self.frames = []
+
+    def ok(self):
+        return self.rslt == 0
+
+    def __repr__(self):
+        return "ScaraResponse({0!r}, {1}, {2})".format(self.cmdStr, self.rslt, self.frames)
+
+
+# Parse a status reply frame such as "S U+000000 L+000000 ... Q00" into a dictionary
+def parseStatusFrame(frameStr):
+    status = {}
+    for field in frameStr.split()[1:]:
+        key = field[0]
+        value = float(field[1:])
+        status[key] = value if key in "XYZ" else int(value)
+    return status
+
+
+# Parse a profile frame such as "P command:1234:2:800 parse:..." into a dictionary of
+# stage name to (totalUs, count, maxUs)
+def parseProfileFrame(frameStr):
+    profile = {}
+    for field in frameStr.split()[1:]:
+        stageName, totalUs, count, maxUs = field.split(":")
+        profile[stageName] = (int(totalUs), int(count), int(maxUs))
+    return profile
+
+
+# Parse a memory frame such as "M mode:1 free:-1 alloc:5120 low:-1 gc:2:900:500 G0:10:20480:2300:1" into a
+# dictionary - "mode", "free", "alloc" and "low" are numbers, "gc" is (count, totalUs, maxUs) and "commands" is
+# a dictionary of command name to (count, totalBytes, maxBytes, collections)
+def parseMemoryFrame(frameStr):
+    memory = {"commands": {}}
+    for field in frameStr.split()[1:]:
+        parts = field.split(":")
+        if parts[0] == "gc":
+            memory["gc"] = tuple(int(part) for part in parts[1:])
+        elif len(parts) == 2:
+            memory[parts[0]] = int(parts[1])
+        else:
+            memory["commands"][parts[0]] = tuple(int(part) for part in parts[1:])
+    return memory
+
+
+# Parser for the bytes received from the robot - works on whole chunks rather than single characters
+# Returns a list of events - ("result", cmdStr, rsltCode) for command responses and ("frame", text)
+# for {...} frames (status replies and data) - echoed characters are discarded
+class ScaraResponseParser:
+
+    RESPONSE_RE = re.compile(r"\[CMD([^\]\r\n]*)\]<(-?\d+)>|\{([^{}]*)\}")
+
+    def __init__(self):
+        self.rxStr = ""
+
+    def feed(self, chunk):
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode("utf-8", "replace")
+        self.rxStr += chunk
+        events = []
+        endPos = 0
+        for match in self.RESPONSE_RE.finditer(self.rxStr):
+            if match.group(3) is not None:
+                events.append(("frame", match.group(3)))
+            else:
+                events.append(("result", match.group(1), int(match.group(2))))
+            endPos = match.end()
+        # Keep only a possibly incomplete response or frame for the next chunk
+        remainder = self.rxStr[endPos:]
+        startPos = max(remainder.rfind("["), remainder.rfind("{"))
+        self.rxStr = remainder[startPos:] if startPos >= 0 else ""
+        return events
+
+
+class ScaraSerialClient:
+
+    # captureFileName records the session (in the format of SerialControl/HardwareLibrary's UartCapture) so
+    # it can be replayed into the emulated firmware with SerialControl/ScaraUartReplay.py
+    def __init__(self, pipelineDepth=1, timeoutSecs=30.0, echo=False, captureFileName=None):
+        self.pipelineDepth = pipelineDepth
+        self.timeoutSecs = timeoutSecs
+        self.echo = echo
+        self.captureFileName = captureFileName
+        self.captureFile = None
+        self.captureStart = 0
+        self.serialPort = None
+        self.fd = None
+        self.ownsFd = False
+        self.loop = None
+        self.parser = ScaraResponseParser()
+        self.pipelineSlots = None
+        # Commands sent and awaiting a response in the order they were sent - each is [response, future, slotHeld]
+        # A command which timed out stays here (with its future cancelled) until its response arrives or a later
+        # command's response shows it was lost, so a late response is dropped rather than taken by another command
+        self.pendingCmds = []
+        self.pendingStatus = []
+        self.txBuf = bytearray()
+
+    # Open a serial port by name
+    async def open(self, serialPortName, baudRate=115200):
+        import serial
+        self.serialPort = serial.Serial(serialPortName, baudrate=baudRate, timeout=0)
+        self.openFd(self.serialPort.fileno())
+
+    # Use an already open file descriptor (e.g. a pseudo-terminal)
+    def openFd(self, fd, ownsFd=False):
+        self.loop = asyncio.get_running_loop()
+        self.fd = fd
+        self.ownsFd = ownsFd
+        os.set_blocking(fd, False)
+        self.pipelineSlots = asyncio.Semaphore(self.pipelineDepth)
+        if self.captureFileName is not None:
+            self.captureFile = open(self.captureFileName, "w")
+            self.captureStart = time.perf_counter()
+        self.loop.add_reader(fd, self.onReadable)
+
+    def close(self):
+        if self.fd is None:
+            return
+        self.loop.remove_reader(self.fd)
+        self.loop.remove_writer(self.fd)
+        if self.serialPort is not None:
+            self.serialPort.close()
+            self.serialPort = None
+        elif self.ownsFd:
+            os.close(self.fd)
+        self.fd = None
+        if self.captureFile is not None:
+            self.captureFile.close()
+            self.captureFile = None
+        for pending in self.pendingCmds:
+            self.releaseSlot(pending)
+            if not pending[1].done():
+                pending[1].set_exception(ScaraClientError("Connection closed"))
+        for future in self.pendingStatus:
+            if not future.done():
+                future.set_exception(ScaraClientError("Connection closed"))
+        self.pendingCmds = []
+        self.pendingStatus = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, exc, tb):
+        self.close()
+
+    # Send a command and wait for its response
+    async def sendCommand(self, cmdStr):
+        return await self.waitFor(await self.queueCommand(cmdStr))
+
+    # Send a command without waiting for the response - waits only for a free pipeline slot (raising
+    # asyncio.TimeoutError if none is freed within the timeout as the robot has stopped responding)
+    # Returns a future for the ScaraResponse
+    async def queueCommand(self, cmdStr):
+        if self.fd is None:
+            raise ScaraClientError("Not connected")
+        await asyncio.wait_for(self.pipelineSlots.acquire(), self.timeoutSecs)
+        if self.fd is None:
+            self.pipelineSlots.release()
+            raise ScaraClientError("Connection closed")
+        future = self.loop.create_future()
+        self.pendingCmds.append([ScaraResponse(cmdStr), future, True])
+        self.writeBytes(cmdStr.encode("ascii") + b"\r\n")
+        return future
+
+    # Wait for the response to a queued command
+    async def waitFor(self, future):
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeoutSecs)
+        except asyncio.TimeoutError:
+            self.abandonCommand(future)
+            raise
+
+    # Stop waiting for a queued command's response - its pipeline slot is freed so a lost response doesn't
+    # stall the pipeline and the command is kept in order (cancelled) so its response is dropped if it turns
+    # up late
+    def abandonCommand(self, future):
+        for pending in self.pendingCmds:
+            if pending[1] is future:
+                self.releaseSlot(pending)
+                future.cancel()
+                break
+
+    # Wait until all queued commands have been responded to
+    async def drain(self):
+        futures = [pending[1] for pending in self.pendingCmds if not pending[1].done()]
+        for future in futures:
+            await self.waitFor(future)
+
+    # Query status - answered by the firmware straight away even during a move
+    async def queryStatus(self):
+        if self.fd is None:
+            raise ScaraClientError("Not connected")
+        future = self.loop.create_future()
+        self.pendingStatus.append(future)
+        self.writeBytes(b"?")
+        try:
+            frameStr = await asyncio.wait_for(asyncio.shield(future), self.timeoutSecs)
+        except asyncio.TimeoutError:
+            # So the next status reply goes to the next query
+            if future in self.pendingStatus:
+                self.pendingStatus.remove(future)
+            raise
+        return parseStatusFrame(frameStr)
+
+    # Get the firmware's per-stage profiling counters (and optionally reset them)
+    async def queryProfile(self, reset=False):
+        response = await self.sendCommand("Q0")
+        if reset:
+            await self.sendCommand("Q1")
+        for frameStr in response.frames:
+            if frameStr.startswith("P "):
+                return parseProfileFrame(frameStr)
+        raise ScaraClientError("No profile in response to Q0")
+
+    # Heap profiling mode - 0 off, 1 measure each command, 2 also collect before each command
+    async def setMemoryProfiling(self, mode):
+        return await self.sendCommand("M2 {0}".format(mode))
+
+    async def queryMemory(self, reset=False):
+        response = await self.sendCommand("M0")
+        if reset:
+            await self.sendCommand("M1")
+        for frameStr in response.frames:
+            if frameStr.startswith("M "):
+                return parseMemoryFrame(frameStr)
+        raise ScaraClientError("No memory counters in response to M0")
+
+    async def goTo(self, x, y):
+        return await self.sendCommand("G0 {0:.2f} {1:.2f}".format(x, y))
+
+    # Straight line from the current position (split into segments by the robot)
+    async def lineTo(self, x, y):
+        return await self.sendCommand("G1 {0:.2f} {1:.2f}".format(x, y))
+
+    # Arc of a circle around cx,cy from startDeg to endDeg (degrees anticlockwise from the x axis, a full
+    # circle if they're the same) - the robot draws a straight line to the start of the arc first if needed
+    async def arcTo(self, cx, cy, radius, startDeg, endDeg, clockwise=False):
+        return await self.sendCommand("{0} {1:.2f} {2:.2f} {3:.2f} {4:.2f} {5:.2f}".format(
+            "G2" if clockwise else "G3", cx, cy, radius, startDeg, endDeg))
+
+    # Cubic Bezier curve from the current position to x,y with control points x1,y1 and x2,y2
+    async def bezierTo(self, x1, y1, x2, y2, x, y):
+        return await self.sendCommand("B0 {0:.2f} {1:.2f} {2:.2f} {3:.2f} {4:.2f} {5:.2f}".format(x1, y1, x2, y2, x, y))
+
+    # Catmull-Rom spline from the current position through a list of (x, y) points
+    # Longer lists are sent as several B1 commands - the curve's direction changes slightly where they join
+    async def splineThrough(self, points, maxPointsPerCommand=16):
+        rslt = None
+        for pointIdx in range(0, len(points), maxPointsPerCommand):
+            pointsStr = " ".join("{0:.2f} {1:.2f}".format(x, y) for x, y in points[pointIdx:pointIdx+maxPointsPerCommand])
+            rslt = await self.sendCommand("B1 " + pointsStr)
+            if not rslt.ok():
+                break
+        return rslt
+
+    async def moveVertical(self, z):
+        return await self.sendCommand("V0 {0:.2f}".format(z))
+
+    async def moveSteps(self, upperSteps, lowerSteps, verticalSteps=0):
+        return await self.sendCommand("S2 {0:d} {1:d} {2:d}".format(upperSteps, lowerSteps, verticalSteps))
+
+    # Coordinated move of the arms taking durationUsecs (or longer if the arms can't step that fast)
+    async def moveStepsTimed(self, upperSteps, lowerSteps, durationUsecs):
+        return await self.sendCommand("S3 {0:d} {1:d} {2:d}".format(upperSteps, lowerSteps, durationUsecs))
+
+    def releaseSlot(self, pending):
+        if pending[2]:
+            pending[2] = False
+            self.pipelineSlots.release()
+
+    # Capture direction is from the robot's point of view - R is received by the robot and W written by it
+    def captureData(self, direction, data):
+        if self.captureFile is not None:
+            self.captureFile.write("{0} {1} {2}\n".format(
+                int((time.perf_counter() - self.captureStart) * 1000000), direction, data.hex()))
+
+    def writeBytes(self, data):
+        self.captureData("R", data)
+        self.txBuf += data
+        self.onWritable()
+
+    def onWritable(self):
+        try:
+            while len(self.txBuf) > 0:
+                numWritten = os.write(self.fd, self.txBuf)
+                del self.txBuf[:numWritten]
+        except BlockingIOError:
+            pass
+        if len(self.txBuf) > 0:
+            self.loop.add_writer(self.fd, self.onWritable)
+        else:
+            self.loop.remove_writer(self.fd)
+
+    def onReadable(self):
+        try:
+            chunk = os.read(self.fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if len(chunk) == 0:
+            self.close()
+            return
+        self.captureData("W", chunk)
+        if self.echo:
+            print(chunk.decode("utf-8", "replace"), end="")
+        for event in self.parser.feed(chunk):
+            self.handleEvent(event)
+
+    def handleEvent(self, event):
+        if event[0] == "frame":
+            frameStr = event[1]
+            if frameStr.startswith("S ") and len(self.pendingStatus) > 0:
+                future = self.pendingStatus.pop(0)
+                if not future.done():
+                    future.set_result(frameStr)
+            elif len(self.pendingCmds) > 0:
+                self.pendingCmds[0][0].frames.append(frameStr)
+            return
+        # Responses come back in the order the commands were sent so the response is for the oldest command
+        # with the same text (and is dropped if that command timed out) - any older commands lost their responses
+        cmdStr = event[1].strip()
+        matchIdx = None
+        for pendingIdx, pending in enumerate(self.pendingCmds):
+            if pending[0].cmdStr.strip() == cmdStr:
+                matchIdx = pendingIdx
+                break
+        if matchIdx is None:
+            return
+        for pending in self.pendingCmds[:matchIdx]:
+            self.releaseSlot(pending)
+            if not pending[1].done():
+                pending[1].set_exception(ScaraLostResponseError("No response for " + pending[0].cmdStr + " before " + event[1]))
+        pending = self.pendingCmds[matchIdx]
+        del self.pendingCmds[:matchIdx+1]
+        response, future = pending[0], pending[1]
+        self.releaseSlot(pending)
+        if future.done():
+            return
+        response.rslt = event[2]
+        future.set_result(response)
+
+
+# Pseudo-terminal with a minimal robot responder on the master side - host code opens slaveName
+# exactly like a real serial port so it can be tested without a robot attached
+# The responder is called with each command string and returns the result code
+class PtyLoopback:
+
+    def __init__(self, responder=None, echo=True):
+        self.responder = responder if responder is not None else (lambda cmdStr: 0)
+        self.echo = echo
+        self.masterFd, self.slaveFd = os.openpty()
+        tty.setraw(self.slaveFd)
+        self.slaveName = os.ttyname(self.slaveFd)
+        self.cmdStr = ""
+        self.loop = None
+        self.cmdsReceived = []
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        os.set_blocking(self.masterFd, False)
+        self.loop.add_reader(self.masterFd, self.onReadable)
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.remove_reader(self.masterFd)
+        os.close(self.masterFd)
+        os.close(self.slaveFd)
+
+    def onReadable(self):
+        try:
+            chunk = os.read(self.masterFd, 4096).decode("ascii", "replace")
+        except (BlockingIOError, OSError):
+            return
+        replyStr = ""
+        for ch in chunk:
+            if ch == "?":
+                replyStr += "{S U+000000 L+000000 V+000000 X+0000.00 Y+0200.00 Z+000.00 M0 B0 Q00}\r\n"
+            elif ch == "\n":
+                self.cmdsReceived.append(self.cmdStr)
+                replyStr += "[CMD" + self.cmdStr + "]<" + str(self.responder(self.cmdStr)) + ">\r\n"
+                self.cmdStr = ""
+            elif ch != "\r":
+                self.cmdStr += ch
+                if self.echo:
+                    replyStr += ch
+        if len(replyStr) > 0:
+            os.write(self.masterFd, replyStr.encode("ascii"))
+
+
+# Send the commands given on the command line to the robot
+async def sendCommandLine(serialPortName, cmdStrs):
+    client = ScaraSerialClient(echo=True)
+    await client.open(serialPortName)
+    try:
+        for cmdStr in cmdStrs:
+            print(await client.sendCommand(cmdStr))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: ScaraSerialClient.py serialPort command [command ...]")
+        sys.exit(1)
+    asyncio.run(sendCommandLine(sys.argv[1], sys.argv[2:]))
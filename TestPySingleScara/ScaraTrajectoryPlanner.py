@@ -0,0 +1,263 @@
+# Time-optimal trajectory planning - finds the fastest way to move the pen along a path without any arm joint
+# going faster or accelerating harder than its limits and emits the result as a timed step program which the
+# firmware plays back with S3 commands
+# The path is sampled evenly by distance s along it and at each sample the joint positions q(s) (in steps)
+# and their first and second derivatives with respect to s are found - a joint's velocity is then q'(s) * sdot
+# and its acceleration q'(s) * sddot + q''(s) * sdot^2, so the joint limits become limits on the path speed
+# sdot and path acceleration sddot which change along the path (the SCARA Jacobian is very different for a
+# folded arm and an extended one)
+# The speed profile (as sdot^2, which changes linearly with s for constant sddot) comes from a forward pass
+# accelerating as hard as the limits allow and a backward pass from the end braking as hard as they allow,
+# both kept under the fastest speed the joint limits allow at each sample (time-optimal path parameterisation)
+# The constant sddot between two samples has to keep the joint accelerations within their limits at both
+# samples - the passes are repeated until neither changes the profile as lowering a speed in the backward
+# pass can leave the acceleration into that sample too hard
+# The firmware never steps an axis faster than its step timing allows so limits above that make the moves
+# take longer than planned
+import json
+import sys
+import numpy as np
+
+from ScaraKinematics import ScaraKinematics
+from ScaraJobCompiler import StepProgram, pointsToSteps
+
+# Largest change in a joint angle (degrees) between samples - the joints swing round quickly where the path
+# passes close to the shoulder and a path can't be followed through it
+MAX_SAMPLE_JOINT_DEGREES = 10
+
+# Upper limit on sdot^2 where the joints hardly move along the path
+MAX_SPEED_SQUARED = 1e12
+
+# Most forward and backward passes - the profile only ever gets slower so they stop changing it quickly
+MAX_PLAN_PASSES = 50
+
+
+# Points evenly spaced (no more than sampleMM apart) along a polyline of [x, y] points
+# Paths shorter than 2 * sampleMM get 3 samples (the fewest the planner needs) and a path which doesn't go
+# anywhere gets a single sample
+# Returns the distance along the path of each sample and the (N, 2) sample points
+def resamplePath(points, sampleMM):
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        raise ValueError("Path has no points")
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("Path points must be [x, y] - plan each constant z (pen up or pen down) run separately")
+    segLens = np.hypot(np.diff(points[:, 0]), np.diff(points[:, 1]))
+    points = points[np.concatenate(([True], segLens > 0))]
+    pointDists = np.concatenate(([0.0], np.cumsum(segLens[segLens > 0])))
+    if pointDists[-1] <= 0:
+        return pointDists[:1], points[:1]
+    numSamples = max(int(np.ceil(pointDists[-1] / sampleMM)), 2) + 1
+    sampleDists = np.linspace(0.0, pointDists[-1], numSamples)
+    samples = np.stack((np.interp(sampleDists, pointDists, points[:, 0]),
+                        np.interp(sampleDists, pointDists, points[:, 1])), axis=1)
+    return sampleDists, samples
+
+
+class Trajectory:
+
+    def __init__(self, sampleDists, samples, jointSteps, speeds, times, jointDeriv=None, jointDeriv2=None):
+        # Distance along the path, pen position, (unrounded) upper and lower joint steps, path speed (mm/s)
+        # and time (s) at each sample
+        self.sampleDists = sampleDists
+        self.samples = samples
+        self.jointSteps = jointSteps
+        self.speeds = speeds
+        self.times = times
+        # q'(s) and q''(s) the plan was made with (None for a trajectory which doesn't go anywhere)
+        self.jointDeriv = jointDeriv
+        self.jointDeriv2 = jointDeriv2
+
+    def __len__(self):
+        return len(self.samples)
+
+    def durationSecs(self):
+        return float(self.times[-1])
+
+
+class TrajectoryPlanner:
+
+    # maxStepsPerSec and maxStepsPerSec2 are the upper and lower arm limits - by default the fastest the
+    # firmware steps each arm and the accelerations in the robot configuration (where 0 means no limit)
+    def __init__(self, robotConfiguration=None, maxStepsPerSec=None, maxStepsPerSec2=None, sampleMM=0.5):
+        self.kinematics = ScaraKinematics(robotConfiguration)
+        config = self.kinematics.robotConfiguration
+        if maxStepsPerSec is None:
+            maxStepsPerSec = 1 / self.kinematics.stepPeriodsSecs()[:2]
+        if maxStepsPerSec2 is None:
+            maxStepsPerSec2 = config["stepTiming"]["accelStepsPerSec2"][:2]
+        self.maxStepsPerSec = np.asarray(maxStepsPerSec, dtype=np.float64)
+        maxStepsPerSec2 = np.asarray(maxStepsPerSec2, dtype=np.float64)
+        self.maxStepsPerSec2 = np.where(maxStepsPerSec2 > 0, maxStepsPerSec2, np.inf)
+        self.sampleMM = sampleMM
+
+    # Upper and lower joint positions in steps (not rounded) at the sample points - (N, 2)
+    # The elbow starts where moveTo would put it and stays on that side of the pen along the path
+    def jointPositions(self, samples):
+        elbowSide = self.kinematics.elbowPositions(samples[:1, 0], samples[:1, 1])[2][0]
+        thetaUpper, thetaLower, reachable = self.kinematics.jointAngles(samples[:, 0], samples[:, 1], elbowSide)
+        if not np.all(reachable):
+            raise ValueError("Path can't be reached at {0}".format(samples[np.flatnonzero(~reachable)[0]].tolist()))
+        jointSteps = np.stack((thetaUpper * self.kinematics.upperStepsPerDegree,
+                               thetaLower * self.kinematics.lowerStepsPerDegree), axis=1)
+        maxSteps = np.array([self.kinematics.upperArmMaxAngle * self.kinematics.upperStepsPerDegree,
+                             self.kinematics.lowerArmMaxAngle * self.kinematics.lowerStepsPerDegree])
+        outOfBounds = np.any(np.abs(jointSteps) > maxSteps, axis=1)
+        if np.any(outOfBounds):
+            raise ValueError("Path is out of bounds at {0}".format(samples[np.flatnonzero(outOfBounds)[0]].tolist()))
+        jointJumps = np.max(np.abs(np.diff(np.stack((thetaUpper, thetaLower), axis=1), axis=0)), axis=1)
+        if np.any(jointJumps > MAX_SAMPLE_JOINT_DEGREES):
+            raise ValueError("Path passes too close to the shoulder at {0}".format(samples[np.flatnonzero(jointJumps > MAX_SAMPLE_JOINT_DEGREES)[0]].tolist()))
+        return jointSteps
+
+    # Range of path accelerations (sddot) the joint acceleration limits allow at path speeds squared
+    # speedSq - jointDeriv and jointDeriv2 are q'(s) and q''(s) at the same samples (..., 2)
+    # Returns the lowest and highest allowed - the lowest is above the highest where speedSq is too fast
+    def pathAccelLimits(self, jointDeriv, jointDeriv2, speedSq):
+        centripetal = jointDeriv2 * np.asarray(speedSq)[..., np.newaxis]
+        movingJoint = np.abs(jointDeriv) > 1e-9
+        derivSafe = np.where(movingJoint, jointDeriv, 1.0)
+        bound1 = (-self.maxStepsPerSec2 - centripetal) / derivSafe
+        bound2 = (self.maxStepsPerSec2 - centripetal) / derivSafe
+        # A joint which isn't moving along the path only limits the speed
+        stillOk = np.abs(centripetal) <= self.maxStepsPerSec2
+        lowBound = np.where(movingJoint, np.minimum(bound1, bound2), np.where(stillOk, -np.inf, np.inf))
+        highBound = np.where(movingJoint, np.maximum(bound1, bound2), np.where(stillOk, np.inf, -np.inf))
+        return np.max(lowBound, axis=-1), np.min(highBound, axis=-1)
+
+    # Highest path speed squared at each sample allowed by the joint velocity limits and at which the
+    # acceleration limits can still be met (found by bisection as the allowed speeds always start from 0)
+    def maxSpeedSquared(self, jointDeriv, jointDeriv2):
+        absDeriv = np.abs(jointDeriv)
+        jointMaxSpeeds = np.where(absDeriv > 1e-9, self.maxStepsPerSec / np.where(absDeriv > 1e-9, absDeriv, 1.0), np.inf)
+        speedSqLimit = np.minimum(np.min(jointMaxSpeeds, axis=1) ** 2, MAX_SPEED_SQUARED)
+        lowAccel, highAccel = self.pathAccelLimits(jointDeriv, jointDeriv2, speedSqLimit)
+        tooFast = lowAccel > highAccel
+        if np.any(tooFast):
+            okSpeedSq = np.zeros(np.count_nonzero(tooFast))
+            failSpeedSq = speedSqLimit[tooFast]
+            for iteration in range(50):
+                trySpeedSq = (okSpeedSq + failSpeedSq) / 2
+                lowAccel, highAccel = self.pathAccelLimits(jointDeriv[tooFast], jointDeriv2[tooFast], trySpeedSq)
+                ok = lowAccel <= highAccel
+                okSpeedSq = np.where(ok, trySpeedSq, okSpeedSq)
+                failSpeedSq = np.where(ok, failSpeedSq, trySpeedSq)
+            speedSqLimit[tooFast] = okSpeedSq
+        return speedSqLimit
+
+    # Range of speeds squared at one end of the interval between two samples which keeps the joint
+    # accelerations within their limits at both samples (the path acceleration is constant over the interval)
+    # jointDeriv and jointDeriv2 are q'(s) and q''(s) at the two samples (2, 2) and knownSpeedSq the speed
+    # squared at the other end - the end found is the later one if forward is True and the earlier one if not
+    # Returns the lowest and highest allowed - the lowest is above the highest if none is allowed
+    def intervalSpeedSqRange(self, jointDeriv, jointDeriv2, sampleDist, knownSpeedSq, forward):
+        # Joint acceleration at each sample is coeffs * x + consts for the unknown speed squared x
+        derivRate = jointDeriv / (2 * sampleDist)
+        if forward:
+            coeffs = np.stack((derivRate[0], derivRate[1] + jointDeriv2[1]))
+            consts = np.stack((jointDeriv2[0] * knownSpeedSq - derivRate[0] * knownSpeedSq, -derivRate[1] * knownSpeedSq))
+        else:
+            coeffs = np.stack((jointDeriv2[0] - derivRate[0], -derivRate[1]))
+            consts = np.stack((derivRate[0] * knownSpeedSq, (derivRate[1] + jointDeriv2[1]) * knownSpeedSq))
+        accelLimits = np.broadcast_to(self.maxStepsPerSec2, coeffs.shape)
+        movingJoint = np.abs(coeffs) > 1e-12
+        coeffsSafe = np.where(movingJoint, coeffs, 1.0)
+        bound1 = (-accelLimits - consts) / coeffsSafe
+        bound2 = (accelLimits - consts) / coeffsSafe
+        stillOk = np.abs(consts) <= accelLimits
+        lowBound = np.where(movingJoint, np.minimum(bound1, bound2), np.where(stillOk, -np.inf, np.inf))
+        highBound = np.where(movingJoint, np.maximum(bound1, bound2), np.where(stillOk, np.inf, -np.inf))
+        return np.max(lowBound), np.min(highBound)
+
+    # Plan the fastest trajectory along a polyline of [x, y] points starting and finishing at rest
+    # A path which doesn't go anywhere is a trajectory with a single sample (which stepProgram turns into
+    # a move to it from startPoint or no moves at all)
+    def plan(self, points):
+        sampleDists, samples = resamplePath(points, self.sampleMM)
+        jointSteps = self.jointPositions(samples)
+        if len(samples) == 1:
+            return Trajectory(sampleDists, samples, jointSteps, np.zeros(1), np.zeros(1))
+        sampleDist = sampleDists[1] - sampleDists[0]
+        jointDeriv = np.gradient(jointSteps, sampleDist, axis=0)
+        # q'' is the second difference of neighbouring samples - the change of direction the joints actually
+        # make at each sample (np.gradient of q' spreads each of a polyline's corners over 4 samples and
+        # halves it which lets the speed through the corners be too high)
+        jointDeriv2 = np.empty_like(jointSteps)
+        jointDeriv2[1:-1] = (jointSteps[2:] - 2 * jointSteps[1:-1] + jointSteps[:-2]) / (sampleDist * sampleDist)
+        jointDeriv2[0] = jointDeriv2[1]
+        jointDeriv2[-1] = jointDeriv2[-2]
+        speedSqLimit = self.maxSpeedSquared(jointDeriv, jointDeriv2)
+
+        # Speeds only ever come down from the limits - accelerate as hard as possible from the start and then
+        # brake as hard as possible to the end until that doesn't change anything
+        speedSq = speedSqLimit.copy()
+        speedSq[0] = 0
+        speedSq[-1] = 0
+        for passIdx in range(MAX_PLAN_PASSES):
+            lastSpeedSq = speedSq.copy()
+            for sampleIdx in range(len(samples) - 1):
+                lowSpeedSq, highSpeedSq = self.intervalSpeedSqRange(jointDeriv[sampleIdx:sampleIdx+2],
+                                                                    jointDeriv2[sampleIdx:sampleIdx+2], sampleDist,
+                                                                    speedSq[sampleIdx], True)
+                speedSq[sampleIdx+1] = min(speedSq[sampleIdx+1], max(highSpeedSq, 0))
+            for sampleIdx in range(len(samples) - 2, -1, -1):
+                lowSpeedSq, highSpeedSq = self.intervalSpeedSqRange(jointDeriv[sampleIdx:sampleIdx+2],
+                                                                    jointDeriv2[sampleIdx:sampleIdx+2], sampleDist,
+                                                                    speedSq[sampleIdx+1], False)
+                speedSq[sampleIdx] = min(speedSq[sampleIdx], max(highSpeedSq, 0))
+            if np.allclose(speedSq, lastSpeedSq, rtol=1e-9, atol=1e-9):
+                break
+
+        # Time between samples at constant acceleration
+        speeds = np.sqrt(speedSq)
+        speedSums = speeds[:-1] + speeds[1:]
+        if np.any(speedSums <= 0):
+            raise ValueError("Path can't be followed within the limits at {0}".format(samples[np.flatnonzero(speedSums <= 0)[0]].tolist()))
+        times = np.concatenate(([0.0], np.cumsum(2 * sampleDist / speedSums)))
+        return Trajectory(sampleDists, samples, jointSteps, speeds, times, jointDeriv, jointDeriv2)
+
+    # Timed step program for a trajectory - a move for each sample at which the rounded joint steps change
+    # Rounding to whole steps can make a short move faster than the joint limits - such moves are slowed down
+    # (and the ones after delayed) so the program is played back as timed
+    # startPoint is the [x, y] position the arm is at when the program starts (None for the start of the path)
+    # and the arm gets from there to the start of the path as fast as the firmware can step it
+    def stepProgram(self, trajectory, startPoint=None):
+        absSteps = np.round(trajectory.jointSteps).astype(np.int64)
+        timesUsecs = np.round(trajectory.times * 1e6).astype(np.int64)
+        moveIdxs = np.concatenate(([0], np.flatnonzero(np.any(np.diff(absSteps, axis=0) != 0, axis=1)) + 1))
+        relSteps = np.zeros((len(moveIdxs), 3), dtype=np.int64)
+        relSteps[1:, :2] = np.diff(absSteps[moveIdxs], axis=0)
+        minDurationsUsecs = np.ceil(np.max(np.abs(relSteps[:, :2]) / self.maxStepsPerSec, axis=1) * 1e6).astype(np.int64)
+        # Each move finishes at its planned time or its minimum duration after the previous move if that's later
+        minTimesUsecs = np.cumsum(minDurationsUsecs)
+        moveTimesUsecs = minTimesUsecs + np.maximum.accumulate(timesUsecs[moveIdxs] - minTimesUsecs)
+        durationsUsecs = np.zeros(len(moveIdxs), dtype=np.int64)
+        durationsUsecs[1:] = np.diff(moveTimesUsecs)
+        startSteps = np.zeros(3, dtype=np.int64)
+        startSteps[:2] = absSteps[0]
+        if startPoint is not None:
+            startAbsSteps, startValid = pointsToSteps([startPoint], self.kinematics)
+            if not startValid[0]:
+                raise ValueError("Start point can't be reached")
+            relSteps[0] = np.concatenate((absSteps[0], [0])) - startAbsSteps[0]
+            startSteps = startAbsSteps[0]
+        # The first move gets to the start of the path
+        if not np.any(relSteps[0] != 0):
+            relSteps = relSteps[1:]
+            durationsUsecs = durationsUsecs[1:]
+        return StepProgram(relSteps, startSteps, durationsUsecs)
+
+
+# Plan a JSON file containing a list of points to a timed step program file
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: ScaraTrajectoryPlanner.py points.json output.scsp")
+        sys.exit(1)
+    with open(sys.argv[1]) as pointsFile:
+        jobPoints = json.load(pointsFile)
+    planner = TrajectoryPlanner()
+    trajectory = planner.plan(jobPoints)
+    timedProgram = planner.stepProgram(trajectory)
+    timedProgram.save(sys.argv[2])
+    print("Planned", len(jobPoints), "points to", len(timedProgram), "timed moves taking {0:.3f}s".format(
+        np.sum(timedProgram.durationsUsecs) / 1e6))
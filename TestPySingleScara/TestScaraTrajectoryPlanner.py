@@ -0,0 +1,68 @@
+# Checks that planned trajectories keep the joints within their acceleration limits
+# Usage: python3 TestScaraTrajectoryPlanner.py
+import sys
+import numpy as np
+
+from ScaraTrajectoryPlanner import TrajectoryPlanner
+
+ACCEL_LIMIT_STEPS_PER_SEC2 = 300
+
+
+def circlePoints(numPoints, radius, centreX, centreY):
+    angles = np.linspace(0, 2 * np.pi, numPoints)
+    return np.stack((centreX + radius * np.sin(angles), centreY - radius * np.cos(angles)), axis=1).tolist()
+
+
+# Largest |q' * sddot + q'' * sdot^2| at either end of each interval between samples as a fraction of the limit
+def worstModelAccel(planner, trajectory):
+    sampleDist = trajectory.sampleDists[1] - trajectory.sampleDists[0]
+    speedSq = trajectory.speeds ** 2
+    pathAccels = np.diff(speedSq) / (2 * sampleDist)
+    worst = 0.0
+    for end in (0, 1):
+        jointAccels = trajectory.jointDeriv[end:len(speedSq)-1+end] * pathAccels[:, np.newaxis] + \
+                      trajectory.jointDeriv2[end:len(speedSq)-1+end] * speedSq[end:len(speedSq)-1+end, np.newaxis]
+        worst = max(worst, np.max(np.abs(jointAccels) / planner.maxStepsPerSec2))
+    return worst
+
+
+# Largest joint acceleration worked out from the sample positions and times alone as a fraction of the limit
+def worstTimedAccel(planner, trajectory):
+    times = trajectory.times
+    jointVels = np.diff(trajectory.jointSteps, axis=0) / np.diff(times)[:, np.newaxis]
+    jointAccels = np.diff(jointVels, axis=0) / ((times[2:] - times[:-2]) / 2)[:, np.newaxis]
+    return np.max(np.abs(jointAccels) / planner.maxStepsPerSec2)
+
+
+def checkWithinLimits(points):
+    planner = TrajectoryPlanner(maxStepsPerSec2=[ACCEL_LIMIT_STEPS_PER_SEC2, ACCEL_LIMIT_STEPS_PER_SEC2])
+    trajectory = planner.plan(points)
+    assert worstModelAccel(planner, trajectory) <= 1 + 1e-6
+    assert worstTimedAccel(planner, trajectory) <= 1.02
+    # Within the limits but not needlessly slow
+    assert worstModelAccel(planner, trajectory) >= 0.99
+
+
+def test_lineWithinAccelLimits():
+    checkWithinLimits([(-60, 120), (60, 160)])
+
+
+def test_circleWithinAccelLimits():
+    checkWithinLimits(circlePoints(200, 40, 0, 120))
+
+
+def test_largeCircleWithinAccelLimits():
+    checkWithinLimits(circlePoints(200, 60, 0, 130))
+
+
+def test_shortPathPlanned():
+    trajectory = TrajectoryPlanner().plan([(0, 150), (0, 150.2)])
+    assert len(trajectory) == 3 and trajectory.durationSecs() > 0
+
+
+if __name__ == "__main__":
+    for testName, testFn in list(globals().items()):
+        if testName.startswith("test_"):
+            testFn()
+            print(testName, "ok")
+    sys.exit(0)
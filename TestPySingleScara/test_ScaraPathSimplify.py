@@ -0,0 +1,28 @@
+# Tests for ScaraPathSimplify - run with pytest or directly
+from ScaraPathSimplify import simplifyPath
+
+
+def test_emptyPath():
+    assert simplifyPath([]) == []
+
+
+def test_straightLineSimplified():
+    points = [[x, 150] for x in range(0, 30, 5)]
+    assert simplifyPath(points, 0.2) == [[0, 150], [25, 150]]
+
+
+def test_zChangesKept():
+    points = [[0, 150, 0], [5, 150, 0], [10, 150, 5], [15, 150, 5], [20, 150, 0], [25, 150, 0]]
+    assert simplifyPath(points, 0.2) == points
+
+
+def test_constantZRunsSimplifiedSeparately():
+    points = [[0, 150, 0], [5, 150, 0], [10, 150, 0], [10, 150, 5], [15, 150, 5], [20, 150, 5], [25, 150, 5]]
+    assert simplifyPath(points, 0.2) == [[0, 150, 0], [10, 150, 0], [10, 150, 5], [25, 150, 5]]
+
+
+if __name__ == "__main__":
+    for testName, testFn in list(globals().items()):
+        if testName.startswith("test_"):
+            testFn()
+            print(testName, "ok")